@@ -0,0 +1,93 @@
+"""Compares the per-response latency and CPU time (reading and parsing) of the chunked, streaming frame reader against
+the old byte-at-a-time reader.
+
+Run with ``python3 -m benchmarks.bench_frame_reader``
+"""
+
+import asyncio
+import time
+
+from asyncio import StreamReader
+
+from custom_components.vinx.lw3 import READ_CHUNK_SIZE, Frame, Response, ResponseFramer, parse_response
+
+PAYLOAD_SIZES = {"10 KB": 10 * 1024, "1 MB": 1024 * 1024}
+ITERATIONS = {"10 KB": 200, "1 MB": 3}
+
+
+def build_payload(size: int) -> bytes:
+    """Builds a synthetic GETALL /DISCOVERY response of roughly the requested size"""
+    lines = ["{0000"]
+    length = 0
+    i = 0
+
+    while length < size:
+        line = f"pr /DISCOVERY/TX{i:06X}.DeviceName=Encoder {i}"
+        lines.append(line)
+        length += len(line) + 2
+        i += 1
+
+    lines.append("}")
+
+    return ("\r\n".join(lines) + "\r\n").encode()
+
+
+async def legacy_read_until(reader: StreamReader, phrase: str) -> str | None:
+    """The reader that was used before the framing layer was introduced"""
+    b = bytearray()
+
+    while not reader.at_eof():
+        byte = await reader.read(1)
+        b += byte
+
+        if b.endswith(phrase.encode()):
+            return b.decode()
+
+
+async def read_legacy(reader: StreamReader) -> Response:
+    response = await legacy_read_until(reader, "}")
+
+    return parse_response(response.strip())
+
+
+async def read_framed(reader: StreamReader) -> Response:
+    """Mirrors what the LW3 read loop does"""
+    framer = ResponseFramer()
+
+    while data := await reader.read(READ_CHUNK_SIZE):
+        for message in framer.feed(data):
+            if isinstance(message, Frame):
+                return message.response
+
+
+async def measure(read, payload: bytes, iterations: int) -> tuple[float, float]:
+    wall = 0.0
+    cpu = 0.0
+
+    for _ in range(iterations):
+        reader = StreamReader(limit=len(payload) * 2)
+        reader.feed_data(payload)
+        reader.feed_eof()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        await read(reader)
+        cpu += time.process_time() - cpu_start
+        wall += time.perf_counter() - wall_start
+
+    return wall / iterations, cpu / iterations
+
+
+async def main():
+    print(f"{'payload':>8} {'reader':>8} {'latency (ms)':>14} {'cpu (ms)':>10}")
+
+    for name, size in PAYLOAD_SIZES.items():
+        payload = build_payload(size)
+
+        for reader_name, read in (("legacy", read_legacy), ("framed", read_framed)):
+            latency, cpu = await measure(read, payload, ITERATIONS[name])
+            print(f"{name:>8} {reader_name:>8} {latency * 1000:>14.3f} {cpu * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""Measures the memory held by a parsed 50k line GETALL dump, comparing the slotted, interned, tuple-backed response
+objects with the plain dataclasses and lists that were used before.
+
+Run with ``python3 -m benchmarks.bench_memory``
+"""
+
+import gc
+import tracemalloc
+
+from dataclasses import dataclass
+
+from benchmarks.bench_parser import build_dump
+from custom_components.vinx.lw3 import iter_response, parse_response
+
+LINE_COUNT = 50000
+
+
+@dataclass
+class LegacySingleLineResponse:
+    prefix: str
+    path: str
+
+
+@dataclass
+class LegacyPropertyResponse(LegacySingleLineResponse):
+    value: str
+
+
+@dataclass
+class LegacyNodeResponse(LegacySingleLineResponse):
+    pass
+
+
+def legacy_parse_response(response: str):
+    """Parses the same lines into plain dataclasses with a private copy of every prefix, collected into a list"""
+    lines = []
+
+    for line in iter_response(response):
+        # Build a new string object per line, like the previous f"p{matches.group(1)}" did
+        prefix = "".join(line.prefix)
+        if hasattr(line, "value"):
+            lines.append(LegacyPropertyResponse(prefix, line.path, line.value))
+        else:
+            lines.append(LegacyNodeResponse(prefix, line.path))
+
+    return lines
+
+
+def measure(parse, dump: str) -> tuple[int, int]:
+    """Returns the memory retained by the parsed response and the peak during parsing, in bytes"""
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    response = parse(dump)
+    retained, peak = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+    del response
+
+    return retained, peak
+
+
+def main():
+    dump = build_dump(LINE_COUNT)
+    print(f"{'parser':>22} {'retained (KiB)':>15} {'peak (KiB)':>11} {'bytes/line':>11}")
+
+    for name, parse in (("legacy parse_response", legacy_parse_response), ("parse_response", parse_response)):
+        retained, peak = measure(parse, dump)
+        print(f"{name:>22} {retained / 1024:>15.0f} {peak / 1024:>11.0f} {retained / LINE_COUNT:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measures the cost of command instrumentation by running GETs against an in-process LW3 client whose transport
+answers immediately, so that only the client's own overhead is timed. Compares the uninstrumented command path used
+before metrics were added with metrics disabled and enabled. Since reads also go through read coalescing now, the
+cost of metrics is measured both with and without it, so the two aren't mixed up.
+
+Run with ``python3 -m benchmarks.bench_metrics_overhead``
+"""
+
+import asyncio
+import time
+
+from custom_components.vinx.lw3 import LW3, PropertyResponse, Response
+from custom_components.vinx.metrics import LW3Metrics
+
+COMMAND_COUNT = 100000
+
+
+class LoopbackLW3(LW3):
+    """Answers every command without touching the network"""
+
+    async def _run_command(self, command: str) -> Response:
+        return PropertyResponse("pr", "/.ProductName", "VINX-110-HDMI-ENC")
+
+
+class UninstrumentedLW3(LoopbackLW3):
+    """The command path before instrumentation was added"""
+
+    async def get_property(self, path: str) -> PropertyResponse:
+        response = await asyncio.wait_for(self._run_get(path), self._timeout)
+
+        if not isinstance(response, PropertyResponse):
+            raise ValueError(f"Requested path {path} does not return a property")
+
+        return response
+
+
+class UncoalescedLW3(LoopbackLW3):
+    """The current command path, metrics included, but without read coalescing"""
+
+    async def get_property(self, path: str) -> PropertyResponse:
+        response = await self._wait_for("GET", self._run_get(path))
+
+        if not isinstance(response, PropertyResponse):
+            raise ValueError(f"Requested path {path} does not return a property")
+
+        return response
+
+
+async def time_commands(lw3: LW3) -> float:
+    start = time.perf_counter()
+    for _ in range(COMMAND_COUNT):
+        await lw3.get_property("/.ProductName")
+
+    return (time.perf_counter() - start) / COMMAND_COUNT
+
+
+async def main():
+    print(f"{'client':>24} {'time/command (us)':>18} {'overhead (us)':>14}")
+
+    baseline = None
+    for name, lw3 in (
+        ("uninstrumented", UninstrumentedLW3("127.0.0.1", 6107)),
+        ("metrics disabled", UncoalescedLW3("127.0.0.1", 6107)),
+        ("metrics enabled", UncoalescedLW3("127.0.0.1", 6107, metrics=LW3Metrics())),
+        ("coalescing", LoopbackLW3("127.0.0.1", 6107)),
+        ("coalescing, metrics", LoopbackLW3("127.0.0.1", 6107, metrics=LW3Metrics())),
+    ):
+        elapsed = min([await time_commands(lw3) for _ in range(3)])
+        baseline = baseline or elapsed
+        print(f"{name:>24} {elapsed * 1e6:>18.2f} {(elapsed - baseline) * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
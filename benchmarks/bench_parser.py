@@ -0,0 +1,86 @@
+"""Compares the response parser against the previous regular expression based one, on synthetic GETALL dumps.
+
+Run with ``python3 -m benchmarks.bench_parser``
+"""
+
+import re
+import timeit
+
+from custom_components.vinx.lw3 import (
+    ErrorResponse,
+    MethodResponse,
+    NodeResponse,
+    PropertyResponse,
+    ResponseType,
+    get_response_type,
+    iter_response,
+    parse_response,
+)
+
+LINE_COUNTS = [1000, 10000, 50000]
+
+
+def build_dump(line_count: int) -> str:
+    """Builds a GETALL /DISCOVERY-like response with a mix of nodes and properties"""
+    lines = ["{0000"]
+
+    for i in range(line_count):
+        if i % 10 == 0:
+            lines.append(f"n- /DISCOVERY/TX{i:06X}")
+        else:
+            lines.append(f"pr /DISCOVERY/TX{i:06X}.DeviceName=Encoder {i}")
+
+    lines.append("}")
+
+    return "\r\n".join(lines)
+
+
+def legacy_parse_single_line_response(response: str):
+    """The parser that was used before the rewrite"""
+    match get_response_type(response):
+        case ResponseType.Error:
+            matches = re.search(r"^(.E) (.*) %(E[0-9]+):(.*)$", response)
+            return ErrorResponse(matches.group(1), matches.group(2), matches.group(3), matches.group(4))
+        case ResponseType.Property:
+            matches = re.fullmatch(r"^p(.*) (.*)=(.*)$", response)
+            return PropertyResponse(f"p{matches.group(1)}", matches.group(2), matches.group(3))
+        case ResponseType.Node:
+            matches = re.fullmatch(r"^n(.*) (.*)$", response)
+            return NodeResponse(f"n{matches.group(1)}", matches.group(2))
+        case ResponseType.Method:
+            matches = re.fullmatch(r"^m(.*) (.*):(.*)$", response)
+            return MethodResponse(f"m{matches.group(1)}", matches.group(2), matches.group(3))
+
+
+def legacy_parse_response(response: str):
+    lines = response.split("\r\n")
+
+    if len(lines) == 3:
+        return legacy_parse_single_line_response(lines[1])
+    else:
+        return [legacy_parse_single_line_response(line) for line in lines[1:-1]]
+
+
+def find_first_property(response: str):
+    """Uses the lazy iterator to find a single property without parsing the rest"""
+    return next(line for line in iter_response(response) if isinstance(line, PropertyResponse))
+
+
+def main():
+    print(f"{'lines':>6} {'parser':>22} {'time (ms)':>10}")
+
+    for line_count in LINE_COUNTS:
+        dump = build_dump(line_count)
+        number = max(1, 100000 // line_count)
+
+        for name, parse in (
+            ("legacy parse_response", legacy_parse_response),
+            ("parse_response", parse_response),
+            ("iter_response (first)", find_first_property),
+        ):
+            elapsed = min(timeit.repeat(lambda: parse(dump), number=number, repeat=3)) / number
+            print(f"{line_count:>6} {name:>22} {elapsed * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Times decoder source discovery against a fake LW3 server with N encoders, comparing the old sequential
+per-property crawl with the concurrent per-node GETALL approach.
+
+Run with ``python3 -m benchmarks.bench_source_discovery``
+"""
+
+import asyncio
+import time
+
+from custom_components.vinx.discovery import DiscoveryCache
+from custom_components.vinx.lw3 import LW3, is_encoder_discovery_node
+from tests.fake_lw3_server import FakeLW3Server, build_discovery_properties
+
+ENCODER_COUNTS = [10, 60, 200]
+LATENCY = 0.002
+
+
+async def populate_sequentially(lw3: LW3) -> dict[str, str]:
+    """The discovery approach used before per-node GETALLs were introduced"""
+    sources = {}
+    discovery_nodes = await lw3.get_all("/DISCOVERY")
+
+    for encoder_node in filter(is_encoder_discovery_node, discovery_nodes):
+        device_name = await lw3.get_property(f"{encoder_node.path}.DeviceName")
+        video_channel_id = await lw3.get_property(f"{encoder_node.path}.VideoChannelId")
+        sources[str(video_channel_id)] = str(device_name)
+
+    return sources
+
+
+async def populate_concurrently(lw3: LW3) -> dict[str, str]:
+    discovery_cache = DiscoveryCache()
+    await discovery_cache.async_refresh(lw3)
+
+    return {source.video_channel_id: source.name for source in discovery_cache.sources}
+
+
+async def main():
+    print(f"{'encoders':>8} {'approach':>12} {'time (ms)':>10} {'requests':>9}")
+
+    for encoder_count in ENCODER_COUNTS:
+        server = FakeLW3Server(build_discovery_properties(encoder_count))
+        server.latency = LATENCY
+        await server.start()
+
+        for name, populate in (("sequential", populate_sequentially), ("concurrent", populate_concurrently)):
+            lw3 = LW3("127.0.0.1", server.port)
+            server.commands.clear()
+
+            start = time.perf_counter()
+            sources = await populate(lw3)
+            elapsed = time.perf_counter() - start
+
+            assert len(sources) == encoder_count
+            print(f"{encoder_count:>8} {name:>12} {elapsed * 1000:>10.1f} {len(server.commands):>9}")
+            await lw3.disconnect()
+
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
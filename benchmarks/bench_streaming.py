@@ -0,0 +1,79 @@
+"""Measures the peak memory of reading a node full of EDID-sized hex properties from the fake LW3 server, comparing
+get_all() plus bytes.fromhex() on each value with stream_all() plus decode_hex(). Only a digest of each EDID is kept,
+as when comparing EDIDs across decoders. The server runs in a separate process so that its memory isn't counted.
+
+Run with ``python3 -m benchmarks.bench_streaming``
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import time
+import tracemalloc
+
+from custom_components.vinx.lw3 import LW3, PropertyResponse, decode_hex
+from tests.fake_lw3_server import FakeLW3Server
+
+EDID_COUNT = 2000
+EDID_SIZE = 256
+
+
+async def digest_get_all(lw3: LW3) -> dict[str, str]:
+    response = await lw3.get_all("/EDID/U")
+
+    return {
+        line.path: hashlib.sha1(bytes.fromhex(line.value)).hexdigest()
+        for line in response
+        if isinstance(line, PropertyResponse)
+    }
+
+
+async def digest_stream_all(lw3: LW3) -> dict[str, str]:
+    return {path: hashlib.sha1(decode_hex(value)).hexdigest() async for path, value in lw3.stream_all("/EDID/U")}
+
+
+async def measure(port: int, digest) -> tuple[float, int]:
+    """Returns the duration and the peak memory allocated while reading, in bytes"""
+    lw3 = LW3("127.0.0.1", port, timeout=30)
+    await lw3.get_property("/.ProductName")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    digests = await digest(lw3)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    await lw3.disconnect()
+    assert len(digests) == EDID_COUNT
+
+    return duration, peak
+
+
+def run_server(ports: multiprocessing.Queue):
+    async def serve():
+        properties = {f"/EDID/U.U{i}": (bytes([i % 256]) * EDID_SIZE).hex().upper() for i in range(EDID_COUNT)}
+        server = FakeLW3Server({"/.ProductName": "VINX-110-HDMI-DEC", **properties})
+        await server.start()
+        ports.put(server.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def main():
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_server, args=(ports,), daemon=True)
+    server.start()
+    port = ports.get()
+
+    print(f"{'reader':>23} {'duration (ms)':>14} {'peak (KiB)':>11}")
+    for name, digest in (("get_all + fromhex", digest_get_all), ("stream_all + decode_hex", digest_stream_all)):
+        duration, peak = await measure(port, digest)
+        print(f"{name:>23} {duration * 1000:>14.1f} {peak / 1024:>11.0f}")
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""Drives many LW3 clients against a fake LW3 server and reports command latency, throughput and reconnect behaviour.
+The server can be made to misbehave with latency, fragmented responses, dropped connections and a stream of CHG
+notifications, so changes to the LW3 client can be verified offline.
+
+Run with ``python3 -m benchmarks.load_test --help``
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from dataclasses import dataclass, field
+
+from custom_components.vinx.lw3 import LW3
+from tests.fake_lw3_server import FakeLW3Server, build_discovery_properties
+
+
+@dataclass
+class ClientStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    connects: int = 0
+    disconnects: int = 0
+    notifications: int = 0
+
+
+async def run_client(lw3: LW3, paths: list[str], deadline: float, concurrency: int, stats: ClientStats):
+    """Issues random GETs from a number of concurrent workers sharing one client until the deadline"""
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+
+            try:
+                await lw3.get_property(random.choice(paths))
+                stats.latencies.append(time.perf_counter() - start)
+            except (OSError, EOFError, TimeoutError, ValueError):
+                stats.errors += 1
+                # Don't spin while the client is backing off
+                await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+async def change_properties(server: FakeLW3Server, paths: list[str], interval: float):
+    """Keeps changing properties so that subscribed clients receive CHG notifications"""
+    counter = 0
+
+    while True:
+        await asyncio.sleep(interval)
+        counter += 1
+        server.change_property(random.choice(paths), str(counter))
+
+
+async def drop_connections(server: FakeLW3Server, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        server.drop_connections()
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+async def main(args: argparse.Namespace):
+    server = FakeLW3Server(build_discovery_properties(args.encoders, args.decoders))
+    server.latency = args.latency
+    server.fragment_size = args.fragment_size
+    await server.start()
+
+    paths = list(server.properties.keys())
+    stats = [ClientStats() for _ in range(args.clients)]
+    clients = [LW3("127.0.0.1", server.port, timeout=args.timeout) for _ in range(args.clients)]
+
+    for lw3, client_stats in zip(clients, stats, strict=True):
+
+        def on_connection_change(connected: bool, client_stats=client_stats):
+            if connected:
+                client_stats.connects += 1
+            else:
+                client_stats.disconnects += 1
+
+        def on_change(_change, client_stats=client_stats):
+            client_stats.notifications += 1
+
+        lw3.add_connection_listener(on_connection_change)
+        if args.change_interval:
+            await lw3.subscribe("/DISCOVERY/TX000000", on_change)
+
+    background_tasks = []
+    if args.change_interval:
+        changed_paths = [path for path in paths if path.startswith("/DISCOVERY/TX000000.")]
+        background_tasks.append(asyncio.create_task(change_properties(server, changed_paths, args.change_interval)))
+    if args.drop_interval:
+        background_tasks.append(asyncio.create_task(drop_connections(server, args.drop_interval)))
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(
+        *[
+            run_client(lw3, paths, deadline, args.concurrency, client_stats)
+            for lw3, client_stats in zip(clients, stats, strict=True)
+        ]
+    )
+    elapsed = time.perf_counter() - start
+
+    for task in background_tasks:
+        task.cancel()
+    for lw3 in clients:
+        await lw3.disconnect()
+    await server.stop()
+
+    latencies = [latency for client_stats in stats for latency in client_stats.latencies]
+    reconnects = sum(max(0, client_stats.connects - 1) for client_stats in stats)
+
+    print(f"clients:        {args.clients} x {args.concurrency} workers, {len(paths)} properties")
+    print(f"commands:       {len(latencies)} ok, {sum(client_stats.errors for client_stats in stats)} failed")
+    print(f"throughput:     {len(latencies) / elapsed:.0f} commands/s")
+    print(f"latency p50:    {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"latency p99:    {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"reconnects:     {reconnects} ({server.connection_count} server connections)")
+    print(f"notifications:  {sum(client_stats.notifications for client_stats in stats)}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=10, help="number of LW3 clients")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent commands per client")
+    parser.add_argument("--duration", type=float, default=5, help="test duration in seconds")
+    parser.add_argument("--timeout", type=float, default=5, help="command timeout in seconds")
+    parser.add_argument("--encoders", type=int, default=60, help="number of TX nodes under /DISCOVERY")
+    parser.add_argument("--decoders", type=int, default=60, help="number of RX nodes under /DISCOVERY")
+    parser.add_argument("--latency", type=float, default=0.0, help="server response latency in seconds")
+    parser.add_argument("--fragment-size", type=int, default=None, help="split responses into chunks of this size")
+    parser.add_argument("--drop-interval", type=float, default=None, help="drop all connections this often")
+    parser.add_argument("--change-interval", type=float, default=None, help="send a CHG notification this often")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -1,15 +1,50 @@
+import asyncio
+import logging
+
+from asyncio import Task
+from collections.abc import Callable, Iterable, Mapping
 from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
 
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv, device_registry as dr
 from homeassistant.helpers.device_registry import DeviceInfo, format_mac
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from custom_components.vinx.const import (
+    CONF_DEVICE_INFORMATION,
+    CONF_ENABLE_METRICS,
+    CONF_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+)
+from custom_components.vinx.discovery import DiscoveryCache
+from custom_components.vinx.lw3 import LW3, PropertyResponse, get_property_node, raise_for_errors
+from custom_components.vinx.metrics import LW3Metrics
+from custom_components.vinx.pool import LW3Pool
+from custom_components.vinx.scheduler import PollScheduler
+from custom_components.vinx.services import async_setup_services
+
+_LOGGER = logging.getLogger(__name__)
 
-from custom_components.vinx.const import DOMAIN
-from custom_components.vinx.lw3 import LW3
+PLATFORMS: list[Platform] = [Platform.MEDIA_PLAYER, Platform.BUTTON, Platform.SENSOR, Platform.BINARY_SENSOR]
 
-PLATFORMS: list[Platform] = [Platform.MEDIA_PLAYER, Platform.BUTTON]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Maps the device information cached in the config entry to the properties it's read from
+DEVICE_INFORMATION_PATHS = {
+    "mac_address": "/.MacAddress",
+    "product_name": "/.ProductName",
+    "device_label": "/SYS/MB.DeviceLabel",
+    "firmware_version": "/.FirmwareVersion",
+    "serial_number": "/.SerialNumber",
+    "ip_address": "/MANAGEMENT/NETWORK.IpAddress",
+}
 
 
 @dataclass
@@ -20,56 +55,318 @@ class DeviceInformation:
     device_info: DeviceInfo
 
 
+class VinxCoordinator(DataUpdateCoordinator[dict[str, str]]):
+    """Keeps a snapshot of all properties watched by the entities of a device, mapping paths to values. The snapshot
+    is refreshed with one batched read per interval, no matter how many entities there are, and changes pushed by the
+    device are applied in between. The interval between refreshes is decided by the shared PollScheduler, based on
+    how recently the device's properties have changed and whether it's reachable.
+
+    Nodes with several watched properties are read with a single GETALL, the remaining properties with pipelined GETs,
+    so watching another property of an already watched node costs no extra requests."""
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, lw3: LW3, scan_interval: timedelta, scheduler: PollScheduler
+    ):
+        super().__init__(hass, _LOGGER, config_entry=entry, name=entry.title, update_interval=scan_interval)
+        self.lw3 = lw3
+        self._scheduler = scheduler
+        scheduler.register(entry.entry_id, entry.title, scan_interval.total_seconds(), hass.loop.time())
+        self._watched_paths: set[str] = set()
+        # Watched properties that change all the time on their own, see async_watch()
+        self._volatile_paths: set[str] = set()
+        self._subscribed_nodes: set[str] = set()
+        # Subscriptions and batched reads in flight, which async_shutdown() waits for
+        self._tasks: set[Task] = set()
+        self._unsubscribers: list[Callable[[], None]] = [lw3.add_connection_listener(self._handle_connection_change)]
+
+    def get_value(self, path: str) -> str | None:
+        return self.data.get(path) if self.data else None
+
+    async def async_watch(self, paths: Iterable[str], volatile: bool = False):
+        """Adds properties to the snapshot. Their nodes are subscribed to so that changes are pushed. Subscribing and
+        the refresh that follows happen in the background, so that entities being added don't have to wait for the
+        device to be connected, which takes a full timeout if it's unreachable.
+
+        Volatile properties are measurements and counters (temperature, uptime etc.) that change on nearly every poll.
+        Their changes don't count as activity of the device, so they don't keep it from being polled less often."""
+        new_paths = set(paths) - self._watched_paths
+        if not new_paths:
+            return
+
+        self._watched_paths |= new_paths
+        if volatile:
+            self._volatile_paths |= new_paths
+
+        new_nodes = {get_property_node(path) for path in new_paths} - self._subscribed_nodes
+        self._subscribed_nodes |= new_nodes
+
+        self._track_task(
+            self.config_entry.async_create_task(
+                self.hass, self._async_subscribe(new_nodes), f"{DOMAIN} watch {self.name}"
+            )
+        )
+
+    async def _async_subscribe(self, nodes: set[str]):
+        for node in nodes:
+            self._unsubscribers.append(await self.lw3.subscribe(node, self._handle_property_change))
+
+        await self.async_request_refresh()
+
+    def _track_task(self, task: Task):
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def async_set_property(self, path: str, value: str):
+        response = await self.lw3.set_property(path, value)
+        self._record_change(path)
+
+        if path in self._watched_paths:
+            self._async_apply_change(path, response.value)
+
+    async def _async_update_data(self) -> dict[str, str]:
+        fetch = asyncio.ensure_future(self._fetch_watched_paths())
+        self._track_task(fetch)
+
+        try:
+            data = await fetch
+        except UpdateFailed:
+            self._set_next_interval(success=False)
+            raise
+
+        for path, value in data.items():
+            if self.data is not None and path in self.data and self.data[path] != value:
+                self._record_change(path)
+
+        self._set_next_interval(success=True)
+
+        return data
+
+    def _set_next_interval(self, success: bool):
+        interval = self._scheduler.next_interval(self.config_entry.entry_id, success, self.hass.loop.time())
+        self.update_interval = timedelta(seconds=interval)
+
+    def _record_change(self, path: str):
+        if path in self._volatile_paths:
+            return
+
+        # Polling sooner means the refresh that's already scheduled has to be moved forward
+        if self._scheduler.record_change(self.config_entry.entry_id, path, self.hass.loop.time()):
+            self._set_next_interval(success=True)
+            if self._listeners:
+                self._schedule_refresh()
+
+    async def _fetch_watched_paths(self) -> dict[str, str]:
+        data = {}
+
+        for path, result in (await self.lw3.read_properties(sorted(self._watched_paths))).items():
+            if isinstance(result, (OSError, EOFError)):
+                raise UpdateFailed(f"Unable to communicate with {self.name}: {result}") from result
+            elif isinstance(result, Exception):
+                _LOGGER.debug(f"Unable to read {path} from {self.name}: {result}")
+            else:
+                data[path] = result.value
+
+        return data
+
+    @callback
+    def _handle_property_change(self, change: PropertyResponse):
+        if change.path in self._watched_paths and self.data is not None:
+            self._record_change(change.path)
+            self._async_apply_change(change.path, change.value)
+
+    @callback
+    def _async_apply_change(self, path: str, value: str):
+        # Unlike async_set_updated_data(), this leaves the scheduled refresh alone, so that a device that keeps pushing
+        # changes is still polled on time
+        if self.data is None:
+            self.data = {}
+
+        self.data[path] = value
+        self.async_update_listeners()
+
+    @callback
+    def _handle_connection_change(self, connected: bool):
+        if connected:
+            # Notifications may have been missed while disconnected
+            self.config_entry.async_create_background_task(
+                self.hass, self.async_request_refresh(), f"{DOMAIN} refresh {self.name}"
+            )
+        else:
+            self.async_set_update_error(UpdateFailed(f"Lost connection to {self.name}"))
+
+    async def async_shutdown(self) -> None:
+        await super().async_shutdown()
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+        self._scheduler.unregister(self.config_entry.entry_id)
+
+        for unsubscribe in self._unsubscribers:
+            unsubscribe()
+        self._unsubscribers.clear()
+
+
 @dataclass
 class VinxRuntimeData:
     lw3: LW3
     device_information: DeviceInformation
+    coordinator: VinxCoordinator
+    # The options the entry was set up with, to tell option changes apart from other entry updates
+    options: Mapping[str, Any]
+
+
+@dataclass
+class VinxData:
+    """Integration-wide data shared by all config entries, stored in hass.data[DOMAIN]"""
+
+    discovery_cache: DiscoveryCache
+    pool: LW3Pool
+    scheduler: PollScheduler
+
+
+def get_vinx_data(hass: HomeAssistant) -> VinxData:
+    if DOMAIN not in hass.data:
+        hass.data[DOMAIN] = VinxData(DiscoveryCache(), LW3Pool(), PollScheduler())
+
+    return hass.data[DOMAIN]
+
+
+async def get_device_properties(lw3: LW3) -> dict[str, str]:
+    """Reads the properties that make up the device information, keyed as in DEVICE_INFORMATION_PATHS"""
+    properties = await lw3.get_properties(DEVICE_INFORMATION_PATHS.values())
+    raise_for_errors(properties)
+
+    return {key: str(properties[path]) for key, path in DEVICE_INFORMATION_PATHS.items()}
+
+
+def build_device_information(device_properties: Mapping[str, str]) -> DeviceInformation:
+    mac_address = device_properties["mac_address"]
+    product_name = device_properties["product_name"]
+    device_label = device_properties["device_label"]
+
+    device_info = DeviceInfo(
+        identifiers={(DOMAIN, format_mac(mac_address))},
+        name=f"{device_label} ({product_name})",
+        manufacturer="Lightware",
+        model=product_name,
+        sw_version=device_properties["firmware_version"],
+        serial_number=device_properties["serial_number"],
+        configuration_url=f"http://{device_properties['ip_address']}/",
+    )
+
+    return DeviceInformation(mac_address, product_name, device_label, device_info)
 
 
 async def get_device_information(lw3: LW3) -> DeviceInformation:
-    async with lw3.connection():
-        mac_address = str(await lw3.get_property("/.MacAddress"))
-        product_name = str(await lw3.get_property("/.ProductName"))
-        device_label = str(await lw3.get_property("/SYS/MB.DeviceLabel"))
-        firmware_version = str(await lw3.get_property("/.FirmwareVersion"))
-        serial_number = str(await lw3.get_property("/.SerialNumber"))
-        ip_address = str(await lw3.get_property("/MANAGEMENT/NETWORK.IpAddress"))
-
-        device_info = DeviceInfo(
-            identifiers={(DOMAIN, format_mac(mac_address))},
-            name=f"{device_label} ({product_name})",
-            manufacturer="Lightware",
-            model=product_name,
-            sw_version=firmware_version,
-            serial_number=serial_number,
-            configuration_url=f"http://{ip_address}/",
+    return build_device_information(await get_device_properties(lw3))
+
+
+async def async_refresh_device_information(hass: HomeAssistant, entry: ConfigEntry):
+    """Re-reads the device information in the background, updating the cached copy and the device registry if it
+    has changed, e.g. after a firmware upgrade or relabeling"""
+    try:
+        device_properties = await get_device_properties(entry.runtime_data.lw3)
+    except (OSError, EOFError, TimeoutError, ValueError) as e:
+        _LOGGER.debug(f"Unable to refresh device information of {entry.title}: {e}")
+        return
+
+    if device_properties == entry.data.get(CONF_DEVICE_INFORMATION):
+        return
+
+    _LOGGER.info(f"Device information of {entry.title} has changed")
+    hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_DEVICE_INFORMATION: device_properties})
+
+    device_info = build_device_information(device_properties).device_info
+    device_registry = dr.async_get(hass)
+    if device := device_registry.async_get_device(identifiers=device_info["identifiers"]):
+        device_registry.async_update_device(
+            device.id,
+            name=device_info["name"],
+            model=device_info["model"],
+            sw_version=device_info["sw_version"],
+            serial_number=device_info["serial_number"],
+            configuration_url=device_info["configuration_url"],
         )
 
-        return DeviceInformation(mac_address, product_name, device_label, device_info)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async_setup_services(hass)
+
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up from a config entry."""
     if "host" in entry.data and "port" in entry.data:
-        lw3 = LW3(entry.data["host"], entry.data["port"])
+        metrics = LW3Metrics() if entry.options.get(CONF_ENABLE_METRICS, False) else None
+        pool = get_vinx_data(hass).pool
+        lw3 = pool.acquire(entry.data["host"], entry.data["port"], metrics=metrics)
     else:
         raise KeyError("Config entry is missing required parameters")
 
-    try:
-        # Store runtime information
-        async with lw3.connection():
-            device_information = await get_device_information(lw3)
+    # The connection is shared through the pool, opened lazily and kept open for the lifetime of the entry. Entities
+    # are set up from the cached device information without waiting for the device, and become unavailable if it can't
+    # be reached. The device only has to be reachable on the first start after the entry was created, if nothing has
+    # been cached yet.
+    if (device_properties := entry.data.get(CONF_DEVICE_INFORMATION)) is not None:
+        device_information = build_device_information(device_properties)
+        refresh_device_information = True
+    else:
+        try:
+            device_properties = await get_device_properties(lw3)
+        except (OSError, EOFError, TimeoutError) as e:
+            await pool.release(lw3)
+            raise ConfigEntryNotReady("Unable to connect") from e
+
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_DEVICE_INFORMATION: device_properties})
+        device_information = build_device_information(device_properties)
+        refresh_device_information = False
+
+    # Entities register the properties they need with the coordinator as they're added
+    scan_interval = timedelta(seconds=entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))
+    coordinator = VinxCoordinator(hass, entry, lw3, scan_interval, get_vinx_data(hass).scheduler)
 
-        # Store the lw3 as runtime data in the entry
-        entry.runtime_data = VinxRuntimeData(lw3, device_information)
-    except ConnectionError as e:
-        raise ConfigEntryNotReady("Unable to connect") from e
+    # Store the lw3 as runtime data in the entry
+    entry.runtime_data = VinxRuntimeData(lw3, device_information, coordinator, dict(entry.options))
+
+    # Reload the entry when the options change
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if refresh_device_information:
+        entry.async_create_background_task(
+            hass, async_refresh_device_information(hass, entry), f"{DOMAIN} device information {entry.title}"
+        )
+
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    # The entry data is also updated when the device information changes, which doesn't need a reload
+    runtime_data: VinxRuntimeData = entry.runtime_data
+    if entry.options != runtime_data.options:
+        await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
+    if unload_ok:
+        runtime_data: VinxRuntimeData = entry.runtime_data
+
+        # Stop polling and drop the subscriptions before releasing the session, otherwise commands still in flight
+        # fail once it's disconnected and the subscriptions make it reconnect, outside of the pool
+        await runtime_data.coordinator.async_shutdown()
+        await get_vinx_data(hass).pool.release(runtime_data.lw3)
+
+        # Drop the shared data once the last entry is gone
+        other_entries = [
+            other_entry
+            for other_entry in hass.config_entries.async_entries(DOMAIN)
+            if other_entry.entry_id != entry.entry_id and other_entry.state is ConfigEntryState.LOADED
+        ]
+        if not other_entries:
+            hass.data.pop(DOMAIN, None)
+
+    return unload_ok
@@ -0,0 +1,75 @@
+import logging
+
+from dataclasses import dataclass
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+from homeassistant.config_entries import ConfigEntry
+
+from custom_components.vinx import VinxRuntimeData
+from custom_components.vinx.entity import VinxPropertyEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class VinxPropertyBinarySensorEntityDescription(BinarySensorEntityDescription):
+    # The LW3 property the sensor represents
+    path: str
+
+
+# Binary sensors mapped from LW3 properties. Like the sensors, properties of the same node are read with a single
+# GETALL, so adding another one costs no extra requests.
+PROPERTY_BINARY_SENSORS: tuple[VinxPropertyBinarySensorEntityDescription, ...] = (
+    VinxPropertyBinarySensorEntityDescription(
+        key="signal_present",
+        name="signal present",
+        path="/MEDIA/VIDEO/I1.SignalPresent",
+    ),
+    VinxPropertyBinarySensorEntityDescription(
+        key="hdcp_active",
+        name="HDCP active",
+        path="/MEDIA/VIDEO/I1.HdcpActive",
+    ),
+    VinxPropertyBinarySensorEntityDescription(
+        key="input_connected",
+        name="input connected",
+        path="/MEDIA/VIDEO/I1.Connected",
+        device_class=BinarySensorDeviceClass.PLUG,
+    ),
+    VinxPropertyBinarySensorEntityDescription(
+        key="output_connected",
+        name="output connected",
+        path="/MEDIA/VIDEO/O1.Connected",
+        device_class=BinarySensorDeviceClass.PLUG,
+    ),
+)
+
+
+def parse_bool(value: str) -> bool:
+    """Parses a boolean LW3 property, which depending on the property is either 0/1 or false/true"""
+    return value.strip().lower() in ("1", "true")
+
+
+async def async_setup_entry(hass, entry: ConfigEntry, async_add_entities):
+    runtime_data: VinxRuntimeData = entry.runtime_data
+
+    async_add_entities(
+        [
+            VinxPropertyBinarySensorEntity(runtime_data.coordinator, runtime_data.device_information, description)
+            for description in PROPERTY_BINARY_SENSORS
+        ]
+    )
+
+
+class VinxPropertyBinarySensorEntity(VinxPropertyEntity, BinarySensorEntity):
+    entity_description: VinxPropertyBinarySensorEntityDescription
+
+    @property
+    def is_on(self) -> bool | None:
+        value = self.property_value
+
+        return parse_bool(value) if value is not None else None
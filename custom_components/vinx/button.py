@@ -3,8 +3,9 @@ import logging
 from homeassistant.components.button import ButtonDeviceClass, ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from custom_components.vinx import LW3, DeviceInformation, VinxRuntimeData
+from custom_components.vinx import DeviceInformation, VinxCoordinator, VinxRuntimeData
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,12 +16,15 @@ async def async_setup_entry(hass, entry: ConfigEntry, async_add_entities):
     _LOGGER.info(f"Runtime data: {runtime_data}")
 
     # Add entity to Home Assistant
-    async_add_entities([VinxRebootButtonEntity(runtime_data.lw3, runtime_data.device_information)])
+    async_add_entities([VinxRebootButtonEntity(runtime_data.coordinator, runtime_data.device_information)])
 
 
-class VinxRebootButtonEntity(ButtonEntity):
-    def __init__(self, lw3: LW3, device_information: DeviceInformation) -> None:
-        self._lw3 = lw3
+class VinxRebootButtonEntity(CoordinatorEntity[VinxCoordinator], ButtonEntity):
+    """Reboots the device. Available whenever the device is reachable, as determined by the coordinator."""
+
+    def __init__(self, coordinator: VinxCoordinator, device_information: DeviceInformation) -> None:
+        super().__init__(coordinator)
+        self._lw3 = coordinator.lw3
         self._device_information = device_information
 
     _attr_device_class = ButtonDeviceClass.RESTART
@@ -47,6 +51,5 @@ class VinxRebootButtonEntity(ButtonEntity):
             return "VINX reboot button"
 
     async def async_press(self) -> None:
-        async with self._lw3.connection():
-            _LOGGER.info("Issuing device reset")
-            await self._lw3.call("/SYS", "reset(1)")
+        _LOGGER.info("Issuing device reset")
+        await self._lw3.call("/SYS", "reset(1)")
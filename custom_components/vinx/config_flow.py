@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from typing import Any
@@ -5,14 +6,71 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant.components.zeroconf import ZeroconfServiceInfo
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry, ConfigFlow, ConfigFlowResult, OptionsFlow
+from homeassistant.core import callback
+from homeassistant.data_entry_flow import FlowResultType
 from homeassistant.helpers.device_registry import format_mac
 
-from .const import CONF_HOST, CONF_PORT, DOMAIN
+from . import get_device_properties, get_vinx_data
+from .const import (
+    CONF_ADD_ALL_DEVICES,
+    CONF_DEVICE_INFORMATION,
+    CONF_ENABLE_METRICS,
+    CONF_HOST,
+    CONF_PORT,
+    CONF_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+)
 from .lw3 import LW3
+from .pool import LW3Pool
+from .snapshot import walk_tree
 
 _LOGGER = logging.getLogger(__name__)
 
+# The maximum number of devices probed concurrently when adding a whole installation
+BULK_PROBE_CONCURRENCY = 10
+
+# How long (in seconds) to wait for each probed device
+BULK_PROBE_TIMEOUT = 5
+
+
+def get_entry_title(device_properties: dict[str, str]) -> str:
+    return f"{device_properties['device_label']} ({device_properties['product_name']})"
+
+
+async def async_get_peer_addresses(lw3: LW3) -> list[str]:
+    """Returns the IP addresses of all encoders and decoders listed under /DISCOVERY of a device"""
+    snapshot = await walk_tree(lw3, "/DISCOVERY", BULK_PROBE_CONCURRENCY)
+
+    return sorted(
+        {
+            properties["IpAddress"]
+            for node, properties in snapshot.nodes.items()
+            if node.startswith(("/DISCOVERY/TX", "/DISCOVERY/RX")) and properties.get("IpAddress")
+        }
+    )
+
+
+async def async_probe_devices(pool: LW3Pool, addresses: list[tuple[str, int]]) -> list[dict[str, Any]]:
+    """Reads the device information of each device concurrently, a bounded number of devices at a time. Returns the
+    config entry data of every device that responded, skipping the rest."""
+    semaphore = asyncio.Semaphore(BULK_PROBE_CONCURRENCY)
+
+    async def probe(host: str, port: int) -> dict[str, Any] | None:
+        async with semaphore, pool.session(host, port, timeout=BULK_PROBE_TIMEOUT) as lw3:
+            try:
+                device_properties = await get_device_properties(lw3)
+            except (OSError, EOFError, TimeoutError, ValueError) as e:
+                _LOGGER.info(f"Skipping {host}:{port}, unable to read device information: {e}")
+                return None
+
+        return {CONF_HOST: host, CONF_PORT: port, CONF_DEVICE_INFORMATION: device_properties}
+
+    results = await asyncio.gather(*[probe(host, port) for host, port in addresses])
+
+    return [result for result in results if result is not None]
+
 
 class VinxConfigFlow(ConfigFlow, domain=DOMAIN):
     VERSION = 1
@@ -21,6 +79,13 @@ class VinxConfigFlow(ConfigFlow, domain=DOMAIN):
         # Potentially prepopulated values (e.g. during auto-discovery)
         self.host: str | None = None
         self.port: int = 6107
+        # Devices found when adding a whole installation, pending confirmation
+        self.bulk_devices: list[dict[str, Any]] = []
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        return VinxOptionsFlow()
 
     @property
     def schema(self):
@@ -28,6 +93,7 @@ class VinxConfigFlow(ConfigFlow, domain=DOMAIN):
             {
                 vol.Required(CONF_HOST, default=self.host): str,
                 vol.Required(CONF_PORT, default=self.port): int,
+                vol.Optional(CONF_ADD_ALL_DEVICES, default=False): bool,
             }
         )
 
@@ -35,26 +101,34 @@ class VinxConfigFlow(ConfigFlow, domain=DOMAIN):
         """Handle user initiated configuration"""
         errors: dict[str, str] = {}
         if user_input is not None:
-            try:
-                # Verify that the device is connectable
-                lw3 = LW3(user_input["host"], user_input["port"])
-                async with lw3.connection():
-                    # Query information for the entry title and entry unique ID
-                    product_name = await lw3.get_property("/.ProductName")
-                    device_label = await lw3.get_property("/SYS/MB.DeviceLabel")
-                    mac_address = await lw3.get_property("/.MacAddress")
-
-                    title = f"{device_label} ({product_name})"
-
-                    unique_id = format_mac(str(mac_address))
-                    await self.async_set_unique_id(unique_id)
+            add_all_devices = user_input.pop(CONF_ADD_ALL_DEVICES, False)
+            peer_addresses = []
 
-                    # Abort the configuration if the device is already configured
-                    self._abort_if_unique_id_configured()
+            try:
+                # Verify that the device is connectable. The session is shared with the device's config entry, if
+                # there is one, so the device doesn't see another client.
+                async with get_vinx_data(self.hass).pool.session(user_input["host"], user_input["port"]) as lw3:
+                    # Query information for the entry title and entry unique ID. It's stored in the entry as well so
+                    # that the entry can be set up without waiting for the device.
+                    device_properties = await get_device_properties(lw3)
+
+                    if add_all_devices:
+                        peer_addresses = await async_get_peer_addresses(lw3)
+                    else:
+                        unique_id = format_mac(device_properties["mac_address"])
+                        await self.async_set_unique_id(unique_id)
+
+                        # Abort the configuration if the device is already configured
+                        self._abort_if_unique_id_configured()
             except (BrokenPipeError, ConnectionError, OSError):  # all technically OSError
                 errors["base"] = "cannot_connect"
             else:
-                return self.async_create_entry(title=title, data=user_input)
+                data = {**user_input, CONF_DEVICE_INFORMATION: device_properties}
+
+                if add_all_devices:
+                    return await self._async_probe_installation(data, peer_addresses)
+
+                return self.async_create_entry(title=get_entry_title(device_properties), data=data)
 
         return self.async_show_form(step_id="user", data_schema=self.schema, errors=errors)
 
@@ -72,3 +146,100 @@ class VinxConfigFlow(ConfigFlow, domain=DOMAIN):
 
         # Trigger the user configuration flow
         return await self.async_step_user()
+
+    async def _async_probe_installation(self, data: dict[str, Any], peer_addresses: list[str]) -> ConfigFlowResult:
+        """Probes every peer of the specified device concurrently and offers to add all that aren't configured yet"""
+        peers = await async_probe_devices(
+            get_vinx_data(self.hass).pool, [(address, data[CONF_PORT]) for address in peer_addresses]
+        )
+
+        # The same device may be listed more than once, e.g. if it has been renamed
+        configured_ids = self._async_current_ids()
+        devices = {}
+        for device in [data, *peers]:
+            unique_id = format_mac(device[CONF_DEVICE_INFORMATION]["mac_address"])
+            if unique_id not in configured_ids:
+                devices.setdefault(unique_id, device)
+
+        if not devices:
+            return self.async_abort(reason="no_devices_found")
+
+        self.bulk_devices = list(devices.values())
+
+        return await self.async_step_bulk_confirm()
+
+    async def async_step_bulk_confirm(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Adds all devices found in the installation once confirmed"""
+        if user_input is not None:
+            first_device, *other_devices = self.bulk_devices
+
+            # A flow can only create one entry, so the others are imported by flows of their own. They're waited for,
+            # so that the devices that were actually added can be reported.
+            results = await asyncio.gather(
+                *[
+                    self.hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_IMPORT}, data=device)
+                    for device in other_devices
+                ]
+            )
+            # The first device is added by this flow
+            outcomes = [
+                "added",
+                *["added" if result["type"] is FlowResultType.CREATE_ENTRY else result["reason"] for result in results],
+            ]
+            added = outcomes.count("added")
+            _LOGGER.info(f"Added {added} of {len(self.bulk_devices)} devices")
+
+            devices = "\n".join(
+                f"- {get_entry_title(device[CONF_DEVICE_INFORMATION])}, {device[CONF_HOST]}: {outcome}"
+                for device, outcome in zip(self.bulk_devices, outcomes, strict=True)
+            )
+
+            return await self._async_create_device_entry(
+                first_device,
+                description="bulk",
+                description_placeholders={
+                    "added": str(added),
+                    "count": str(len(self.bulk_devices)),
+                    "devices": devices,
+                },
+            )
+
+        devices = "\n".join(
+            f"- {get_entry_title(device[CONF_DEVICE_INFORMATION])}, {device[CONF_HOST]}" for device in self.bulk_devices
+        )
+
+        return self.async_show_form(
+            step_id="bulk_confirm",
+            description_placeholders={"count": str(len(self.bulk_devices)), "devices": devices},
+        )
+
+    async def async_step_import(self, import_data: dict[str, Any]) -> ConfigFlowResult:
+        """Adds a device whose information has already been read, e.g. during bulk onboarding"""
+        return await self._async_create_device_entry(import_data)
+
+    async def _async_create_device_entry(self, data: dict[str, Any], **kwargs) -> ConfigFlowResult:
+        device_properties = data[CONF_DEVICE_INFORMATION]
+
+        # Discovery flows may still be pending for the device, they're aborted once the entry has been created
+        await self.async_set_unique_id(format_mac(device_properties["mac_address"]), raise_on_progress=False)
+        self._abort_if_unique_id_configured()
+
+        return self.async_create_entry(title=get_entry_title(device_properties), data=data, **kwargs)
+
+
+class VinxOptionsFlow(OptionsFlow):
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Handle the options, i.e. the polling interval and whether to collect command metrics"""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        scan_interval = self.config_entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        enable_metrics = self.config_entry.options.get(CONF_ENABLE_METRICS, False)
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_SCAN_INTERVAL, default=scan_interval): vol.All(int, vol.Range(min=5, max=3600)),
+                vol.Required(CONF_ENABLE_METRICS, default=enable_metrics): bool,
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema)
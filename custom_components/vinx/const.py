@@ -4,3 +4,13 @@ CONF_HOST = "host"
 CONF_PORT = "port"
 CONF_PASSWORD = "password"
 CONF_DEVICE_TYPE = "device_type"
+CONF_SCAN_INTERVAL = "scan_interval"
+CONF_ADD_ALL_DEVICES = "add_all_devices"
+CONF_ENABLE_METRICS = "enable_metrics"
+# Device information cached in the config entry data, so that entities can be set up without reaching the device
+CONF_DEVICE_INFORMATION = "device_information"
+
+# Polling interval (in seconds). Most changes are pushed by the devices, so polling is mostly a safety net.
+DEFAULT_SCAN_INTERVAL = 30
+# Upper limit (in seconds) for the polling interval while backing off from an unreachable device
+MAX_SCAN_INTERVAL = 300
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from custom_components.vinx import VinxRuntimeData, get_vinx_data
+from custom_components.vinx.const import CONF_HOST, CONF_PASSWORD
+from custom_components.vinx.lw3 import LW3
+from custom_components.vinx.snapshot import walk_tree
+
+# The maximum number of nodes included in the device tree dump
+DIAGNOSTICS_MAX_NODES = 500
+
+# Longer property values (e.g. EDIDs) are cut to this many characters
+DIAGNOSTICS_MAX_VALUE_LENGTH = 256
+
+# How long (in seconds) the device tree dump may take before it's given up on
+DIAGNOSTICS_TIMEOUT = 30
+
+TO_REDACT = {
+    CONF_HOST,
+    CONF_PASSWORD,
+    "mac_address",
+    "serial_number",
+    "ip_address",
+    "MacAddress",
+    "SerialNumber",
+    "Password",
+    # Also listed for every peer under /DISCOVERY
+    "IpAddress",
+    "HostName",
+    "Gateway",
+}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    runtime_data: VinxRuntimeData = entry.runtime_data
+    lw3 = runtime_data.lw3
+    coordinator = runtime_data.coordinator
+    discovery_cache = get_vinx_data(hass).discovery_cache
+
+    diagnostics = {
+        "entry": {"title": entry.title, "data": dict(entry.data), "options": dict(entry.options)},
+        "device": {
+            "mac_address": runtime_data.device_information.mac_address,
+            "product_name": runtime_data.device_information.product_name,
+            "device_label": runtime_data.device_information.device_label,
+        },
+        "connection": lw3.get_connection_state(),
+        "metrics": lw3.metrics.as_dict() if lw3.metrics is not None else None,
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+            "data": coordinator.data,
+        },
+        "polling": get_vinx_data(hass).scheduler.get_state(entry.entry_id),
+        "discovery": {
+            "populated": discovery_cache.is_populated,
+            "encoders": [
+                {**asdict(encoder), "node": _redact_node(encoder.node)} for encoder in discovery_cache.encoders.values()
+            ],
+            "sources": [
+                {**asdict(source), "name": source.name.replace(source.mac_address, _pseudonymize(source.mac_address))}
+                for source in discovery_cache.sources
+            ],
+        },
+        "tree": await _async_dump_tree(lw3),
+    }
+
+    return async_redact_data(diagnostics, TO_REDACT)
+
+
+async def _async_dump_tree(lw3: LW3) -> dict[str, Any]:
+    """Dumps the whole device tree, walking it concurrently. The dump is capped both in the number of nodes and in
+    the length of each value, so that a large /DISCOVERY node doesn't make it huge."""
+    try:
+        async with asyncio.timeout(DIAGNOSTICS_TIMEOUT):
+            snapshot = await walk_tree(lw3, "/", max_nodes=DIAGNOSTICS_MAX_NODES)
+    except (OSError, EOFError, TimeoutError) as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    return {
+        "truncated": snapshot.truncated,
+        "nodes": {
+            _redact_node(node): {name: _truncate(value) for name, value in properties.items()}
+            for node, properties in snapshot.nodes.items()
+        },
+    }
+
+
+def _pseudonymize(value: str) -> str:
+    """Replaces an identifier with a short hash of it, so that it's still told apart from others in the same dump"""
+    return f"**REDACTED_{hashlib.sha256(value.encode()).hexdigest()[:8]}**"
+
+
+def _redact_node(node: str) -> str:
+    """Pseudonymizes the names of the nodes under /DISCOVERY, which are derived from the MAC addresses of the peers"""
+    root, separator, rest = node.partition("/DISCOVERY/")
+    if root or not separator:
+        return node
+
+    name, separator, children = rest.partition("/")
+
+    return f"/DISCOVERY/{_pseudonymize(name)}{separator}{children}"
+
+
+def _truncate(value: str) -> str:
+    if len(value) <= DIAGNOSTICS_MAX_VALUE_LENGTH:
+        return value
+
+    return f"{value[:DIAGNOSTICS_MAX_VALUE_LENGTH]}... ({len(value)} characters)"
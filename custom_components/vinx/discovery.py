@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.helpers.device_registry import format_mac
+
+from custom_components.vinx.lw3 import LW3, Response, get_node_properties, is_encoder_discovery_node
+from custom_components.vinx.sources import SourceIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+# The maximum number of discovery nodes to query concurrently
+DISCOVERY_CONCURRENCY = 10
+
+# How often (in seconds) the list of discovery nodes is re-read, no matter how many decoders ask for it
+DISCOVERY_REFRESH_INTERVAL = 300
+
+# How long (in seconds) the properties of a discovered encoder are trusted before they're fetched again
+DISCOVERY_ENTRY_TTL = 3600
+
+
+@dataclass
+class DiscoveredEncoder:
+    mac_address: str
+    node: str
+    device_name: str
+    video_channel_id: str
+    fetched_at: float
+
+
+class DiscoveryCache:
+    """Installation-wide cache of the encoders found under /DISCOVERY, keyed by MAC address and shared by all
+    decoders. A refresh lists the discovery nodes once and only fetches the properties of nodes that are new or
+    whose entry has expired. Encoders that are no longer listed are evicted."""
+
+    def __init__(self):
+        self._encoders: dict[str, DiscoveredEncoder] = {}
+        self._sources = SourceIndex()
+        self._last_refresh: float | None = None
+        self._lock = asyncio.Lock()
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def encoders(self) -> dict[str, DiscoveredEncoder]:
+        return self._encoders
+
+    @property
+    def sources(self) -> SourceIndex:
+        """The encoders as selectable sources, updated incrementally on every refresh"""
+        return self._sources
+
+    @property
+    def is_populated(self) -> bool:
+        return self._last_refresh is not None
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Registers a callback that is called whenever the set of encoders changes. Returns a function that removes
+        the listener."""
+        self._listeners.append(listener)
+
+        return lambda: self._listeners.remove(listener)
+
+    async def async_refresh(self, lw3: LW3, force: bool = False) -> bool:
+        """Refreshes the cache using the specified device, unless it has been refreshed recently. Returns whether
+        the set of encoders changed."""
+        async with self._lock:
+            now = time.monotonic()
+            if not force and self._last_refresh is not None and now - self._last_refresh < DISCOVERY_REFRESH_INTERVAL:
+                return False
+
+            discovery_nodes = await lw3.get_all("/DISCOVERY")
+            if not isinstance(discovery_nodes, tuple):
+                # A single node is returned on its own
+                discovery_nodes = (discovery_nodes,)
+
+            encoder_nodes = {node.path for node in filter(is_encoder_discovery_node, discovery_nodes)}
+            known_nodes = {encoder.node: encoder for encoder in self._encoders.values()}
+
+            # Only fetch nodes we haven't seen before or whose information has expired
+            stale_nodes = [
+                node
+                for node in sorted(encoder_nodes)
+                if node not in known_nodes or now - known_nodes[node].fetched_at >= DISCOVERY_ENTRY_TTL
+            ]
+            responses = await self._get_nodes(lw3, stale_nodes)
+
+            encoders = {
+                encoder.mac_address: encoder for encoder in known_nodes.values() if encoder.node in encoder_nodes
+            }
+            for node, response in zip(stale_nodes, responses, strict=True):
+                if (encoder := self._parse_encoder(node, response, now)) is not None:
+                    encoders[encoder.mac_address] = encoder
+                elif node in known_nodes:
+                    # Keep what we knew about the encoder rather than dropping it over an unreadable node
+                    encoders[known_nodes[node].mac_address] = known_nodes[node]
+
+            self._last_refresh = now
+            changed = self._set_encoders(encoders)
+
+        if changed:
+            _LOGGER.info(f"Discovered encoders changed, now {len(self._encoders)} encoders")
+            for listener in list(self._listeners):
+                listener()
+
+        return changed
+
+    @staticmethod
+    async def _get_nodes(lw3: LW3, nodes: list[str]) -> list[Response | ValueError]:
+        # Fetch all properties of each node with a single request, a bounded number of nodes at a time
+        semaphore = asyncio.Semaphore(DISCOVERY_CONCURRENCY)
+
+        async def get_node(node: str) -> Response:
+            async with semaphore:
+                return await lw3.get_all(node)
+
+        responses = await asyncio.gather(*[get_node(node) for node in nodes], return_exceptions=True)
+
+        # Errors reported for individual nodes are dealt with per node, anything else means the refresh failed
+        for response in responses:
+            if isinstance(response, BaseException) and not isinstance(response, ValueError):
+                raise response
+
+        return responses
+
+    @staticmethod
+    def _parse_encoder(node: str, response: Response | ValueError, now: float) -> DiscoveredEncoder | None:
+        if isinstance(response, ValueError):
+            _LOGGER.debug(f"Skipping discovery node {node}: {response}")
+            return None
+
+        properties = get_node_properties(response)
+        if "DeviceName" not in properties or "VideoChannelId" not in properties:
+            _LOGGER.debug(f"Skipping discovery node {node}, it's missing the device name or video channel ID")
+            return None
+
+        # Fall back to the node path in case the device doesn't report the MAC address
+        mac_address = format_mac(properties.get("MacAddress", node))
+
+        return DiscoveredEncoder(mac_address, node, properties["DeviceName"], properties["VideoChannelId"], now)
+
+    def _set_encoders(self, encoders: dict[str, DiscoveredEncoder]) -> bool:
+        self._encoders = encoders
+
+        return self._sources.update(encoders.values())
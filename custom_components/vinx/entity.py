@@ -0,0 +1,59 @@
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity import EntityDescription
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from custom_components.vinx import DeviceInformation, VinxCoordinator
+
+
+class VinxPropertyEntity(CoordinatorEntity[VinxCoordinator]):
+    """Base class for entities that represent a single LW3 property, declared by the "path" of their entity
+    description. The property is watched through the coordinator, so all such entities of a device share one batched
+    read per interval. The entity is unavailable while the device doesn't report the property, e.g. because the model
+    doesn't have it."""
+
+    entity_description: EntityDescription
+
+    def __init__(
+        self, coordinator: VinxCoordinator, device_information: DeviceInformation, description: EntityDescription
+    ) -> None:
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._device_information = device_information
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        await self.coordinator.async_watch([self.entity_description.path], volatile=self.volatile)
+
+    @property
+    def unique_id(self) -> str | None:
+        return f"vinx_{self._device_information.mac_address}_{self.entity_description.key}"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return self._device_information.device_info
+
+    @property
+    def name(self):
+        # Use increasingly less descriptive names depending on what information is available
+        device_label = self._device_information.device_label
+        serial_number = self._device_information.device_info.get("serial_number")
+
+        if device_label:
+            return f"{device_label} {self.entity_description.name}"
+        elif serial_number:
+            return f"VINX {serial_number} {self.entity_description.name}"
+        else:
+            return f"VINX {self.entity_description.name}"
+
+    @property
+    def volatile(self) -> bool:
+        """Whether the property changes all the time on its own, see VinxCoordinator.async_watch()"""
+        return False
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.property_value is not None
+
+    @property
+    def property_value(self) -> str | None:
+        return self.coordinator.get_value(self.entity_description.path)
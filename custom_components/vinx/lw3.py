@@ -1,18 +1,30 @@
 import asyncio
+import binascii
+import logging
+import random
 import re
+import socket
+import sys
+import time
 
-from asyncio import StreamReader, StreamWriter
+from asyncio import Future, StreamReader, StreamWriter, Task
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterable, Iterator
 from dataclasses import dataclass
 from enum import Enum
 
+from custom_components.vinx.metrics import LW3Metrics
 
-@dataclass
+_LOGGER = logging.getLogger(__name__)
+
+
+# Responses are slotted and immutable, since a walk of a large device tree can produce tens of thousands of them
+@dataclass(slots=True, frozen=True)
 class SingleLineResponse:
     prefix: str
     path: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PropertyResponse(SingleLineResponse):
     value: str
 
@@ -20,7 +32,7 @@ class PropertyResponse(SingleLineResponse):
         return self.value
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ErrorResponse(SingleLineResponse):
     code: int
     message: str
@@ -29,12 +41,17 @@ class ErrorResponse(SingleLineResponse):
         return self.message
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NodeResponse(SingleLineResponse):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class SubscriptionResponse(SingleLineResponse):
+    pass
+
+
+@dataclass(slots=True, frozen=True)
 class MethodResponse(SingleLineResponse):
     name: str
 
@@ -42,8 +59,9 @@ class MethodResponse(SingleLineResponse):
         return self.name
 
 
-type MultiLineResponse = list[SingleLineResponse]
+type MultiLineResponse = tuple[SingleLineResponse, ...]
 type Response = SingleLineResponse | MultiLineResponse
+type PropertyResults = dict[str, PropertyResponse | Exception]
 
 
 class ResponseType(Enum):
@@ -51,6 +69,7 @@ class ResponseType(Enum):
     Property = 2
     Error = 3
     Method = 4
+    Subscription = 5
 
 
 def get_response_type(response: str) -> ResponseType:
@@ -62,38 +81,99 @@ def get_response_type(response: str) -> ResponseType:
         return ResponseType.Node
     elif response[0] == "m":
         return ResponseType.Method
+    elif response[0] == "o":
+        return ResponseType.Subscription
 
     raise ValueError(f"Unknown response type: {response}")
 
 
+_ERROR_PATTERN = re.compile(r"(.*) %(E[0-9]+):(.*)")
+
+
 def parse_single_line_response(response: str) -> SingleLineResponse:
-    match get_response_type(response):
-        case ResponseType.Error:
-            matches = re.search(r"^(.E) (.*) %(E[0-9]+):(.*)$", response)
-            return ErrorResponse(matches.group(1), matches.group(2), matches.group(3), matches.group(4))
-        case ResponseType.Property:
-            matches = re.fullmatch(r"^p(.*) (.*)=(.*)$", response)
-            return PropertyResponse(f"p{matches.group(1)}", matches.group(2), matches.group(3))
-        case ResponseType.Node:
-            matches = re.fullmatch(r"^n(.*) (.*)$", response)
-            return NodeResponse(f"n{matches.group(1)}", matches.group(2))
-        case ResponseType.Method:
-            matches = re.fullmatch(r"^m(.*) (.*):(.*)$", response)
-            return MethodResponse(f"m{matches.group(1)}", matches.group(2), matches.group(3))
+    # This is on the hot path for large responses, so avoid regular expressions for everything but errors. There are
+    # only a handful of distinct prefixes, so intern them instead of keeping a copy per line.
+    prefix, _, rest = response.partition(" ")
+    prefix = sys.intern(prefix)
+
+    if prefix[1:2] == "E":
+        if (matches := _ERROR_PATTERN.fullmatch(rest)) is None:
+            raise ValueError(f"Malformed error response: {response}")
+
+        return ErrorResponse(prefix, matches.group(1), matches.group(2), matches.group(3))
+
+    match prefix[:1]:
+        case "p":
+            path, _, value = rest.partition("=")
+            return PropertyResponse(prefix, path, value)
+        case "n":
+            return NodeResponse(prefix, rest)
+        case "m":
+            path, _, name = rest.rpartition(":")
+            return MethodResponse(prefix, path, name)
+        case "o":
+            return SubscriptionResponse(prefix, rest)
+
+    raise ValueError(f"Unknown response type: {response}")
 
 
 def parse_multiline_response(lines: list[str]) -> MultiLineResponse:
-    return [parse_single_line_response(response) for response in lines]
+    return tuple(parse_single_line_response(response) for response in lines)
+
+
+def iter_response(response: str) -> Iterator[SingleLineResponse]:
+    """Lazily parses the lines of a signed response, so callers that only need some of them can stop early"""
+    # Skip the signature line
+    position = response.find("\n") + 1
+
+    while position:
+        line_end = response.find("\n", position)
+        line = response[position : line_end if line_end != -1 else len(response)].rstrip("\r")
+        position = line_end + 1
+
+        if line == "}":
+            return
+        elif line:
+            yield parse_single_line_response(line)
 
 
 def parse_response(response: str) -> Response:
-    lines = response.split("\r\n")
+    lines = tuple(iter_response(response))
 
     # Determine if we're dealing with a single line response or multiple
-    if len(lines) == 3:
-        return parse_single_line_response(lines[1])
+    if len(lines) == 1:
+        return lines[0]
     else:
-        return parse_multiline_response(lines[1:-1])
+        return lines
+
+
+def parse_change_notification(line: str) -> PropertyResponse | None:
+    """Parses an unsolicited "CHG /NODE.Property=value" line sent for subscribed nodes"""
+    prefix, _, change = line.partition(" ")
+    if prefix != "CHG" or "=" not in change:
+        return None
+
+    path, _, value = change.partition("=")
+
+    return PropertyResponse(prefix, path, value)
+
+
+def raise_for_errors(results: PropertyResults):
+    """Raises the first error contained in a get_properties() result, if any"""
+    for result in results.values():
+        if isinstance(result, Exception):
+            raise result
+
+
+def get_node_properties(response: Response) -> dict[str, str]:
+    """Maps the property names of a GETALL response to their values, e.g. {"DeviceName": "Foo"}"""
+    lines = response if isinstance(response, tuple) else (response,)
+
+    return {line.path.rpartition(".")[2]: line.value for line in lines if isinstance(line, PropertyResponse)}
+
+
+def get_property_node(path: str) -> str:
+    return path.rpartition(".")[0]
 
 
 def is_encoder_discovery_node(node: Response) -> bool:
@@ -104,87 +184,757 @@ def is_decoder_discovery_node(node: Response) -> bool:
     return isinstance(node, NodeResponse) and "RX" in node.path
 
 
+# How many bytes to request from the stream at a time
+READ_CHUNK_SIZE = 65536
+
+# How many bytes of a streamed response may be buffered for a consumer that has fallen behind before the stream is
+# aborted. Reading from the device never pauses for a stream, since that would hold up every other response.
+STREAM_BUFFER_SIZE = 1048576
+
+# TCP keepalive parameters: how long a connection may be idle before it's probed, the interval between probes (both
+# in seconds) and how many unanswered probes mark it as dead
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+
+# How many commands in a row may time out before the connection is considered dead and re-established
+MAX_CONSECUTIVE_TIMEOUTS = 3
+
+# Reconnection back-off parameters (in seconds)
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 60
+
+
+@dataclass(slots=True, frozen=True)
+class Frame:
+    """A complete signed response, with its lines already parsed"""
+
+    signature: str
+    lines: MultiLineResponse
+
+    @property
+    def response(self) -> Response:
+        # Single line responses are returned as-is, like parse_response() does
+        return self.lines[0] if len(self.lines) == 1 else self.lines
+
+
+@dataclass(slots=True, frozen=True)
+class StreamedLine:
+    """A single raw line of a streamed response frame, see ResponseFramer.streamed_signatures"""
+
+    signature: str
+    line: bytearray
+
+
+def parse_streamed_property(line: bytearray) -> tuple[str, memoryview] | None:
+    """Parses a raw property line of a streamed response into the property path and its raw value. Other lines (nodes,
+    methods) are skipped, error lines raise a ValueError."""
+    if line[1:2] == b"E":
+        raise ValueError(line.decode(errors="replace"))
+    if line[:2] not in (b"pr", b"pw"):
+        return None
+
+    separator = line.find(b"=", 3)
+    if separator == -1:
+        return None
+
+    return line[3:separator].decode(errors="replace"), memoryview(line)[separator + 1 :]
+
+
+def decode_hex(value: bytes | bytearray | memoryview) -> bytes:
+    """Decodes a hex encoded property value, such as an EDID, directly from its raw bytes. Whitespace between the
+    bytes is allowed."""
+    try:
+        return binascii.a2b_hex(value)
+    except binascii.Error:
+        return binascii.a2b_hex(bytes(value).translate(None, b" \t"))
+
+
+class ResponseFramer:
+    """Incrementally parses the raw byte stream from a device. Lines are parsed as soon as they arrive, and complete
+    signed response frames (``{xxxx`` ... ``}``) are returned along with unsolicited lines outside of frames (e.g. CHG
+    notifications). Partial lines are kept in the buffer until the rest arrives."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        # Signature and lines of the frame currently being received, if any
+        self._signature: str | None = None
+        self._lines: list[SingleLineResponse] = []
+        # Signatures of frames whose lines are returned one at a time as they arrive, as raw StreamedLines, instead
+        # of being collected into a Frame. The end of such a frame is marked by an empty Frame.
+        self.streamed_signatures: set[str] = set()
+
+    def feed(self, data: bytes) -> list[Frame | str]:
+        """Feeds received data to the framer and returns all frames and unsolicited lines that were completed by it,
+        in the order they were received"""
+        self._buffer += data
+        messages: list[Frame | str] = []
+        line_start = 0
+
+        while (line_end := self._buffer.find(b"\n", line_start)) != -1:
+            if self._signature in self.streamed_signatures:
+                raw_line = self._buffer[line_start:line_end]
+                line_start = line_end + 1
+                if raw_line.endswith(b"\r"):
+                    del raw_line[-1:]
+
+                if raw_line == b"}":
+                    messages.append(Frame(self._signature, ()))
+                    self._signature = None
+                elif raw_line:
+                    messages.append(StreamedLine(self._signature, raw_line))
+                continue
+
+            line = self._buffer[line_start:line_end].decode(errors="replace").rstrip("\r")
+            line_start = line_end + 1
+
+            if self._signature is None:
+                if line.startswith("{"):
+                    self._signature = line[1:]
+                elif line:
+                    messages.append(line)
+            elif line == "}":
+                messages.append(Frame(self._signature, tuple(self._lines)))
+                self._signature = None
+                self._lines = []
+            elif line:
+                try:
+                    self._lines.append(parse_single_line_response(line))
+                except ValueError:
+                    _LOGGER.warning(f"Ignoring unparseable response line: {line}")
+
+        # Only keep the trailing partial line, if any
+        del self._buffer[:line_start]
+
+        return messages
+
+    def reset(self):
+        self._buffer.clear()
+        self._signature = None
+        self._lines = []
+        self.streamed_signatures.clear()
+
+
+class ReadCache:
+    """Short-lived cache of read responses, keyed by command type and path. Entries expire after the TTL, and are
+    invalidated early when the property is written or a change notification for it arrives.
+
+    Invalidation also bumps the generation, so responses to reads that were already in flight at that point (and may
+    thus be stale) are not stored."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[tuple[str, str], tuple[float, Response]] = {}
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: tuple[str, str]) -> Response | None:
+        if (entry := self._entries.get(key)) is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+
+            del self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple[str, str], response: Response, generation: int):
+        if generation == self._generation:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+
+    def invalidate(self, path: str):
+        """Drops the cached value of a property, as well as the cached GETALL of its node"""
+        self._generation += 1
+        self._entries.pop(("GET", path), None)
+        self._entries.pop(("GETALL", get_property_node(path)), None)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    def as_dict(self) -> dict:
+        return {"ttl": self.ttl, "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class RateLimiter:
+    """Token bucket limiting how many requests are sent per second, while allowing short bursts. Callers that have to
+    wait are served in the order they arrived, so a busy caller can't starve the others."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.delayed = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # asyncio.Lock wakes up waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self.delayed += 1
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+
+            self._tokens -= 1
+
+    def as_dict(self) -> dict:
+        return {"rate": self.rate, "burst": self.burst, "delayed": self.delayed}
+
+
+@dataclass(slots=True)
+class _Stream:
+    # Raw lines of the response, followed by None once it's complete or has failed
+    lines: asyncio.Queue[bytearray | None]
+    # The number of bytes currently in the queue
+    buffered: int = 0
+    error: Exception | None = None
+    # Set once the consumer has stopped or the stream has been aborted, the remaining lines are dropped
+    discard: bool = False
+
+    def put(self, line: bytearray):
+        if self.buffered + len(line) > STREAM_BUFFER_SIZE:
+            self.abort(BufferError(f"Streamed response exceeded {STREAM_BUFFER_SIZE} buffered bytes"))
+            return
+
+        self.buffered += len(line)
+        self.lines.put_nowait(line)
+
+    def abort(self, error: Exception):
+        self.error = error
+        self.discard = True
+
+        # Free the buffered lines right away, the consumer gets the error next
+        while not self.lines.empty():
+            self.lines.get_nowait()
+        self.buffered = 0
+        self.lines.put_nowait(None)
+
+
+type ChangeCallback = Callable[[PropertyResponse], None]
+type ConnectionCallback = Callable[[bool], None]
+
+
 class LW3:
-    def __init__(self, hostname: str, port: int, timeout: int = 5):
+    """LW3 protocol client. The connection is opened lazily on the first command and then kept open and shared
+    between all callers. Every command is sent with a unique signature, so several commands can be in flight at once
+    and their responses are matched back to them by signature. Lost connections are re-established on demand, using
+    an exponential back-off with jitter between failed attempts. A connection is considered lost when TCP keepalive
+    probes go unanswered, or after MAX_CONSECUTIVE_TIMEOUTS commands in a row have timed out. The connection() context
+    manager can be used to scope a connection explicitly instead, see LW3ConnectionContext.
+
+    Nodes can be subscribed to with subscribe(), in which case property changes are pushed to the given callback.
+    Subscriptions survive reconnects, and while there are any the connection is re-established in the background.
+
+    Identical reads (GET and GETALL of the same path) that are in flight at the same time are coalesced into a single
+    request. With a cache TTL, read responses are additionally cached for that many seconds, see ReadCache. Requests
+    can be throttled with a RateLimiter, which is applied before the timeout starts counting.
+
+    Command latency, errors, timeouts and connection events are recorded when an LW3Metrics instance is given."""
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        timeout: int = 5,
+        metrics: LW3Metrics | None = None,
+        cache_ttl: float = 0,
+        rate_limiter: RateLimiter | None = None,
+    ):
         self._hostname = hostname
         self._port = port
         self._timeout = timeout
+        self._metrics = metrics
+        self._rate_limiter = rate_limiter
         self._reader: StreamReader | None = None
         self._writer: StreamWriter | None = None
-        self._semaphore = asyncio.Semaphore()
-
-    async def _read_until(self, phrase: str) -> str | None:
-        b = bytearray()
-
-        while not self._reader.at_eof():
-            byte = await self._reader.read(1)
-            b += byte
-
-            if b.endswith(phrase.encode()):
-                return b.decode()
+        self._connect_lock = asyncio.Lock()
+        self._framer = ResponseFramer()
+        self._read_task: Task | None = None
+        self._reconnect_task: Task | None = None
+        self._pending_responses: dict[str, Future[Frame]] = {}
+        self._pending_reads: dict[tuple[str, str], Future[Response]] = {}
+        self._streams: dict[str, _Stream] = {}
+        self._cache = ReadCache(cache_ttl) if cache_ttl > 0 else None
+        self.coalesced_reads = 0
+        self._signature_counter = 0
+        self._subscriptions: dict[str, list[ChangeCallback]] = {}
+        self._connection_listeners: list[ConnectionCallback] = []
+        self._failed_connection_attempts = 0
+        self._next_connection_attempt = 0.0
+        self._consecutive_timeouts = 0
+        self._connection_contexts = 0
+
+    @property
+    def hostname(self) -> str:
+        return self._hostname
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    @property
+    def metrics(self) -> LW3Metrics | None:
+        return self._metrics
+
+    @property
+    def cache(self) -> ReadCache | None:
+        return self._cache
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing() and not self._reader.at_eof()
 
     def connection(self):
         return LW3ConnectionContext(self)
 
+    def get_connection_state(self) -> dict:
+        """Describes the state of the connection, for diagnostics"""
+        return {
+            "host": self._hostname,
+            "port": self._port,
+            "timeout": self._timeout,
+            "connected": self.is_connected,
+            "pending_commands": len(self._pending_responses),
+            "subscriptions": sorted(self._subscriptions.keys()),
+            "failed_connection_attempts": self._failed_connection_attempts,
+            "reconnecting_in": max(0.0, self._next_connection_attempt - time.monotonic()),
+            "coalesced_reads": self.coalesced_reads,
+            "cache": self._cache.as_dict() if self._cache is not None else None,
+            "rate_limiter": self._rate_limiter.as_dict() if self._rate_limiter is not None else None,
+        }
+
     async def _connect(self):
         self._reader, self._writer = await asyncio.open_connection(self._hostname, self._port)
+        self._framer.reset()
+        self._read_task = asyncio.create_task(self._read_loop(self._reader))
+
+        # Let the operating system detect half-open connections to devices that have silently gone away. The default
+        # keepalive timing takes hours to notice, so use ours where the platform allows it.
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            for option, value in (
+                ("TCP_KEEPIDLE", KEEPALIVE_IDLE),
+                ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+                ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+            ):
+                if hasattr(socket, option):
+                    sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+    def _close(self) -> StreamWriter | None:
+        writer = self._writer
+        self._reader = self._writer = None
+        self._consecutive_timeouts = 0
+
+        if self._read_task is not None and self._read_task is not asyncio.current_task():
+            self._read_task.cancel()
+        self._read_task = None
+
+        for future in self._pending_responses.values():
+            if not future.done():
+                future.set_exception(EOFError("Connection closed while waiting for a response"))
+        self._pending_responses.clear()
+
+        for stream in self._streams.values():
+            if not stream.discard:
+                stream.abort(EOFError("Connection closed while streaming a response"))
+        self._streams.clear()
+
+        if writer is not None:
+            writer.close()
+
+            # Changes may be missed while disconnected
+            if self._cache is not None:
+                self._cache.clear()
+            if self._metrics is not None:
+                self._metrics.disconnects += 1
+            self._notify_connection_listeners(False)
+
+        return writer
 
     async def _disconnect(self):
-        self._writer.close()
-        await self._writer.wait_closed()
+        if (writer := self._close()) is None:
+            return
+
+        try:
+            await writer.wait_closed()
+        except OSError:
+            # The connection was already broken, nothing left to clean up
+            pass
+
+    async def disconnect(self):
+        """Closes the managed connection, if any, and drops all subscriptions. The next command will open a new
+        connection."""
+        # Without subscriptions, nothing reconnects in the background once the connection is gone
+        self._subscriptions.clear()
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+
+        async with self._connect_lock:
+            await self._disconnect()
+
+    def _connection_lost(self):
+        self._close()
+
+        # Nobody else will reconnect if we're only waiting for notifications
+        if self._subscriptions and (self._reconnect_task is None or self._reconnect_task.done()):
+            self._reconnect_task = asyncio.create_task(self._reconnect_loop())
+
+    async def _ensure_connected(self):
+        """Connects unless already connected"""
+        if self.is_connected:
+            return
+
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+
+            # Fail fast while backing off, so callers don't pile up waiting for an unreachable device
+            backoff_remaining = self._next_connection_attempt - time.monotonic()
+            if backoff_remaining > 0:
+                raise ConnectionError(
+                    f"Not reconnecting to {self._hostname}:{self._port} for another {backoff_remaining:.1f} seconds"
+                )
+
+            await self._disconnect()
+
+            try:
+                await asyncio.wait_for(self._connect(), self._timeout)
+
+                # Subscriptions don't survive the connection, so restore them. Nodes subscribed to in the meantime
+                # are opened by subscribe() itself, since the connection is already up.
+                for node in list(self._subscriptions):
+                    await self._open(node)
+            except (OSError, EOFError, ValueError, TimeoutError) as e:
+                self._close()
+                self._failed_connection_attempts += 1
+                if self._metrics is not None:
+                    self._metrics.connection_failures += 1
+                self._next_connection_attempt = time.monotonic() + self._get_backoff_delay()
+
+                raise ConnectionError(f"Unable to connect to {self._hostname}:{self._port}") from e
+
+            self._failed_connection_attempts = 0
+            self._next_connection_attempt = 0.0
+            if self._metrics is not None:
+                self._metrics.connects += 1
+            self._notify_connection_listeners(True)
+
+    def _get_backoff_delay(self) -> float:
+        # Exponential back-off with "full jitter", so that many clients don't reconnect in lockstep
+        ceiling = min(RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_MIN * 2 ** (self._failed_connection_attempts - 1))
+
+        return random.uniform(RECONNECT_BACKOFF_MIN, max(RECONNECT_BACKOFF_MIN, ceiling))
+
+    async def _reconnect_loop(self):
+        while self._subscriptions and not self.is_connected:
+            try:
+                await self._ensure_connected()
+            except ConnectionError as e:
+                _LOGGER.debug(f"Reconnection to {self._hostname}:{self._port} failed: {e}")
+                await asyncio.sleep(max(0.0, self._next_connection_attempt - time.monotonic()))
+
+    async def _read_loop(self, reader: StreamReader):
+        """Reads everything the device sends, handing signed responses to the pending command and dispatching
+        change notifications to subscribers"""
+        try:
+            while data := await reader.read(READ_CHUNK_SIZE):
+                if self._metrics is None:
+                    messages = self._framer.feed(data)
+                else:
+                    start = time.perf_counter()
+                    messages = self._framer.feed(data)
+                    self._metrics.record_read(len(data), time.perf_counter() - start)
+
+                for message in messages:
+                    if isinstance(message, StreamedLine):
+                        stream = self._streams.get(message.signature)
+                        if stream is not None and not stream.discard:
+                            stream.put(message.line)
+                    elif isinstance(message, Frame) and message.signature in self._streams:
+                        stream = self._streams.pop(message.signature)
+                        self._framer.streamed_signatures.discard(message.signature)
+                        if not stream.discard:
+                            stream.lines.put_nowait(None)
+                    elif isinstance(message, Frame):
+                        # Responses to commands that have timed out are simply dropped
+                        future = self._pending_responses.pop(message.signature, None)
+                        if future is not None and not future.done():
+                            future.set_result(message)
+                    else:
+                        self._handle_notification(message)
+        except OSError:
+            pass
+        except Exception:
+            # The state of the connection is unknown after this, so treat it as lost and start over with a new one
+            _LOGGER.exception(f"Unexpected error while reading from {self._hostname}:{self._port}")
+
+        # Only react if the connection wasn't closed on purpose
+        if reader is self._reader:
+            self._connection_lost()
+
+    def _handle_notification(self, line: str):
+        if (change := parse_change_notification(line)) is None:
+            return
+
+        if self._metrics is not None:
+            self._metrics.notifications += 1
+
+        self._invalidate(change.path)
+
+        for callback in list(self._subscriptions.get(get_property_node(change.path), [])):
+            try:
+                callback(change)
+            except Exception:
+                _LOGGER.exception(f"Error in change callback for {change.path}")
+
+    def _notify_connection_listeners(self, connected: bool):
+        for listener in list(self._connection_listeners):
+            try:
+                listener(connected)
+            except Exception:
+                _LOGGER.exception("Error in connection listener")
+
+    def add_connection_listener(self, listener: ConnectionCallback) -> Callable[[], None]:
+        """Registers a callback that is called with True/False whenever the connection is established or lost.
+        Returns a function that removes the listener."""
+        self._connection_listeners.append(listener)
+
+        return lambda: self._connection_listeners.remove(listener)
+
+    async def subscribe(self, node: str, callback: ChangeCallback) -> Callable[[], None]:
+        """Subscribes to property changes of the specified node. Returns a function that removes the subscription.
+        The node is opened on the device once per connection, no matter how many callbacks are registered."""
+        callbacks = self._subscriptions.setdefault(node, [])
+        callbacks.append(callback)
+
+        if len(callbacks) == 1:
+            try:
+                if self.is_connected:
+                    await self._open(node)
+                else:
+                    # Connecting opens all subscribed nodes, including this one
+                    await self._ensure_connected()
+            except (ConnectionError, EOFError, OSError, TimeoutError) as e:
+                # The subscription is restored once the connection has been re-established
+                _LOGGER.debug(f"Unable to subscribe to {node} right now: {e}")
+                self._connection_lost()
+
+        def unsubscribe():
+            callbacks.remove(callback)
+
+            # The node stays open on the device until the connection is closed, its notifications are simply dropped.
+            # The subscriptions may have been dropped by disconnect() in the meantime.
+            if not callbacks and self._subscriptions.get(node) is callbacks:
+                del self._subscriptions[node]
+
+        return unsubscribe
+
+    async def _open(self, node: str):
+        try:
+            await asyncio.wait_for(self._send_command(f"OPEN {node}"), self._timeout)
+        except ValueError as e:
+            # Not every model has every node. The subscription is kept, it just never receives any changes.
+            _LOGGER.debug(f"Unable to open {node}: {e}")
+
+    def _next_signature(self) -> str:
+        # Signatures are four hex digits, skip any that are still waiting for a response
+        while True:
+            self._signature_counter = (self._signature_counter + 1) % 0x10000
+            signature = f"{self._signature_counter:04X}"
+
+            if signature not in self._pending_responses and signature not in self._streams:
+                return signature
+
+    async def _send_command(self, command: str) -> Response:
+        """Sends a command and waits for the response carrying the same signature"""
+        signature = self._next_signature()
+        future = self._pending_responses[signature] = asyncio.get_running_loop().create_future()
+
+        try:
+            self._writer.write(f"{signature}#{command}\r\n".encode())
+            await self._writer.drain()
 
-    async def _read_and_parse_response(self) -> Response:
-        # All commands are wrapped with a signature, so read until the end delimiter
-        response = await self._read_until("}")
+            frame = await future
+        finally:
+            self._pending_responses.pop(signature, None)
 
-        if response is None:
-            raise EOFError("Reached EOF while reading, connection probably lost")
+        self._consecutive_timeouts = 0
 
-        result = parse_response(response.strip())
+        result = frame.response
 
         if isinstance(result, ErrorResponse):
             raise ValueError(result)
 
         return result
 
-    async def _run_get(self, path: str) -> Response:
-        async with self._semaphore:
-            self._writer.write(f"0000#GET {path}\r\n".encode())
-            await self._writer.drain()
+    async def _run_command(self, command: str) -> Response:
+        await self._ensure_connected()
 
-            return await self._read_and_parse_response()
+        try:
+            return await self._send_command(command)
+        except (OSError, EOFError):
+            self._connection_lost()
+            raise
 
-    async def _run_set(self, path: str, value: str) -> Response:
-        async with self._semaphore:
-            self._writer.write(f"0000#SET {path}={value}\r\n".encode())
-            await self._writer.drain()
+    async def _run_get(self, path: str) -> Response:
+        return await self._run_command(f"GET {path}")
 
-            return await self._read_and_parse_response()
+    async def _run_set(self, path: str, value: str) -> Response:
+        return await self._run_command(f"SET {path}={value}")
 
     async def _run_get_all(self, path: str) -> Response:
-        async with self._semaphore:
-            self._writer.write(f"0000#GETALL {path}\r\n".encode())
-            await self._writer.drain()
-
-            return await self._read_and_parse_response()
+        return await self._run_command(f"GETALL {path}")
 
     async def _run_call(self, path: str, method: str) -> Response:
-        async with self._semaphore:
-            self._writer.write(f"0000#CALL {path}:{method}\r\n".encode())
-            await self._writer.drain()
+        return await self._run_command(f"CALL {path}:{method}")
+
+    async def _wait_for(self, command_type: str, command: Coroutine[None, None, Response]) -> Response:
+        """Runs a command with the timeout applied, recording metrics if enabled"""
+        if self._rate_limiter is not None:
+            try:
+                await self._rate_limiter.acquire()
+            except asyncio.CancelledError:
+                command.close()
+                raise
+
+        try:
+            if self._metrics is None:
+                return await asyncio.wait_for(command, self._timeout)
+
+            return await self._metrics.measure(command_type, asyncio.wait_for(command, self._timeout))
+        except TimeoutError:
+            self._command_timed_out()
+            raise
+
+    def _command_timed_out(self):
+        # A single timeout may just be a busy device, but when nothing is answered anymore the connection is most likely
+        # dead without the operating system having noticed yet
+        self._consecutive_timeouts += 1
+        if self._consecutive_timeouts >= MAX_CONSECUTIVE_TIMEOUTS and self.is_connected:
+            _LOGGER.warning(f"{self._hostname}:{self._port} stopped responding, reconnecting")
+            self._connection_lost()
+
+    async def _read(
+        self, command_type: str, path: str, run: Callable[[str], Coroutine[None, None, Response]]
+    ) -> Response:
+        """Runs a read command, unless an identical one is already in flight (or cached), in which case its response
+        is shared. The first caller runs the command itself and hands the outcome to the others through a future, so
+        a read that isn't shared costs no more than an uncoalesced one."""
+        key = (command_type, path)
+        if self._cache is not None and (response := self._cache.get(key)) is not None:
+            return response
+
+        while (shared := self._pending_reads.get(key)) is not None:
+            self.coalesced_reads += 1
+            try:
+                # Shielded, so that this caller giving up doesn't cancel the read for the others
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                # The caller that ran the read gave up on it. Run it again, unless this caller was cancelled as well.
+                if not shared.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        generation = self._cache.generation if self._cache is not None else 0
+        shared = self._pending_reads[key] = asyncio.get_running_loop().create_future()
+
+        try:
+            response = await self._wait_for(command_type, run(path))
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except Exception as e:
+            shared.set_exception(e)
+            # Mark the exception as retrieved, so asyncio doesn't warn about it when nobody else was waiting
+            shared.exception()
+            raise
+        finally:
+            if self._pending_reads.get(key) is shared:
+                del self._pending_reads[key]
+
+        shared.set_result(response)
+        if self._cache is not None:
+            self._cache.put(key, response, generation)
+
+        return response
 
-            return await self._read_and_parse_response()
+    def _invalidate(self, path: str):
+        """Makes sure later reads of a property (or its node) fetch the current value from the device"""
+        self._pending_reads.pop(("GET", path), None)
+        self._pending_reads.pop(("GETALL", get_property_node(path)), None)
+
+        if self._cache is not None:
+            self._cache.invalidate(path)
 
     async def get_property(self, path: str) -> PropertyResponse:
-        response = await asyncio.wait_for(self._run_get(path), self._timeout)
+        response = await self._read("GET", path, self._run_get)
 
         if not isinstance(response, PropertyResponse):
             raise ValueError(f"Requested path {path} does not return a property")
 
         return response
 
+    async def get_properties(self, paths: Iterable[str]) -> PropertyResults:
+        """Fetches multiple properties at once. The requests are pipelined, so this costs about one round trip no
+        matter how many paths are requested. The result maps each path to either its response or the exception that
+        was raised while fetching it."""
+        paths = list(dict.fromkeys(paths))
+        responses = await asyncio.gather(*[self.get_property(path) for path in paths], return_exceptions=True)
+
+        return dict(zip(paths, responses, strict=True))
+
+    async def read_properties(self, paths: Iterable[str]) -> PropertyResults:
+        """Like get_properties(), but nodes that several of the paths belong to are read with a single GETALL instead
+        of one GET per property, so reading more properties of the same node costs nothing extra. Properties that a
+        node turns out not to have map to a ValueError."""
+        paths_by_node: dict[str, list[str]] = {}
+        for path in dict.fromkeys(paths):
+            paths_by_node.setdefault(get_property_node(path), []).append(path)
+
+        single_paths = [paths[0] for paths in paths_by_node.values() if len(paths) == 1]
+        shared_nodes = [node for node, paths in paths_by_node.items() if len(paths) > 1]
+
+        property_results, *node_results = await asyncio.gather(
+            self.get_properties(single_paths), *[self.get_all(node) for node in shared_nodes], return_exceptions=True
+        )
+        if isinstance(property_results, BaseException):
+            raise property_results
+
+        results: PropertyResults = dict(property_results)
+        for node, response in zip(shared_nodes, node_results, strict=True):
+            properties = get_node_properties(response) if not isinstance(response, BaseException) else {}
+
+            for path in paths_by_node[node]:
+                name = path.rpartition(".")[2]
+                if isinstance(response, Exception):
+                    results[path] = response
+                elif name in properties:
+                    results[path] = PropertyResponse("pr", path, properties[name])
+                else:
+                    results[path] = ValueError(f"Node {node} has no property {name}")
+
+        return results
+
     async def set_property(self, path: str, value: str) -> PropertyResponse:
-        response = await asyncio.wait_for(self._run_set(path, value), self._timeout)
+        self._invalidate(path)
+        try:
+            response = await self._wait_for("SET", self._run_set(path, value))
+        finally:
+            self._invalidate(path)
 
         if not isinstance(response, PropertyResponse):
             raise ValueError(f"Requested path {path} does not return a property")
@@ -192,10 +942,73 @@ class LW3:
         return response
 
     async def get_all(self, path: str) -> Response:
-        return await asyncio.wait_for(self._run_get_all(path), self._timeout)
+        return await self._read("GETALL", path, self._run_get_all)
+
+    async def stream_all(self, path: str) -> AsyncIterator[tuple[str, memoryview]]:
+        """Like get_all(), but yields the properties of the node one at a time as they arrive instead of collecting the
+        whole response first. Values are yielded raw, as a memoryview over the received line, so that large values
+        such as EDIDs can be decoded with decode_hex() without building intermediate strings.
+
+        Other commands can be run while streaming. Lines are buffered until the consumer gets to them, if it falls
+        more than STREAM_BUFFER_SIZE bytes behind the stream is aborted with a BufferError. The timeout applies to the
+        wait for each line. Consumers that may stop early should close the iterator, e.g. with contextlib.aclosing(),
+        so that the stream is stopped right away rather than when the iterator is garbage collected."""
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire()
+        await self._ensure_connected()
+
+        signature = self._next_signature()
+        stream = self._streams[signature] = _Stream(asyncio.Queue())
+        self._framer.streamed_signatures.add(signature)
+
+        try:
+            try:
+                self._writer.write(f"{signature}#GETALL {path}\r\n".encode())
+                await self._writer.drain()
+            except OSError:
+                self._connection_lost()
+                raise
+
+            while True:
+                line = await asyncio.wait_for(stream.lines.get(), self._timeout)
+                if line is None:
+                    if stream.error is not None:
+                        raise stream.error
+                    return
+
+                stream.buffered -= len(line)
+
+                if (result := parse_streamed_property(line)) is not None:
+                    yield result
+        finally:
+            # Stop streaming right away rather than when the response ends, which it may never do if the consumer gave
+            # up because of a timeout. The rest of the response is framed as usual, and dropped since nothing waits for
+            # its signature.
+            stream.discard = True
+            self._streams.pop(signature, None)
+            self._framer.streamed_signatures.discard(signature)
+            while not stream.lines.empty():
+                stream.lines.get_nowait()
+
+    async def measure_round_trip_time(self, path: str = "/.ProductName") -> float:
+        """Measures how long (in seconds) the device takes to answer a GET of the specified property. The read always
+        goes to the device, bypassing the cache and coalescing, and only the exchange itself is timed, i.e. neither
+        connecting nor waiting for the rate limiter."""
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire()
+        await self._ensure_connected()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._send_command(f"GET {path}"), self._timeout)
+        except (OSError, EOFError):
+            self._connection_lost()
+            raise
+
+        return time.perf_counter() - start
 
     async def call(self, path: str, method: str) -> MethodResponse:
-        response = await asyncio.wait_for(self._run_call(path, method), self._timeout)
+        response = await self._wait_for("CALL", self._run_call(path, method))
 
         if not isinstance(response, MethodResponse):
             raise ValueError(f"Called method {path}:{method} does not return a method response")
@@ -204,11 +1017,26 @@ class LW3:
 
 
 class LW3ConnectionContext:
+    """Keeps the connection open for the duration of the context, reusing it if it's already open. Contexts are
+    reference counted, the connection is closed when the last one exits.
+
+    Closing also affects every other caller of the client, so this shouldn't be used with clients that are shared
+    through an LW3Pool, where the pool decides when the connection is closed."""
+
     def __init__(self, lw3: LW3):
         self._lw3 = lw3
 
     async def __aenter__(self):
-        await self._lw3._connect()
+        self._lw3._connection_contexts += 1
+
+        try:
+            await self._lw3._ensure_connected()
+        except BaseException:
+            self._lw3._connection_contexts -= 1
+            raise
 
     async def __aexit__(self, *args):
-        await self._lw3._disconnect()
+        self._lw3._connection_contexts -= 1
+
+        if self._lw3._connection_contexts == 0:
+            await self._lw3.disconnect()
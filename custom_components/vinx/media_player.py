@@ -1,11 +1,17 @@
 import logging
 
-from bidict import bidict
+from datetime import timedelta
+
 from homeassistant.components.media_player import MediaPlayerEntity, MediaPlayerEntityFeature, MediaPlayerState
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from custom_components.vinx import LW3, DeviceInformation, VinxRuntimeData
-from custom_components.vinx.lw3 import NodeResponse, is_encoder_discovery_node
+from custom_components.vinx import DeviceInformation, VinxCoordinator, VinxRuntimeData, get_vinx_data
+from custom_components.vinx.const import DOMAIN
+from custom_components.vinx.discovery import DISCOVERY_REFRESH_INTERVAL, DiscoveryCache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,22 +24,30 @@ async def async_setup_entry(hass, entry, async_add_entities):
     # Add entity to Home Assistant
     product_name = runtime_data.device_information.product_name
     if product_name.endswith("ENC"):
-        async_add_entities([VinxEncoder(runtime_data.lw3, runtime_data.device_information)])
+        async_add_entities([VinxEncoder(runtime_data.coordinator, runtime_data.device_information)])
         pass
     elif product_name.endswith("DEC"):
-        async_add_entities([VinxDecoder(runtime_data.lw3, runtime_data.device_information)])
+        discovery_cache = get_vinx_data(hass).discovery_cache
+        async_add_entities([VinxDecoder(runtime_data.coordinator, runtime_data.device_information, discovery_cache)])
         pass
     else:
         _LOGGER.warning("Unknown device type, no entities will be added")
 
 
-class AbstractVinxMediaPlayerEntity(MediaPlayerEntity):
-    def __init__(self, lw3: LW3, device_information: DeviceInformation) -> None:
-        self._lw3 = lw3
+class AbstractVinxMediaPlayerEntity(CoordinatorEntity[VinxCoordinator], MediaPlayerEntity):
+    # The properties this entity needs from the coordinator
+    _watched_paths: list[str] = ["/MEDIA/VIDEO/I1.SignalPresent"]
+
+    def __init__(self, coordinator: VinxCoordinator, device_information: DeviceInformation) -> None:
+        super().__init__(coordinator)
+        self._lw3 = coordinator.lw3
         self._device_information = device_information
 
         self._device_class = "receiver"
-        self._state = MediaPlayerState.IDLE
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        await self.coordinator.async_watch(self._watched_paths)
 
     @property
     def device_class(self):
@@ -47,7 +61,9 @@ class AbstractVinxMediaPlayerEntity(MediaPlayerEntity):
 
     @property
     def state(self):
-        return self._state
+        signal_present = self.coordinator.get_value("/MEDIA/VIDEO/I1.SignalPresent")
+
+        return MediaPlayerState.PLAYING if signal_present == "1" else MediaPlayerState.IDLE
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -68,62 +84,73 @@ class AbstractVinxMediaPlayerEntity(MediaPlayerEntity):
 
 
 class VinxEncoder(AbstractVinxMediaPlayerEntity):
-    async def async_update(self):
-        async with self._lw3.connection():
-            # Query signal status
-            signal_present = await self._lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent")
-            self._state = MediaPlayerState.PLAYING if str(signal_present) == "1" else MediaPlayerState.IDLE
+    pass
 
 
 class VinxDecoder(AbstractVinxMediaPlayerEntity):
-    def __init__(self, lw3: LW3, device_information: DeviceInformation) -> None:
-        super().__init__(lw3, device_information)
-        self._source = None
+    _watched_paths = ["/MEDIA/VIDEO/I1.SignalPresent", "/SYS/MB/PHY.VideoChannelId"]
+
+    def __init__(
+        self, coordinator: VinxCoordinator, device_information: DeviceInformation, discovery_cache: DiscoveryCache
+    ) -> None:
+        super().__init__(coordinator, device_information)
+        self._discovery_cache = discovery_cache
         self._source_list = None
-        self._source_bidict = bidict()
 
     _attr_supported_features = MediaPlayerEntityFeature.SELECT_SOURCE
 
-    async def async_update(self):
-        # Populate the source list only once. Sort it alphabetically, since the order of discovered devices
-        # may differ from device to device.
-        if self._source_list is None:
-            await self.populate_source_bidict()
-            self._source_list = sorted(list(self._source_bidict.values()))
-            _LOGGER.info(f"{self.name} source list populated with {len(self._source_list)} sources")
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
 
-        async with self._lw3.connection():
-            # Query current source
-            video_channel_id = await self._lw3.get_property("/SYS/MB/PHY.VideoChannelId")
-            self._source = str(self._source_bidict.get(str(video_channel_id)))
+        self.async_on_remove(self._discovery_cache.add_listener(self.handle_sources_changed))
 
-            # Query signal status
-            signal_present = await self._lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent")
-            self._state = MediaPlayerState.PLAYING if str(signal_present) == "1" else MediaPlayerState.IDLE
+        # The cache is shared, so it's only actually refreshed once per interval no matter how many decoders ask
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, self.async_refresh_sources, timedelta(seconds=DISCOVERY_REFRESH_INTERVAL)
+            )
+        )
+
+        if self._discovery_cache.is_populated:
+            self.update_source_list()
+        else:
+            # Tied to the entry, so that it's cancelled when the entry is unloaded instead of outliving it
+            self.platform.config_entry.async_create_background_task(
+                self.hass, self.async_refresh_sources(), f"{DOMAIN} refresh sources {self.name}"
+            )
+
+    async def async_refresh_sources(self, *_) -> None:
+        try:
+            await self._discovery_cache.async_refresh(self._lw3)
+        except (OSError, EOFError, ValueError) as e:
+            _LOGGER.debug(f"Unable to refresh sources using {self.name}: {e}")
+
+    @callback
+    def handle_sources_changed(self) -> None:
+        self.update_source_list()
+        self.async_write_ha_state()
+
+    def update_source_list(self):
+        # The names are sorted alphabetically, since the order of discovered devices may differ from device to device
+        self._source_list = self._discovery_cache.sources.names
+        _LOGGER.info(f"{self.name} source list populated with {len(self._source_list)} sources")
 
     @property
     def source(self) -> str | None:
-        return self._source
+        video_channel_id = self.coordinator.get_value("/SYS/MB/PHY.VideoChannelId")
+        if video_channel_id is None:
+            return None
+
+        source = self._discovery_cache.sources.get_by_video_channel_id(video_channel_id)
+
+        return source.name if source is not None else None
 
     @property
     def source_list(self) -> list[str] | None:
         return self._source_list
 
     async def async_select_source(self, source: str) -> None:
-        self._source = source
-        video_channel_id = self._source_bidict.inverse.get(source)
-
-        async with self._lw3.connection():
-            await self._lw3.set_property("/SYS/MB/PHY.VideoChannelId", video_channel_id)
-
-    async def populate_source_bidict(self):
-        """Queries the device for discovered devices, filters out everything that isn't a VINX encoder,
-        then builds a bidict mapping between the device label and video channel ID."""
-        async with self._lw3.connection():
-            discovery_nodes = await self._lw3.get_all("/DISCOVERY")
-            encoder_nodes: list[NodeResponse] = list(filter(is_encoder_discovery_node, discovery_nodes))
-
-            for encoder_node in encoder_nodes:
-                device_name = await self._lw3.get_property(f"{encoder_node.path}.DeviceName")
-                video_channel_id = await self._lw3.get_property(f"{encoder_node.path}.VideoChannelId")
-                self._source_bidict.put(str(video_channel_id), str(device_name))
+        if (resolved_source := self._discovery_cache.sources.resolve(source)) is None:
+            raise HomeAssistantError(f"Unknown source {source}")
+
+        await self.coordinator.async_set_property("/SYS/MB/PHY.VideoChannelId", resolved_source.video_channel_id)
@@ -0,0 +1,192 @@
+import logging
+import time
+
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+_LOGGER = logging.getLogger(__name__)
+
+# Upper bounds (in seconds) of the latency histogram buckets. Anything slower ends up in an overflow bucket.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The number of most recent commands whose timings are kept
+RECENT_COMMAND_COUNT = 50
+
+# Called with the command type (e.g. "GET"), its duration in seconds and the exception it failed with, if any
+type CommandHook = Callable[[str, float, BaseException | None], None]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram. Percentiles are estimated as the upper bound of the bucket they fall in."""
+
+    __slots__ = ("counts", "count", "total", "maximum")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts, strict=True)]
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent: float) -> float | None:
+        if not self.count:
+            return None
+
+        threshold = self.count * percent / 100
+        cumulative = 0
+        for upper_bound, count in zip(LATENCY_BUCKETS, self.counts, strict=False):
+            cumulative += count
+            if cumulative >= threshold:
+                return min(upper_bound, self.maximum)
+
+        return self.maximum
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.maximum,
+            "buckets": {
+                **{
+                    f"le_{upper_bound}": count for upper_bound, count in zip(LATENCY_BUCKETS, self.counts, strict=False)
+                },
+                "overflow": self.counts[-1],
+            },
+        }
+
+
+@dataclass(slots=True)
+class CommandMetrics:
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: int = 0
+    timeouts: int = 0
+
+    def as_dict(self) -> dict:
+        return {"latency": self.latency.as_dict(), "errors": self.errors, "timeouts": self.timeouts}
+
+
+class LW3Metrics:
+    """Counters and latency histograms for a single LW3 client. An LW3 client only collects metrics when given an
+    instance of this class, so there's no cost when they're not needed.
+
+    Latency is recorded for every command that completes, successfully or not. Commands that time out are only
+    counted as timeouts."""
+
+    def __init__(self):
+        self.commands: dict[str, CommandMetrics] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connects = 0
+        self.connection_failures = 0
+        self.disconnects = 0
+        self.bytes_read = 0
+        self.parse_time = 0.0
+        self.notifications = 0
+        # (command type, completion time as a UNIX timestamp, duration, error type) of the most recent commands
+        self.recent_commands: deque[tuple[str, float, float, str | None]] = deque(maxlen=RECENT_COMMAND_COUNT)
+        self._hooks: list[CommandHook] = []
+
+    def add_hook(self, hook: CommandHook) -> Callable[[], None]:
+        """Registers a callback that is called after every command. Returns a function that removes the hook."""
+        self._hooks.append(hook)
+
+        return lambda: self._hooks.remove(hook)
+
+    async def measure[T](self, command_type: str, awaitable: Awaitable[T]) -> T:
+        """Awaits a command, recording its latency and outcome under the specified command type"""
+        if (command := self.commands.get(command_type)) is None:
+            command = self.commands[command_type] = CommandMetrics()
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        error = None
+        start = time.perf_counter()
+
+        try:
+            return await awaitable
+        except TimeoutError as e:
+            command.timeouts += 1
+            error = e
+            raise
+        except Exception as e:
+            command.errors += 1
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self.in_flight -= 1
+
+            if not isinstance(error, TimeoutError):
+                command.latency.observe(duration)
+            self.recent_commands.append((command_type, time.time(), duration, type(error).__name__ if error else None))
+
+            for hook in list(self._hooks):
+                try:
+                    hook(command_type, duration, error)
+                except Exception:
+                    _LOGGER.exception("Error in command metrics hook")
+
+    def record_read(self, byte_count: int, parse_time: float):
+        self.bytes_read += byte_count
+        self.parse_time += parse_time
+
+    @property
+    def latency(self) -> LatencyHistogram:
+        """Latency of all command types combined"""
+        latency = LatencyHistogram()
+        for command in self.commands.values():
+            latency.merge(command.latency)
+
+        return latency
+
+    @property
+    def command_count(self) -> int:
+        return sum(command.latency.count + command.timeouts for command in self.commands.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(command.errors for command in self.commands.values())
+
+    @property
+    def timeouts(self) -> int:
+        return sum(command.timeouts for command in self.commands.values())
+
+    @property
+    def reconnects(self) -> int:
+        return max(0, self.connects - 1)
+
+    def as_dict(self) -> dict:
+        return {
+            "commands": {command_type: command.as_dict() for command_type, command in self.commands.items()},
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "connects": self.connects,
+            "connection_failures": self.connection_failures,
+            "disconnects": self.disconnects,
+            "bytes_read": self.bytes_read,
+            "parse_time": self.parse_time,
+            "notifications": self.notifications,
+            "recent_commands": [
+                {"command": command_type, "finished_at": finished_at, "duration": duration, "error": error}
+                for command_type, finished_at, duration, error in self.recent_commands
+            ],
+        }
@@ -0,0 +1,70 @@
+import logging
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from custom_components.vinx.lw3 import LW3, RateLimiter
+from custom_components.vinx.metrics import LW3Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# Default per-device request rate limit, in requests per second and the size of bursts allowed on top
+DEFAULT_RATE_LIMIT = 50
+DEFAULT_RATE_LIMIT_BURST = 50
+
+
+@dataclass(slots=True)
+class _Session:
+    lw3: LW3
+    leases: int = 0
+
+
+class LW3Pool:
+    """Hands out shared LW3 sessions, one per device (host and port). Everything talking to a device, i.e. its config
+    entry, service calls, diagnostics and config flows, thus shares a single multiplexed connection, which keeps the
+    number of sockets per device at one no matter how many callers there are. Each session applies the same request
+    rate limit, with waiting callers served in the order they arrived.
+
+    Sessions are reference counted and disconnected once the last lease is released. The timeout and metrics given
+    when a session is created apply to everyone sharing it."""
+
+    def __init__(self, rate_limit: float = DEFAULT_RATE_LIMIT, rate_limit_burst: int = DEFAULT_RATE_LIMIT_BURST):
+        self._rate_limit = rate_limit
+        self._rate_limit_burst = rate_limit_burst
+        self._sessions: dict[tuple[str, int], _Session] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def acquire(self, host: str, port: int, timeout: int = 5, metrics: LW3Metrics | None = None) -> LW3:
+        """Leases the session for a device, creating it if needed. Each lease must be released with release()."""
+        if (session := self._sessions.get((host, port))) is None:
+            rate_limiter = RateLimiter(self._rate_limit, self._rate_limit_burst)
+            session = _Session(LW3(host, port, timeout=timeout, metrics=metrics, rate_limiter=rate_limiter))
+            self._sessions[(host, port)] = session
+        elif metrics is not None and session.lw3.metrics is None:
+            _LOGGER.debug(f"Session for {host}:{port} is already in use without metrics")
+
+        session.leases += 1
+
+        return session.lw3
+
+    async def release(self, lw3: LW3):
+        key = (lw3.hostname, lw3.port)
+        if (session := self._sessions.get(key)) is None or session.lw3 is not lw3:
+            return
+
+        session.leases -= 1
+        if session.leases == 0:
+            del self._sessions[key]
+            await lw3.disconnect()
+
+    @asynccontextmanager
+    async def session(self, host: str, port: int, timeout: int = 5) -> AsyncIterator[LW3]:
+        """Leases the session for a device for the duration of the context"""
+        lw3 = self.acquire(host, port, timeout)
+        try:
+            yield lw3
+        finally:
+            await self.release(lw3)
@@ -0,0 +1,137 @@
+import logging
+
+from dataclasses import dataclass
+from enum import Enum
+
+from custom_components.vinx.const import MAX_SCAN_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+# Polling interval (in seconds) used for a while after a device's source or signal has changed, to quickly pick up
+# properties that settle afterwards (resolution, HDCP etc.)
+FAST_SCAN_INTERVAL = 5
+FAST_POLL_DURATION = 60
+
+# Devices whose properties haven't changed for this long (in seconds) are polled half as often, and so on for every
+# further period, up to the maximum slowdown. Measurements and counters aren't reported as changes, see
+# VinxCoordinator.async_watch().
+STABLE_PERIOD = 600
+MAX_STABLE_SLOWDOWN = 4
+
+# Changes to these properties make a device be polled quickly for a while
+FAST_POLL_PATHS = frozenset({"/SYS/MB/PHY.VideoChannelId", "/MEDIA/VIDEO/I1.SignalPresent"})
+
+# Spreads the devices' polling phases evenly no matter how many there are, without having to move existing devices
+# when more are registered
+GOLDEN_RATIO_FRACTION = 0.6180339887498949
+
+
+class PollMode(Enum):
+    FAST = "fast"
+    NORMAL = "normal"
+    STABLE = "stable"
+    OFFLINE = "offline"
+
+
+@dataclass(slots=True)
+class PolledDevice:
+    name: str
+    scan_interval: float
+    # Where in each interval the device's polls are placed, as a fraction of the interval
+    phase: float
+    last_change: float
+    fast_until: float = 0.0
+    failures: int = 0
+    mode: PollMode = PollMode.NORMAL
+    interval: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {"mode": self.mode.value, "interval": round(self.interval, 1), "failures": self.failures}
+
+
+class PollScheduler:
+    """Decides when each device is polled next, shared by the coordinators of all config entries. The time is passed
+    in explicitly (in the event loop's clock), since the coordinators schedule their refreshes with it.
+
+    Devices are polled at their configured interval by default, quickly for a while after their source or signal has
+    changed, progressively slower while nothing changes, and with an exponential back-off while they're unreachable.
+    Polls are staggered, i.e. every device is assigned its own phase within the interval, so that devices sharing an
+    interval aren't all polled at the same moment."""
+
+    def __init__(self):
+        self._devices: dict[str, PolledDevice] = {}
+        self._registrations = 0
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def register(self, key: str, name: str, scan_interval: float, now: float) -> PolledDevice:
+        phase = (self._registrations * GOLDEN_RATIO_FRACTION) % 1
+        self._registrations += 1
+
+        device = PolledDevice(name, scan_interval, phase, last_change=now, interval=scan_interval)
+        self._devices[key] = device
+
+        return device
+
+    def unregister(self, key: str):
+        self._devices.pop(key, None)
+
+    def record_change(self, key: str, path: str, now: float) -> bool:
+        """Records a changed property of a device. Returns whether the device should now be polled sooner than it's
+        currently scheduled to be."""
+        if (device := self._devices.get(key)) is None:
+            return False
+
+        device.last_change = now
+        if path not in FAST_POLL_PATHS:
+            return False
+
+        device.fast_until = now + FAST_POLL_DURATION
+
+        return device.interval > FAST_SCAN_INTERVAL
+
+    def next_interval(self, key: str, success: bool, now: float) -> float:
+        """Returns the number of seconds until a device should be polled next, given the outcome of its last poll"""
+        device = self._devices[key]
+
+        if not success:
+            device.failures += 1
+            device.mode = PollMode.OFFLINE
+            max_interval = max(device.scan_interval, MAX_SCAN_INTERVAL)
+            interval = min(device.scan_interval * 2**device.failures, max_interval)
+        elif now < device.fast_until:
+            device.failures = 0
+            device.mode = PollMode.FAST
+            device.interval = min(FAST_SCAN_INTERVAL, device.scan_interval)
+
+            # Not staggered, the point is to poll soon
+            return device.interval
+        else:
+            device.failures = 0
+            slowdown = min(MAX_STABLE_SLOWDOWN, 2 ** int((now - device.last_change) // STABLE_PERIOD))
+            device.mode = PollMode.STABLE if slowdown > 1 else PollMode.NORMAL
+            interval = device.scan_interval * slowdown
+
+        device.interval = interval
+
+        # Place the poll on the device's phase within the interval, at least half an interval from now
+        earliest = now + interval / 2
+        next_poll = earliest + (device.phase * interval - earliest) % interval
+
+        return next_poll - now
+
+    @property
+    def budget(self) -> float:
+        """The number of polls per minute across all devices at their current intervals"""
+        return sum(60 / device.interval for device in self._devices.values() if device.interval > 0)
+
+    def get_state(self, key: str) -> dict:
+        """Describes the polling of a device and the overall budget, for diagnostics"""
+        device = self._devices.get(key)
+
+        return {
+            "device": device.as_dict() if device is not None else None,
+            "devices": len(self._devices),
+            "polls_per_minute": round(self.budget, 1),
+        }
@@ -0,0 +1,235 @@
+import logging
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTemperature, UnitOfTime
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.typing import StateType
+
+from custom_components.vinx import DeviceInformation, VinxRuntimeData
+from custom_components.vinx.entity import VinxPropertyEntity
+from custom_components.vinx.metrics import LW3Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# How often the metrics sensors are updated
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+@dataclass(frozen=True, kw_only=True)
+class VinxMetricsSensorEntityDescription(SensorEntityDescription):
+    value_fn: Callable[[LW3Metrics], float | int | None]
+
+
+@dataclass(frozen=True, kw_only=True)
+class VinxPropertySensorEntityDescription(SensorEntityDescription):
+    # The LW3 property the sensor represents
+    path: str
+    value_fn: Callable[[str], StateType] = str
+    # Whether the property is a measurement or counter that changes all the time, rather than device state
+    volatile: bool = False
+
+
+def _number(value: str) -> float | None:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+# Sensors mapped from LW3 properties. Properties of the same node are read with a single GETALL, so adding a sensor
+# for another property of one of these nodes costs no extra requests.
+PROPERTY_SENSORS: tuple[VinxPropertySensorEntityDescription, ...] = (
+    VinxPropertySensorEntityDescription(
+        key="video_resolution",
+        name="video resolution",
+        path="/MEDIA/VIDEO/I1.Resolution",
+    ),
+    VinxPropertySensorEntityDescription(
+        key="uptime",
+        name="uptime",
+        path="/MANAGEMENT/STATUS.Uptime",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=_number,
+        volatile=True,
+    ),
+    VinxPropertySensorEntityDescription(
+        key="temperature",
+        name="temperature",
+        path="/MANAGEMENT/STATUS.Temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=_number,
+        volatile=True,
+    ),
+    VinxPropertySensorEntityDescription(
+        key="network_received",
+        name="network received",
+        path="/MANAGEMENT/NETWORK.RxBytes",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=_number,
+        volatile=True,
+    ),
+    VinxPropertySensorEntityDescription(
+        key="network_sent",
+        name="network sent",
+        path="/MANAGEMENT/NETWORK.TxBytes",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=_number,
+        volatile=True,
+    ),
+)
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+METRICS_SENSORS: tuple[VinxMetricsSensorEntityDescription, ...] = (
+    VinxMetricsSensorEntityDescription(
+        key="command_latency_p50",
+        name="command latency (median)",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: _milliseconds(metrics.latency.percentile(50)),
+    ),
+    VinxMetricsSensorEntityDescription(
+        key="command_latency_p99",
+        name="command latency (99th percentile)",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: _milliseconds(metrics.latency.percentile(99)),
+    ),
+    VinxMetricsSensorEntityDescription(
+        key="commands",
+        name="commands",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.command_count,
+    ),
+    VinxMetricsSensorEntityDescription(
+        key="command_errors",
+        name="command errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.errors,
+    ),
+    VinxMetricsSensorEntityDescription(
+        key="command_timeouts",
+        name="command timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.timeouts,
+    ),
+    VinxMetricsSensorEntityDescription(
+        key="commands_in_flight",
+        name="commands in flight",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.in_flight,
+    ),
+    VinxMetricsSensorEntityDescription(
+        key="reconnects",
+        name="reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.reconnects,
+    ),
+)
+
+
+async def async_setup_entry(hass, entry: ConfigEntry, async_add_entities):
+    runtime_data: VinxRuntimeData = entry.runtime_data
+
+    async_add_entities(
+        [
+            VinxPropertySensorEntity(runtime_data.coordinator, runtime_data.device_information, description)
+            for description in PROPERTY_SENSORS
+        ]
+    )
+
+    # Metrics are only collected when enabled in the options
+    if (metrics := runtime_data.lw3.metrics) is not None:
+        async_add_entities(
+            [
+                VinxMetricsSensorEntity(metrics, runtime_data.device_information, description)
+                for description in METRICS_SENSORS
+            ]
+        )
+
+
+class VinxMetricsSensorEntity(SensorEntity):
+    """Diagnostic sensor exposing one of the command metrics of a device's LW3 connection. The metrics are read
+    periodically rather than pushed, since they change with every command."""
+
+    entity_description: VinxMetricsSensorEntityDescription
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        metrics: LW3Metrics,
+        device_information: DeviceInformation,
+        description: VinxMetricsSensorEntityDescription,
+    ) -> None:
+        self.entity_description = description
+        self._metrics = metrics
+        self._device_information = device_information
+
+    @property
+    def unique_id(self) -> str | None:
+        return f"vinx_{self._device_information.mac_address}_{self.entity_description.key}"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return self._device_information.device_info
+
+    @property
+    def name(self):
+        # Use increasingly less descriptive names depending on what information is available
+        device_label = self._device_information.device_label
+        serial_number = self._device_information.device_info.get("serial_number")
+
+        if device_label:
+            return f"{device_label} {self.entity_description.name}"
+        elif serial_number:
+            return f"VINX {serial_number} {self.entity_description.name}"
+        else:
+            return f"VINX {self.entity_description.name}"
+
+    @property
+    def native_value(self) -> float | int | None:
+        return self.entity_description.value_fn(self._metrics)
+
+
+class VinxPropertySensorEntity(VinxPropertyEntity, SensorEntity):
+    entity_description: VinxPropertySensorEntityDescription
+
+    @property
+    def volatile(self) -> bool:
+        return self.entity_description.volatile
+
+    @property
+    def native_value(self) -> StateType:
+        value = self.property_value
+
+        return self.entity_description.value_fn(value) if value is not None else None
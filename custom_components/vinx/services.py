@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import statistics
+import time
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from custom_components.vinx.const import DOMAIN
+from custom_components.vinx.lw3 import LW3, PropertyResponse
+
+if TYPE_CHECKING:
+    from custom_components.vinx import VinxData, VinxRuntimeData
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_ROUTE = "route"
+SERVICE_AUDIT = "audit"
+
+EVENT_AUDIT_OUTLIER = f"{DOMAIN}_audit_outlier"
+
+ATTR_ROUTES = "routes"
+
+ROUTE_SCHEMA = vol.Schema({vol.Required(ATTR_ROUTES): vol.Schema({cv.entity_id: cv.string})})
+
+# The maximum number of devices audited concurrently
+AUDIT_CONCURRENCY = 25
+
+# How long (in seconds) to wait for each audited device
+AUDIT_TIMEOUT = 5
+
+# A round-trip time is an outlier when it's this many times the median and also at least this many milliseconds longer
+AUDIT_ROUND_TRIP_OUTLIER_FACTOR = 3
+AUDIT_ROUND_TRIP_OUTLIER_MIN_DIFFERENCE = 50
+
+# The properties included in the audit. Those of the same node are read with a single GETALL.
+AUDIT_PATHS = {
+    "firmware_version": "/.FirmwareVersion",
+    "serial_number": "/.SerialNumber",
+    "signal_present": "/MEDIA/VIDEO/I1.SignalPresent",
+    "input_connected": "/MEDIA/VIDEO/I1.Connected",
+    "uptime": "/MANAGEMENT/STATUS.Uptime",
+}
+
+
+@dataclass(slots=True, frozen=True)
+class AuditTarget:
+    entry_id: str
+    name: str
+    product_name: str
+    lw3: LW3
+
+
+def async_setup_services(hass: HomeAssistant):
+    async def async_route(call: ServiceCall) -> ServiceResponse:
+        results = await async_route_decoders(hass, call.data[ATTR_ROUTES])
+
+        failures = {entity_id: result["error"] for entity_id, result in results.items() if not result["success"]}
+        if failures and not call.return_response:
+            raise HomeAssistantError(
+                "Unable to route " + ", ".join(f"{entity_id} ({error})" for entity_id, error in failures.items())
+            )
+
+        return {"results": results}
+
+    async def async_audit(call: ServiceCall) -> ServiceResponse:
+        targets = [
+            AuditTarget(
+                entry.entry_id, entry.title, entry.runtime_data.device_information.product_name, entry.runtime_data.lw3
+            )
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.state is ConfigEntryState.LOADED
+        ]
+        report = await async_audit_devices(targets)
+
+        for outlier in report["outliers"]:
+            hass.bus.async_fire(EVENT_AUDIT_OUTLIER, outlier)
+
+        return report
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_ROUTE, async_route, schema=ROUTE_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(DOMAIN, SERVICE_AUDIT, async_audit, supports_response=SupportsResponse.ONLY)
+
+
+async def async_route_decoders(hass: HomeAssistant, routes: dict[str, str]) -> dict[str, dict[str, Any]]:
+    """Switches each decoder (a media player entity ID) to the specified source (an encoder name, MAC address or video
+    channel ID). All decoders are switched concurrently over their own connections, so a whole scene takes about one
+    round trip. Returns the outcome per decoder."""
+    vinx_data: VinxData | None = hass.data.get(DOMAIN)
+
+    async def route(entity_id: str, source: str) -> dict[str, Any]:
+        try:
+            runtime_data = _get_decoder_runtime_data(hass, entity_id)
+
+            resolved_source = vinx_data.discovery_cache.sources.resolve(source) if vinx_data else None
+            if resolved_source is None:
+                raise ValueError(f"Unknown source {source}")
+
+            video_channel_id = resolved_source.video_channel_id
+            await runtime_data.coordinator.async_set_property("/SYS/MB/PHY.VideoChannelId", video_channel_id)
+        except (OSError, EOFError, TimeoutError, ValueError) as e:
+            _LOGGER.debug(f"Unable to route {source} to {entity_id}: {e}")
+            return {"success": False, "source": source, "error": str(e) or type(e).__name__}
+
+        return {"success": True, "source": resolved_source.name, "video_channel_id": video_channel_id}
+
+    results = await asyncio.gather(*[route(entity_id, source) for entity_id, source in routes.items()])
+
+    return dict(zip(routes.keys(), results, strict=True))
+
+
+def _get_decoder_runtime_data(hass: HomeAssistant, entity_id: str) -> "VinxRuntimeData":
+    entity_entry = er.async_get(hass).async_get(entity_id)
+    if entity_entry is None or entity_entry.platform != DOMAIN or entity_entry.config_entry_id is None:
+        raise ValueError("Not a VINX entity")
+
+    entry = hass.config_entries.async_get_entry(entity_entry.config_entry_id)
+    if entry is None or entry.state is not ConfigEntryState.LOADED:
+        raise ValueError("Device is not loaded")
+
+    runtime_data: VinxRuntimeData = entry.runtime_data
+    if not runtime_data.device_information.product_name.endswith("DEC"):
+        raise ValueError("Not a decoder")
+
+    return runtime_data
+
+
+async def async_audit_devices(targets: list[AuditTarget]) -> dict[str, Any]:
+    """Reads the firmware version, serial number, link status and round-trip time of every device concurrently and
+    reports them along with the outliers among them. Each device is given at most AUDIT_TIMEOUT seconds, and devices
+    that are already known to be unreachable fail fast, so the whole audit takes about one timeout."""
+    semaphore = asyncio.Semaphore(AUDIT_CONCURRENCY)
+    start = time.monotonic()
+
+    async def audit(target: AuditTarget) -> dict[str, Any]:
+        result = {"entry_id": target.entry_id, "name": target.name, "product_name": target.product_name}
+
+        try:
+            async with semaphore, asyncio.timeout(AUDIT_TIMEOUT):
+                properties = await target.lw3.read_properties(AUDIT_PATHS.values())
+                # Measured afterwards on its own, so that it doesn't include waiting for the batched read to be
+                # transferred
+                round_trip_time = await target.lw3.measure_round_trip_time()
+        except (OSError, EOFError, TimeoutError, ValueError) as e:
+            _LOGGER.debug(f"Unable to audit {target.name}: {e}")
+            return {**result, "reachable": False, "error": str(e) or type(e).__name__}
+
+        values = {
+            key: response.value if isinstance(response := properties[path], PropertyResponse) else None
+            for key, path in AUDIT_PATHS.items()
+        }
+
+        return {**result, "reachable": True, "round_trip_time": round(round_trip_time * 1000, 1), **values}
+
+    devices = sorted(await asyncio.gather(*[audit(target) for target in targets]), key=lambda device: device["name"])
+    reachable_devices = [device for device in devices if device["reachable"]]
+
+    firmware_versions: dict[str, Counter[str]] = {}
+    for device in reachable_devices:
+        if device["firmware_version"] is not None:
+            firmware_versions.setdefault(device["product_name"], Counter())[device["firmware_version"]] += 1
+
+    return {
+        "duration": round(time.monotonic() - start, 3),
+        "summary": {
+            "devices": len(devices),
+            "reachable": len(reachable_devices),
+            "firmware_versions": {product: dict(versions) for product, versions in firmware_versions.items()},
+        },
+        "devices": devices,
+        "outliers": find_audit_outliers(devices),
+    }
+
+
+def find_audit_outliers(devices: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Finds the devices that stand out in an audit: unreachable ones, ones running a different firmware version than
+    most devices of the same model, and ones that respond much slower than the rest"""
+    outliers = []
+    reachable_devices = [device for device in devices if device["reachable"]]
+
+    common_firmware_versions = {}
+    for product_name in {device["product_name"] for device in reachable_devices}:
+        versions = Counter(
+            device["firmware_version"]
+            for device in reachable_devices
+            if device["product_name"] == product_name and device["firmware_version"] is not None
+        )
+        if versions:
+            common_firmware_versions[product_name] = versions.most_common(1)[0][0]
+
+    round_trip_times = [device["round_trip_time"] for device in reachable_devices]
+    median_round_trip_time = statistics.median(round_trip_times) if round_trip_times else None
+
+    for device in devices:
+        outlier = {"entry_id": device["entry_id"], "name": device["name"]}
+
+        if not device["reachable"]:
+            outliers.append({**outlier, "reason": "unreachable", "error": device["error"]})
+            continue
+
+        common_firmware_version = common_firmware_versions.get(device["product_name"])
+        if device["firmware_version"] is not None and device["firmware_version"] != common_firmware_version:
+            outliers.append(
+                {
+                    **outlier,
+                    "reason": "firmware_version",
+                    "firmware_version": device["firmware_version"],
+                    "common_firmware_version": common_firmware_version,
+                }
+            )
+
+        round_trip_time = device["round_trip_time"]
+        if (
+            round_trip_time > median_round_trip_time * AUDIT_ROUND_TRIP_OUTLIER_FACTOR
+            and round_trip_time - median_round_trip_time > AUDIT_ROUND_TRIP_OUTLIER_MIN_DIFFERENCE
+        ):
+            outliers.append(
+                {
+                    **outlier,
+                    "reason": "round_trip_time",
+                    "round_trip_time": round_trip_time,
+                    "median_round_trip_time": median_round_trip_time,
+                }
+            )
+
+    return outliers
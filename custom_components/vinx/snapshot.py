@@ -0,0 +1,150 @@
+import asyncio
+import logging
+
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass, field
+
+from custom_components.vinx.lw3 import LW3, NodeResponse, get_node_properties
+
+_LOGGER = logging.getLogger(__name__)
+
+# The maximum number of GETALL requests in flight while walking a tree
+WALK_CONCURRENCY = 10
+
+
+@dataclass(slots=True, frozen=True)
+class TreeDiff:
+    """The difference between two snapshots of the same tree. Changed properties map to their new values."""
+
+    added: dict[str, str] = field(default_factory=dict)
+    changed: dict[str, str] = field(default_factory=dict)
+    removed: frozenset[str] = frozenset()
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class TreeSnapshot(Mapping[str, str]):
+    """Read-only snapshot of every property in a node subtree, e.g. {"/SYS/MB.DeviceLabel": "Foo"}. Properties are
+    also indexed by node so that whole nodes can be looked up and compared cheaply."""
+
+    def __init__(self, root: str, nodes: dict[str, dict[str, str]], truncated: bool = False):
+        self._root = root
+        self._nodes = nodes
+        self._truncated = truncated
+        self._properties = {
+            f"{node}.{name}": value for node, properties in nodes.items() for name, value in properties.items()
+        }
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the walk stopped before reaching every node"""
+        return self._truncated
+
+    @property
+    def nodes(self) -> Mapping[str, dict[str, str]]:
+        """Maps each node in the tree to its properties, e.g. {"/SYS/MB": {"DeviceLabel": "Foo"}}"""
+        return self._nodes
+
+    def __getitem__(self, path: str) -> str:
+        return self._properties[path]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._properties)
+
+    def __len__(self) -> int:
+        return len(self._properties)
+
+    def diff(self, previous: "TreeSnapshot") -> TreeDiff:
+        """Returns what has changed since the previous snapshot. Only nodes whose properties differ are examined."""
+        added = {}
+        changed = {}
+        removed = set()
+
+        for node in self._nodes.keys() | previous.nodes.keys():
+            properties = self._nodes.get(node, {})
+            previous_properties = previous.nodes.get(node, {})
+            if properties == previous_properties:
+                continue
+
+            for name, value in properties.items():
+                if name not in previous_properties:
+                    added[f"{node}.{name}"] = value
+                elif previous_properties[name] != value:
+                    changed[f"{node}.{name}"] = value
+
+            removed.update(f"{node}.{name}" for name in previous_properties.keys() - properties.keys())
+
+        return TreeDiff(added, changed, frozenset(removed))
+
+
+async def walk_tree(
+    lw3: LW3, root: str, concurrency: int = WALK_CONCURRENCY, max_nodes: int | None = None
+) -> TreeSnapshot:
+    """Recursively reads every node under root with one GETALL per node, a bounded number of nodes at a time. Nodes
+    the device refuses to list are skipped, while connection errors abort the walk. If max_nodes is given, the walk
+    stops after that many nodes and the snapshot is marked as truncated."""
+    semaphore = asyncio.Semaphore(concurrency)
+    nodes: dict[str, dict[str, str]] = {}
+    scheduled_count = 1
+    truncated = False
+
+    async def walk(node: str, task_group: asyncio.TaskGroup):
+        nonlocal scheduled_count, truncated
+
+        async with semaphore:
+            try:
+                response = await lw3.get_all(node)
+            except ValueError as e:
+                _LOGGER.debug(f"Skipping node {node}: {e}")
+                return
+
+        nodes[node] = get_node_properties(response)
+
+        for line in response if isinstance(response, tuple) else (response,):
+            if not isinstance(line, NodeResponse):
+                continue
+
+            if max_nodes is not None and scheduled_count >= max_nodes:
+                truncated = True
+                break
+
+            scheduled_count += 1
+            task_group.create_task(walk(line.path, task_group))
+
+    try:
+        async with asyncio.TaskGroup() as task_group:
+            task_group.create_task(walk(root, task_group))
+    except ExceptionGroup as e:
+        # Surface the first error on its own so that callers can handle connection errors as usual
+        raise e.exceptions[0] from None
+
+    # Sort the nodes so that snapshots of the same tree iterate in the same order regardless of response timing
+    return TreeSnapshot(root, dict(sorted(nodes.items())), truncated)
+
+
+class TreeWatcher:
+    """Repeatedly snapshots the same subtree of a device and reports what changed between walks"""
+
+    def __init__(self, lw3: LW3, root: str, concurrency: int = WALK_CONCURRENCY):
+        self._lw3 = lw3
+        self._root = root
+        self._concurrency = concurrency
+        self._snapshot: TreeSnapshot | None = None
+
+    @property
+    def snapshot(self) -> TreeSnapshot | None:
+        return self._snapshot
+
+    async def async_refresh(self) -> TreeDiff:
+        """Walks the tree again and returns the difference to the previous walk. On the first walk every property is
+        reported as added."""
+        snapshot = await walk_tree(self._lw3, self._root, self._concurrency)
+        diff = snapshot.diff(self._snapshot or TreeSnapshot(self._root, {}))
+        self._snapshot = snapshot
+
+        return diff
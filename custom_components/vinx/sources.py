@@ -0,0 +1,153 @@
+import logging
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from homeassistant.helpers.device_registry import format_mac
+
+if TYPE_CHECKING:
+    from custom_components.vinx.discovery import DiscoveredEncoder
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class Source:
+    mac_address: str
+    # The name shown in source lists. Equal to the device name unless several encoders share it.
+    name: str
+    device_name: str
+    video_channel_id: str
+
+
+def normalize_name(name: str) -> str:
+    """Normalizes a source name for lenient matching, i.e. ignoring case and extra whitespace"""
+    return " ".join(name.split()).casefold()
+
+
+class SourceIndex:
+    """Index of the selectable sources (encoders), keyed by MAC address. Sources can be looked up by name, video
+    channel ID or MAC address in constant time.
+
+    Encoders that share a device name are told apart by appending their MAC address to the name. Names that only differ
+    in case or whitespace are not, so looking them up leniently is ambiguous and matches neither. When several encoders
+    use the same video channel, the one indexed last is returned for it.
+
+    The index is updated incrementally, only the encoders that have appeared, disappeared or changed (and any encoders
+    sharing their name) are re-indexed."""
+
+    def __init__(self):
+        self._by_mac: dict[str, Source] = {}
+        self._by_name: dict[str, Source] = {}
+        # Neither normalized names nor video channel IDs are necessarily unique, so these map to sources by MAC address
+        self._by_normalized_name: dict[str, dict[str, Source]] = {}
+        self._by_video_channel_id: dict[str, dict[str, Source]] = {}
+        self._macs_by_device_name: dict[str, set[str]] = {}
+        self._names: list[str] | None = None
+
+    def __len__(self) -> int:
+        return len(self._by_mac)
+
+    def __iter__(self) -> Iterator[Source]:
+        return iter(self._by_mac.values())
+
+    @property
+    def names(self) -> list[str]:
+        """The names of all sources in alphabetical order"""
+        if self._names is None:
+            self._names = sorted(self._by_name.keys(), key=str.casefold)
+
+        return self._names
+
+    def get_by_mac_address(self, mac_address: str) -> Source | None:
+        return self._by_mac.get(format_mac(mac_address))
+
+    def get_by_name(self, name: str) -> Source | None:
+        if (source := self._by_name.get(name)) is not None:
+            return source
+
+        sources = self._by_normalized_name.get(normalize_name(name), {})
+
+        return next(iter(sources.values())) if len(sources) == 1 else None
+
+    def get_by_video_channel_id(self, video_channel_id: str) -> Source | None:
+        sources = self._by_video_channel_id.get(video_channel_id, {})
+
+        return next(reversed(sources.values())) if sources else None
+
+    def resolve(self, query: str) -> Source | None:
+        """Finds the source matching a name, MAC address or video channel ID, in that order of precedence"""
+        return self.get_by_name(query) or self.get_by_mac_address(query) or self.get_by_video_channel_id(query)
+
+    def update(self, encoders: Iterable["DiscoveredEncoder"]) -> bool:
+        """Updates the index to contain exactly the specified encoders. Returns whether anything changed."""
+        encoders = {encoder.mac_address: encoder for encoder in encoders}
+
+        removed = [mac for mac in self._by_mac if mac not in encoders]
+        updated = [
+            encoder
+            for mac, encoder in encoders.items()
+            if (source := self._by_mac.get(mac)) is None
+            or (source.device_name, source.video_channel_id) != (encoder.device_name, encoder.video_channel_id)
+        ]
+        if not removed and not updated:
+            return False
+
+        # Remove the old entries and keep track of which names are affected, since encoders that shared a name with
+        # a removed or renamed encoder may no longer need to be told apart, and vice versa
+        affected_device_names = set()
+        for mac in [*removed, *(encoder.mac_address for encoder in updated)]:
+            if (source := self._by_mac.get(mac)) is not None:
+                self._remove(source)
+                affected_device_names.add(source.device_name)
+
+        for encoder in updated:
+            self._macs_by_device_name.setdefault(encoder.device_name, set()).add(encoder.mac_address)
+            affected_device_names.add(encoder.device_name)
+
+        for device_name in affected_device_names:
+            macs = self._macs_by_device_name.get(device_name, set())
+
+            for mac in macs:
+                # Re-index encoders whose name may change because of the update
+                encoder = encoders[mac]
+                if (source := self._by_mac.get(mac)) is not None:
+                    self._remove(source, keep_device_name=True)
+
+                name = device_name if len(macs) == 1 else f"{device_name} ({mac})"
+                self._add(Source(mac, name, device_name, encoder.video_channel_id))
+
+        self._names = None
+
+        return True
+
+    def _add(self, source: Source):
+        self._by_mac[source.mac_address] = source
+        self._by_name[source.name] = source
+        self._by_normalized_name.setdefault(normalize_name(source.name), {})[source.mac_address] = source
+
+        if (other := self.get_by_video_channel_id(source.video_channel_id)) is not None:
+            _LOGGER.warning(f"{source.name} and {other.name} use the same video channel {source.video_channel_id}")
+        self._by_video_channel_id.setdefault(source.video_channel_id, {})[source.mac_address] = source
+
+    def _remove(self, source: Source, keep_device_name: bool = False):
+        del self._by_mac[source.mac_address]
+        if self._by_name.get(source.name) is source:
+            del self._by_name[source.name]
+
+        # Any other sources with the same key remain indexed under it
+        for index, key in (
+            (self._by_normalized_name, normalize_name(source.name)),
+            (self._by_video_channel_id, source.video_channel_id),
+        ):
+            sources = index[key]
+            del sources[source.mac_address]
+            if not sources:
+                del index[key]
+
+        if not keep_device_name:
+            macs = self._macs_by_device_name[source.device_name]
+            macs.discard(source.mac_address)
+            if not macs:
+                del self._macs_by_device_name[source.device_name]
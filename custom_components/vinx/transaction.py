@@ -0,0 +1,107 @@
+import asyncio
+import logging
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from enum import Enum
+
+from custom_components.vinx.lw3 import LW3, PropertyResponse
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SetStatus(Enum):
+    APPLIED = "applied"
+    FAILED = "failed"
+    ROLLED_BACK = "rolled_back"
+    ROLLBACK_FAILED = "rollback_failed"
+    NOT_ATTEMPTED = "not_attempted"
+
+
+@dataclass(slots=True, frozen=True)
+class SetOutcome:
+    path: str
+    value: str
+    status: SetStatus
+    # The value before the transaction, if it was read
+    previous_value: str | None = None
+    error: Exception | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class TransactionResult:
+    outcomes: dict[str, SetOutcome]
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    @property
+    def success(self) -> bool:
+        return all(outcome.status is SetStatus.APPLIED for outcome in self.outcomes.values())
+
+    @property
+    def errors(self) -> dict[str, Exception]:
+        return {path: outcome.error for path, outcome in self.outcomes.items() if outcome.error is not None}
+
+
+async def set_properties(lw3: LW3, values: Mapping[str, str], rollback: bool = True) -> TransactionResult:
+    """Writes several properties at once. The writes are pipelined on the device connection in the given order, so
+    this costs about one round trip no matter how many properties there are.
+
+    With rollback enabled, the previous values are captured first with one batched read (nothing is written if that
+    fails), and if any write fails, the properties that were already written are restored to their previous values.
+    The result reports the outcome per path."""
+    values = dict(values)
+    previous_values: dict[str, str] = {}
+
+    if rollback:
+        read_results = await lw3.read_properties(values.keys())
+        read_errors = {path: result for path, result in read_results.items() if isinstance(result, Exception)}
+
+        if read_errors:
+            return TransactionResult(
+                {
+                    path: SetOutcome(path, value, SetStatus.NOT_ATTEMPTED, error=read_errors.get(path))
+                    for path, value in values.items()
+                }
+            )
+
+        previous_values = {path: result.value for path, result in read_results.items()}
+
+    write_results = await _write(lw3, values)
+
+    outcomes = {
+        path: SetOutcome(
+            path,
+            value,
+            SetStatus.FAILED if isinstance(result, Exception) else SetStatus.APPLIED,
+            previous_values.get(path),
+            result if isinstance(result, Exception) else None,
+        )
+        for (path, value), result in zip(values.items(), write_results.values(), strict=True)
+    }
+
+    if rollback and any(outcome.status is SetStatus.FAILED for outcome in outcomes.values()):
+        applied = {
+            path: previous_values[path] for path, outcome in outcomes.items() if outcome.status is SetStatus.APPLIED
+        }
+        _LOGGER.debug(f"Rolling back {len(applied)} properties after a failed write")
+
+        for path, result in (await _write(lw3, applied)).items():
+            outcome = outcomes[path]
+            if isinstance(result, Exception):
+                outcomes[path] = SetOutcome(
+                    path, outcome.value, SetStatus.ROLLBACK_FAILED, outcome.previous_value, result
+                )
+            else:
+                outcomes[path] = SetOutcome(path, outcome.value, SetStatus.ROLLED_BACK, outcome.previous_value)
+
+    return TransactionResult(outcomes)
+
+
+async def _write(lw3: LW3, values: dict[str, str]) -> dict[str, PropertyResponse | Exception]:
+    results = await asyncio.gather(
+        *[lw3.set_property(path, value) for path, value in values.items()], return_exceptions=True
+    )
+
+    return dict(zip(values.keys(), results, strict=True))
@@ -0,0 +1,202 @@
+import asyncio
+
+from asyncio import StreamReader, StreamWriter
+
+
+def get_parent_node(node: str) -> str | None:
+    if node == "/":
+        return None
+
+    parent = node.rpartition("/")[0]
+
+    return parent if parent else "/"
+
+
+def build_discovery_properties(encoder_count: int, decoder_count: int = 0) -> dict[str, str]:
+    """Builds the /DISCOVERY tree of an installation with the specified number of encoders (TX) and decoders (RX)"""
+    properties = {}
+
+    for prefix, count in (("TX", encoder_count), ("RX", decoder_count)):
+        for i in range(count):
+            node = f"/DISCOVERY/{prefix}{i:06X}"
+            octets = [0x00, 0x11, 0xAA if prefix == "TX" else 0xBB, (i >> 16) & 0xFF, (i >> 8) & 0xFF, i & 0xFF]
+            properties[f"{node}.DeviceName"] = f"{'Encoder' if prefix == 'TX' else 'Decoder'} {i}"
+            properties[f"{node}.VideoChannelId"] = str(i + 1)
+            properties[f"{node}.IpAddress"] = f"10.{0 if prefix == 'TX' else 1}.{i // 256}.{i % 256}"
+            properties[f"{node}.MacAddress"] = ":".join(f"{octet:02X}" for octet in octets)
+
+    return properties
+
+
+class FakeLW3Server:
+    """Minimal emulation of an LW3 device, serving a node tree built from a flat property mapping such as
+    {"/SYS/MB.DeviceLabel": "Foo"}. Used to exercise the LW3 client over a real socket."""
+
+    def __init__(self, properties: dict[str, str] | None = None):
+        self.properties = dict(properties or {})
+        self.connection_count = 0
+        self.commands: list[str] = []
+        # Artificial network latency added to each response, in seconds
+        self.latency = 0.0
+        # When set, responses are split into chunks of this many bytes that are written separately
+        self.fragment_size: int | None = None
+        # Delay between those chunks, in seconds, like a slow link would add
+        self.fragment_interval = 0.0
+        # When set, each connection is dropped after it has received this many commands
+        self.drop_after: int | None = None
+        # Properties that can be read but not written
+        self.read_only_paths: set[str] = set()
+        self._server: asyncio.Server | None = None
+        self._writers: set[StreamWriter] = set()
+        self._opened_nodes: dict[StreamWriter, set[str]] = {}
+        self._send_queues: dict[StreamWriter, asyncio.Queue[bytes]] = {}
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    @property
+    def open_connection_count(self) -> int:
+        return len(self._writers)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+
+    async def stop(self):
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_connections(self):
+        for writer in self._writers:
+            writer.close()
+
+        self._writers.clear()
+        self._opened_nodes.clear()
+
+    def change_property(self, path: str, value: str):
+        """Changes a property and sends a CHG notification to every client that has opened its node"""
+        self.properties[path] = value
+        node = path.rpartition(".")[0]
+
+        for writer, opened_nodes in self._opened_nodes.items():
+            if node in opened_nodes:
+                self._write(writer, f"CHG {path}={value}\r\n".encode())
+
+    def send(self, data: bytes):
+        """Sends raw data to every client, e.g. to emulate a misbehaving device"""
+        for writer in self._writers:
+            self._write(writer, data)
+
+    @property
+    def nodes(self) -> set[str]:
+        nodes = set()
+
+        for path in self.properties:
+            node = path.rpartition(".")[0]
+
+            while node is not None:
+                nodes.add(node)
+                node = get_parent_node(node)
+
+        return nodes
+
+    async def _handle_client(self, reader: StreamReader, writer: StreamWriter):
+        self.connection_count += 1
+        self._writers.add(writer)
+        self._opened_nodes[writer] = set()
+        # Everything sent to a client goes through a queue so that fragmented responses are never interleaved
+        self._send_queues[writer] = asyncio.Queue()
+        send_task = asyncio.create_task(self._send_loop(writer))
+        command_count = 0
+
+        try:
+            while line := await reader.readline():
+                signature, _, command = line.decode().strip().partition("#")
+                self.commands.append(command)
+
+                response_lines = self.handle_command(command, writer)
+                response = ("\r\n".join([f"{{{signature}", *response_lines, "}"]) + "\r\n").encode()
+
+                if self.latency:
+                    # Delay the response without holding up the next command, like network latency would
+                    asyncio.get_running_loop().call_later(self.latency, self._write, writer, response)
+                else:
+                    self._write(writer, response)
+
+                command_count += 1
+                if self.drop_after is not None and command_count >= self.drop_after:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            send_task.cancel()
+            self._writers.discard(writer)
+            self._opened_nodes.pop(writer, None)
+            self._send_queues.pop(writer, None)
+            writer.close()
+
+    def _write(self, writer: StreamWriter, data: bytes):
+        if not writer.is_closing() and writer in self._send_queues:
+            self._send_queues[writer].put_nowait(data)
+
+    async def _send_loop(self, writer: StreamWriter):
+        queue = self._send_queues[writer]
+
+        while True:
+            data = await queue.get()
+            chunk_size = self.fragment_size or len(data)
+
+            for i in range(0, len(data), chunk_size):
+                if writer.is_closing():
+                    return
+
+                writer.write(data[i : i + chunk_size])
+                await writer.drain()
+
+                if self.fragment_size:
+                    # Give the client a chance to read each fragment on its own
+                    await asyncio.sleep(self.fragment_interval)
+
+    def handle_command(self, command: str, writer: StreamWriter) -> list[str]:
+        verb, _, argument = command.partition(" ")
+
+        match verb:
+            case "GET":
+                if argument not in self.properties:
+                    return [f"pE {argument} %E002:Not exists"]
+
+                return [f"pr {argument}={self.properties[argument]}"]
+            case "SET":
+                path, _, value = argument.partition("=")
+                if path not in self.properties:
+                    return [f"pE {path} %E002:Not exists"]
+                if path in self.read_only_paths:
+                    return [f"pE {path} %E005:Not writable"]
+
+                self.change_property(path, value)
+                return [f"pw {path}={value}"]
+            case "GETALL":
+                return self.get_all(argument)
+            case "OPEN":
+                if argument not in self.nodes:
+                    return [f"oE {argument} %E002:Not exists"]
+
+                self._opened_nodes[writer].add(argument)
+                return [f"o- {argument}"]
+            case "CALL":
+                return [f"mO {argument}"]
+
+        return [f"-E {command} %E001:Syntax error"]
+
+    def get_all(self, node: str) -> list[str]:
+        nodes = self.nodes
+        if node not in nodes:
+            return [f"nE {node} %E002:Not exists"]
+
+        child_nodes = [f"n- {child}" for child in sorted(nodes) if get_parent_node(child) == node]
+        properties = [
+            f"pr {path}={value}" for path, value in self.properties.items() if path.rpartition(".")[0] == node
+        ]
+
+        return child_nodes + properties
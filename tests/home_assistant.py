@@ -0,0 +1,59 @@
+import tempfile
+
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+
+from homeassistant import loader
+from homeassistant.auth import auth_manager_from_config
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+    floor_registry as fr,
+    label_registry as lr,
+)
+
+import custom_components
+
+from custom_components.vinx.const import DOMAIN
+
+
+class HomeAssistantTestCase(IsolatedAsyncioTestCase):
+    """Runs each test against a minimal Home Assistant instance, which loads the integration from this repository.
+    The configuration directory is temporary, so nothing is persisted between tests."""
+
+    async def asyncSetUp(self):
+        self._config_dir = tempfile.TemporaryDirectory()
+        config_dir = Path(self._config_dir.name)
+        (config_dir / "custom_components").symlink_to(Path(custom_components.__path__[0]), target_is_directory=True)
+
+        self.hass = HomeAssistant(str(config_dir))
+        loader.async_setup(self.hass)
+        self.hass.config_entries = ConfigEntries(self.hass, {})
+        await self.hass.config_entries.async_initialize()
+        for registry in (ar, dr, er, fr, lr):
+            await registry.async_load(self.hass)
+
+        # Needed by the http integration, which media_player depends on. Its server is only started along with
+        # Home Assistant itself, which the tests don't do.
+        self.hass.auth = await auth_manager_from_config(self.hass, [], [])
+
+    async def asyncTearDown(self):
+        for entry in self.hass.config_entries.async_entries():
+            await self.hass.config_entries.async_unload(entry.entry_id)
+
+        await self.hass.async_stop(force=True)
+        self._config_dir.cleanup()
+
+    async def async_add_device(self, port: int) -> ConfigEntry:
+        """Adds a device through the user flow and waits for its entry to be set up"""
+        result = await self.hass.config_entries.flow.async_init(DOMAIN, context={"source": "user"})
+        result = await self.hass.config_entries.flow.async_configure(
+            result["flow_id"], {"host": "127.0.0.1", "port": port}
+        )
+        # Including the background tasks, such as the initial refresh of the sources
+        await self.hass.async_block_till_done(wait_background_tasks=True)
+
+        return result["result"]
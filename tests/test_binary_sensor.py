@@ -0,0 +1,61 @@
+import asyncio
+
+from unittest import TestCase
+
+from homeassistant.const import STATE_OFF, STATE_ON, STATE_UNAVAILABLE
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.vinx.binary_sensor import parse_bool
+from custom_components.vinx.const import DOMAIN
+from tests.fake_lw3_server import FakeLW3Server
+from tests.home_assistant import HomeAssistantTestCase
+from tests.test_config_flow import build_device_properties
+
+
+class TestParseBool(TestCase):
+    def test_parse_bool(self):
+        self.assertTrue(parse_bool("1"))
+        self.assertTrue(parse_bool("true"))
+        self.assertTrue(parse_bool(" True\r"))
+        self.assertFalse(parse_bool("0"))
+        self.assertFalse(parse_bool("false"))
+
+
+class TestBinarySensor(HomeAssistantTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.server = FakeLW3Server(
+            {
+                **build_device_properties(0),
+                "/MEDIA/VIDEO/I1.SignalPresent": "1",
+                "/MEDIA/VIDEO/I1.HdcpActive": "false",
+                "/MEDIA/VIDEO/O1.Connected": "true",
+            }
+        )
+        await self.server.start()
+
+        self.entry = await self.async_add_device(self.server.port)
+        await self.entry.runtime_data.coordinator.async_refresh()
+        await self.hass.async_block_till_done()
+
+    async def asyncTearDown(self):
+        await super().asyncTearDown()
+        await self.server.stop()
+
+    def _get_state(self, key: str) -> str:
+        entity_id = er.async_get(self.hass).async_get_entity_id(
+            "binary_sensor", DOMAIN, f"vinx_00:11:AA:00:00:00_{key}"
+        )
+
+        return self.hass.states.get(entity_id).state
+
+    async def test_states_come_from_the_watched_properties(self):
+        self.assertEqual(STATE_ON, self._get_state("signal_present"))
+        self.assertEqual(STATE_OFF, self._get_state("hdcp_active"))
+        self.assertEqual(STATE_ON, self._get_state("output_connected"))
+        # The device doesn't report this property
+        self.assertEqual(STATE_UNAVAILABLE, self._get_state("input_connected"))
+
+        self.server.change_property("/MEDIA/VIDEO/I1.SignalPresent", "0")
+        await asyncio.sleep(0.05)
+        self.assertEqual(STATE_OFF, self._get_state("signal_present"))
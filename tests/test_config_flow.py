@@ -0,0 +1,121 @@
+from ipaddress import ip_address
+from unittest import IsolatedAsyncioTestCase
+
+from homeassistant.components.zeroconf import ZeroconfServiceInfo
+from homeassistant.config_entries import SOURCE_USER, SOURCE_ZEROCONF
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.vinx.config_flow import async_get_peer_addresses, async_probe_devices
+from custom_components.vinx.const import CONF_ADD_ALL_DEVICES, CONF_DEVICE_INFORMATION, CONF_HOST, CONF_PORT, DOMAIN
+from custom_components.vinx.lw3 import LW3
+from custom_components.vinx.pool import LW3Pool
+from tests.fake_lw3_server import FakeLW3Server, build_discovery_properties
+from tests.home_assistant import HomeAssistantTestCase
+
+
+def build_device_properties(index: int) -> dict[str, str]:
+    return {
+        "/.MacAddress": f"00:11:AA:00:00:{index:02X}",
+        "/.ProductName": "VINX-110-HDMI-DEC",
+        "/SYS/MB.DeviceLabel": f"Decoder {index}",
+        "/.FirmwareVersion": "7.4.1",
+        "/.SerialNumber": f"{index:06X}",
+        "/MANAGEMENT/NETWORK.IpAddress": "127.0.0.1",
+    }
+
+
+class TestBulkOnboarding(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.servers = [FakeLW3Server(build_device_properties(i)) for i in range(5)]
+        for server in self.servers:
+            server.latency = 0.05
+            await server.start()
+
+    async def asyncTearDown(self):
+        for server in self.servers:
+            await server.stop()
+
+    async def test_get_peer_addresses(self):
+        self.servers[0].properties.update(build_discovery_properties(3, 2))
+        lw3 = LW3("127.0.0.1", self.servers[0].port)
+
+        addresses = await async_get_peer_addresses(lw3)
+        await lw3.disconnect()
+
+        self.assertEqual(["10.0.0.0", "10.0.0.1", "10.0.0.2", "10.1.0.0", "10.1.0.1"], addresses)
+
+    async def test_probe_devices(self):
+        addresses = [("127.0.0.1", server.port) for server in self.servers]
+        await self.servers[0].stop()
+
+        pool = LW3Pool()
+        devices = await async_probe_devices(pool, addresses)
+
+        # The stopped device is skipped and the rest are probed concurrently, in about one round trip each
+        self.assertEqual(
+            ["Decoder 1", "Decoder 2", "Decoder 3", "Decoder 4"],
+            [device[CONF_DEVICE_INFORMATION]["device_label"] for device in devices],
+        )
+        self.assertEqual("127.0.0.1", devices[0][CONF_HOST])
+        self.assertEqual([port for _, port in addresses[1:]], [device["port"] for device in devices])
+
+        for server in self.servers[1:]:
+            self.assertEqual(6, len(server.commands))
+            self.assertEqual(0, len(server._writers))
+        self.assertEqual(0, len(pool))
+
+
+class TestBulkOnboardingFlow(HomeAssistantTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+
+        # Devices listen on the same port, each on its own loopback address
+        self.servers = [FakeLW3Server(build_device_properties(i)) for i in range(4)]
+        await self.servers[0].start()
+        self.port = self.servers[0].port
+        for i, server in enumerate(self.servers[1:], 2):
+            await server.start(f"127.0.0.{i}", self.port)
+            self.servers[0].properties[f"/DISCOVERY/RX{i:06X}.IpAddress"] = f"127.0.0.{i}"
+
+    async def asyncTearDown(self):
+        await super().asyncTearDown()
+        for server in self.servers:
+            await server.stop()
+
+    async def test_add_all_devices(self):
+        # One of the devices has been discovered but not added yet
+        discovery = await self.hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": SOURCE_ZEROCONF},
+            data=ZeroconfServiceInfo(
+                ip_address=ip_address("127.0.0.3"),
+                ip_addresses=[ip_address("127.0.0.3")],
+                port=self.port,
+                hostname="vinx.local.",
+                type="_lwr3._tcp.local.",
+                name="VINX._lwr3._tcp.local.",
+                properties={"mac": "00:11:AA:00:00:02"},
+            ),
+        )
+        self.assertEqual(FlowResultType.FORM, discovery["type"])
+
+        result = await self.hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
+        result = await self.hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_HOST: "127.0.0.1", CONF_PORT: self.port, CONF_ADD_ALL_DEVICES: True}
+        )
+        self.assertEqual("bulk_confirm", result["step_id"])
+        self.assertEqual("4", result["description_placeholders"]["count"])
+
+        result = await self.hass.config_entries.flow.async_configure(result["flow_id"], {})
+        await self.hass.async_block_till_done()
+
+        self.assertEqual(FlowResultType.CREATE_ENTRY, result["type"])
+        self.assertEqual("4", result["description_placeholders"]["added"])
+        self.assertIn("Decoder 2 (VINX-110-HDMI-DEC), 127.0.0.3: added", result["description_placeholders"]["devices"])
+        self.assertEqual(
+            ["Decoder 0", "Decoder 1", "Decoder 2", "Decoder 3"],
+            sorted(entry.title.partition(" (")[0] for entry in self.hass.config_entries.async_entries(DOMAIN)),
+        )
+
+        # The discovery flow of the device that was added is aborted
+        self.assertEqual([], self.hass.config_entries.flow.async_progress())
@@ -0,0 +1,148 @@
+import asyncio
+
+from unittest.mock import patch
+
+from custom_components.vinx import get_vinx_data
+from custom_components.vinx.const import CONF_ENABLE_METRICS, CONF_SCAN_INTERVAL, MAX_SCAN_INTERVAL
+from custom_components.vinx.scheduler import PollMode
+from tests.fake_lw3_server import FakeLW3Server
+from tests.home_assistant import HomeAssistantTestCase
+from tests.test_config_flow import build_device_properties
+
+
+class TestCoordinator(HomeAssistantTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.server = FakeLW3Server(
+            {
+                **build_device_properties(0),
+                "/MEDIA/VIDEO/I1.Resolution": "1920x1080p60",
+                "/MANAGEMENT/STATUS.Temperature": "41.5",
+                "/SYS/MB/PHY.VideoChannelId": "1",
+            }
+        )
+        await self.server.start()
+
+        self.entry = await self.async_add_device(self.server.port)
+        self.coordinator = self.entry.runtime_data.coordinator
+        self.device = get_vinx_data(self.hass).scheduler._devices[self.entry.entry_id]
+
+    async def asyncTearDown(self):
+        await super().asyncTearDown()
+        await self.server.stop()
+
+    async def test_refresh_is_one_batched_read(self):
+        self.server.commands.clear()
+        await self.coordinator.async_refresh()
+
+        # Nodes with several watched properties are read in full, the rest property by property
+        self.assertEqual(
+            [
+                "GET /MANAGEMENT/STATUS.Temperature",
+                "GET /MEDIA/VIDEO/O1.Connected",
+                "GET /SYS/MB/PHY.VideoChannelId",
+                "GETALL /MEDIA/VIDEO/I1",
+            ],
+            sorted(self.server.commands),
+        )
+        self.assertEqual("1920x1080p60", self.coordinator.get_value("/MEDIA/VIDEO/I1.Resolution"))
+
+        # More entities watching properties of those nodes don't add any requests
+        self.server.properties["/MEDIA/VIDEO/I1.ColorSpace"] = "RGB"
+        await self.coordinator.async_watch(["/MEDIA/VIDEO/I1.ColorSpace", "/MEDIA/VIDEO/I1.Resolution"])
+        await self.hass.async_block_till_done()
+        self.server.commands.clear()
+        await self.coordinator.async_refresh()
+
+        self.assertEqual(4, len(self.server.commands))
+        self.assertEqual("RGB", self.coordinator.get_value("/MEDIA/VIDEO/I1.ColorSpace"))
+
+    async def test_change_notifications_update_the_snapshot(self):
+        await self.hass.async_block_till_done()
+        scheduled_refresh = self.coordinator._unsub_refresh
+        self.server.commands.clear()
+        self.server.change_property("/MEDIA/VIDEO/I1.Resolution", "3840x2160p30")
+        await asyncio.sleep(0.05)
+
+        self.assertEqual("3840x2160p30", self.coordinator.get_value("/MEDIA/VIDEO/I1.Resolution"))
+        self.assertEqual([], self.server.commands)
+        # A device that keeps pushing changes must still be polled on time
+        self.assertIsNotNone(scheduled_refresh)
+        self.assertIs(scheduled_refresh, self.coordinator._unsub_refresh)
+
+        # Unless the change means the device should be polled sooner
+        self.server.change_property("/SYS/MB/PHY.VideoChannelId", "2")
+        await asyncio.sleep(0.05)
+        self.assertEqual(PollMode.FAST, self.device.mode)
+        self.assertIsNot(scheduled_refresh, self.coordinator._unsub_refresh)
+
+        # Changes of properties that aren't watched are ignored
+        self.server.change_property("/MEDIA/VIDEO/I1.Foo", "1")
+        await asyncio.sleep(0.05)
+        self.assertIsNone(self.coordinator.get_value("/MEDIA/VIDEO/I1.Foo"))
+
+    async def test_backs_off_while_unreachable(self):
+        port = self.server.port
+        await self.server.stop()
+
+        with patch("custom_components.vinx.lw3.random.uniform", return_value=0):
+            intervals = []
+            for _ in range(5):
+                await self.coordinator.async_refresh()
+                intervals.append(self.device.interval)
+
+            self.assertFalse(self.coordinator.last_update_success)
+            self.assertIs(PollMode.OFFLINE, self.device.mode)
+            self.assertEqual([60, 120, 240, MAX_SCAN_INTERVAL, MAX_SCAN_INTERVAL], intervals)
+
+            # The configured interval applies again as soon as the device is back
+            await self.server.start(port=port)
+            await self.coordinator.async_refresh()
+
+        self.assertTrue(self.coordinator.last_update_success)
+        self.assertEqual(30, self.device.interval)
+        self.assertEqual(0, self.device.failures)
+
+    async def test_scan_interval_option(self):
+        result = await self.hass.config_entries.options.async_init(self.entry.entry_id)
+        await self.hass.config_entries.options.async_configure(
+            result["flow_id"], {CONF_SCAN_INTERVAL: 120, CONF_ENABLE_METRICS: False}
+        )
+        await self.hass.async_block_till_done()
+
+        # The entry is reloaded with a new coordinator
+        coordinator = self.entry.runtime_data.coordinator
+        self.assertIsNot(self.coordinator, coordinator)
+        self.assertEqual(120, get_vinx_data(self.hass).scheduler._devices[self.entry.entry_id].scan_interval)
+
+    async def test_volatile_properties_are_not_activity(self):
+        last_change = self.device.last_change
+
+        # The temperature changes all the time, whether polled or pushed
+        self.server.properties["/MANAGEMENT/STATUS.Temperature"] = "42.0"
+        await self.coordinator.async_refresh()
+        self.server.change_property("/MANAGEMENT/STATUS.Temperature", "42.5")
+        await asyncio.sleep(0.05)
+
+        self.assertEqual("42.5", self.coordinator.get_value("/MANAGEMENT/STATUS.Temperature"))
+        self.assertEqual(last_change, self.device.last_change)
+
+        # Device state does count
+        self.server.properties["/MEDIA/VIDEO/I1.Resolution"] = "3840x2160p30"
+        await self.coordinator.async_refresh()
+        self.assertLess(last_change, self.device.last_change)
+
+    async def test_unload_while_refreshing(self):
+        self.server.latency = 0.1
+        connection_count = self.server.connection_count
+        refresh = asyncio.create_task(self.coordinator.async_refresh())
+        await asyncio.sleep(0.05)
+
+        # The refresh fails once the connection is closed, which must not make the released session reconnect
+        await self.hass.config_entries.async_unload(self.entry.entry_id)
+        await refresh
+        await asyncio.sleep(0.2)
+
+        self.assertFalse(self.coordinator.lw3.is_connected)
+        self.assertEqual(0, self.server.open_connection_count)
+        self.assertEqual(connection_count, self.server.connection_count)
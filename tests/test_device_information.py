@@ -0,0 +1,97 @@
+import time
+
+from unittest import IsolatedAsyncioTestCase
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.vinx import build_device_information, get_device_properties
+from custom_components.vinx.const import CONF_DEVICE_INFORMATION, DOMAIN
+from custom_components.vinx.lw3 import LW3
+from tests.fake_lw3_server import FakeLW3Server
+from tests.home_assistant import HomeAssistantTestCase
+from tests.test_config_flow import build_device_properties
+
+
+class TestDeviceInformation(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeLW3Server(
+            {
+                "/.MacAddress": "00:11:AA:E8:01:3A",
+                "/.ProductName": "VINX-110-HDMI-DEC",
+                "/SYS/MB.DeviceLabel": "Projector",
+                "/.FirmwareVersion": "7.4.1",
+                "/.SerialNumber": "E8013A",
+                "/MANAGEMENT/NETWORK.IpAddress": "10.0.0.2",
+            }
+        )
+        await self.server.start()
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=1)
+
+    async def asyncTearDown(self):
+        await self.lw3.disconnect()
+        await self.server.stop()
+
+    async def test_device_properties_can_be_cached(self):
+        device_properties = await get_device_properties(self.lw3)
+        self.assertEqual("VINX-110-HDMI-DEC", device_properties["product_name"])
+
+        # Device information is rebuilt from the cached properties without talking to the device
+        self.server.commands.clear()
+        device_information = build_device_information(dict(device_properties))
+        self.assertEqual([], self.server.commands)
+        self.assertEqual("Projector", device_information.device_label)
+        self.assertEqual({(DOMAIN, "00:11:aa:e8:01:3a")}, device_information.device_info["identifiers"])
+        self.assertEqual("http://10.0.0.2/", device_information.device_info["configuration_url"])
+
+    async def test_missing_properties_are_errors(self):
+        del self.server.properties["/.SerialNumber"]
+
+        with self.assertRaises(ValueError):
+            await get_device_properties(self.lw3)
+
+
+class TestCachedSetup(HomeAssistantTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.server = FakeLW3Server(build_device_properties(0))
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await super().asyncTearDown()
+        await self.server.stop()
+
+    async def test_setup_while_unreachable(self):
+        entry = await self.async_add_device(self.server.port)
+        self.assertIn(CONF_DEVICE_INFORMATION, entry.data)
+        entities = [
+            entity
+            for entity in er.async_entries_for_config_entry(er.async_get(self.hass), entry.entry_id)
+            if not entity.disabled
+        ]
+        self.assertLess(0, len(entities))
+
+        # Setting the entry up again only needs the cached device information
+        await self.server.stop()
+        self.assertTrue(await self.hass.config_entries.async_reload(entry.entry_id))
+        await self.hass.async_block_till_done()
+
+        self.assertIs(ConfigEntryState.LOADED, entry.state)
+        for entity in entities:
+            state = self.hass.states.get(entity.entity_id)
+            self.assertIsNotNone(state, entity.entity_id)
+            self.assertEqual(STATE_UNAVAILABLE, state.state, entity.entity_id)
+
+    async def test_setup_while_unresponsive(self):
+        entry = await self.async_add_device(self.server.port)
+
+        # The device accepts connections but doesn't answer, which setting up the entry mustn't wait for
+        self.server.latency = 60
+        start = time.monotonic()
+        self.assertTrue(await self.hass.config_entries.async_reload(entry.entry_id))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertIs(ConfigEntryState.LOADED, entry.state)
+
+        await self.server.stop()
+        await self.hass.async_block_till_done()
@@ -0,0 +1,57 @@
+import json
+
+from custom_components.vinx.diagnostics import async_get_config_entry_diagnostics
+from tests.fake_lw3_server import FakeLW3Server, build_discovery_properties
+from tests.home_assistant import HomeAssistantTestCase
+from tests.test_config_flow import build_device_properties
+
+
+class TestDiagnostics(HomeAssistantTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.server = FakeLW3Server(
+            {
+                **build_device_properties(0),
+                **build_discovery_properties(2, 1),
+                # Encoders sharing a name are listed as sources with their MAC address
+                "/DISCOVERY/TX000001.DeviceName": "Encoder 0",
+                "/MANAGEMENT/NETWORK.HostName": "decoder-0",
+                "/MANAGEMENT/NETWORK.Gateway": "10.0.0.254",
+                "/MEDIA/VIDEO/I1.SignalPresent": "1",
+            }
+        )
+        await self.server.start()
+
+        self.entry = await self.async_add_device(self.server.port)
+
+    async def asyncTearDown(self):
+        await super().asyncTearDown()
+        await self.server.stop()
+
+    async def test_diagnostics(self):
+        diagnostics = await async_get_config_entry_diagnostics(self.hass, self.entry)
+
+        self.assertTrue(diagnostics["connection"]["connected"])
+        self.assertEqual("1", diagnostics["coordinator"]["data"]["/MEDIA/VIDEO/I1.SignalPresent"])
+        self.assertEqual("Decoder 0", diagnostics["tree"]["nodes"]["/SYS/MB"]["DeviceLabel"])
+
+        # Addresses, host names and identifiers are redacted, also those of the peers listed by the device
+        self.assertEqual("**REDACTED**", diagnostics["entry"]["data"]["host"])
+        discovery_nodes = [node for node in diagnostics["tree"]["nodes"] if node.startswith("/DISCOVERY/")]
+        self.assertEqual(3, len(discovery_nodes))
+        self.assertEqual("**REDACTED**", diagnostics["tree"]["nodes"][discovery_nodes[0]]["IpAddress"])
+        self.assertEqual(
+            ["Encoder 0 (**REDACTED_", "Encoder 0 (**REDACTED_"],
+            [source["name"][:22] for source in diagnostics["discovery"]["sources"]],
+        )
+
+        dump = json.dumps(diagnostics)
+        for value in ("127.0.0.1", "10.0.0.1", "10.1.0.0", "10.0.0.254", "decoder-0"):
+            self.assertNotIn(value, dump)
+
+        # No MAC address appears in any form, including the names of the /DISCOVERY nodes derived from them
+        for mac_address in ("00:11:AA:00:00:00", "00:11:AA:00:00:01", "00:11:BB:00:00:00"):
+            self.assertNotIn(mac_address, dump)
+            self.assertNotIn(mac_address.lower(), dump)
+        for node in ("TX000000", "TX000001", "RX000000"):
+            self.assertNotIn(node, dump)
@@ -0,0 +1,100 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from custom_components.vinx.discovery import DiscoveryCache
+from custom_components.vinx.lw3 import LW3
+from tests.fake_lw3_server import FakeLW3Server, build_discovery_properties
+
+
+class TestDiscoveryCache(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeLW3Server(
+            {
+                "/DISCOVERY/TXE00143.DeviceName": "Laptop",
+                "/DISCOVERY/TXE00143.VideoChannelId": "1",
+                "/DISCOVERY/TXE00143.MacAddress": "00:11:AA:E0:01:43",
+                "/DISCOVERY/TXE00144.DeviceName": "Camera",
+                "/DISCOVERY/TXE00144.VideoChannelId": "2",
+                "/DISCOVERY/TXE00144.MacAddress": "00:11:AA:E0:01:44",
+                "/DISCOVERY/RXE8011D.DeviceName": "Projector",
+                "/DISCOVERY/RXE8011D.VideoChannelId": "1",
+            }
+        )
+        await self.server.start()
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=1)
+        self.cache = DiscoveryCache()
+
+    async def asyncTearDown(self):
+        await self.lw3.disconnect()
+        await self.server.stop()
+
+    async def test_refresh(self):
+        changes = []
+        self.cache.add_listener(lambda: changes.append(True))
+
+        self.assertTrue(await self.cache.async_refresh(self.lw3))
+        self.assertEqual(["Camera", "Laptop"], self.cache.sources.names)
+        self.assertEqual("Laptop", self.cache.sources.get_by_video_channel_id("1").name)
+        self.assertEqual({"00:11:aa:e0:01:43", "00:11:aa:e0:01:44"}, set(self.cache.encoders.keys()))
+        self.assertEqual(1, len(changes))
+
+        # Refreshing again right away is a no-op
+        self.server.commands.clear()
+        self.assertFalse(await self.cache.async_refresh(self.lw3))
+        self.assertEqual([], self.server.commands)
+
+    async def test_refresh_is_incremental(self):
+        await self.cache.async_refresh(self.lw3)
+
+        # Add one encoder and remove another
+        self.server.properties.update(
+            {
+                "/DISCOVERY/TXE00145.DeviceName": "Document camera",
+                "/DISCOVERY/TXE00145.VideoChannelId": "3",
+                "/DISCOVERY/TXE00145.MacAddress": "00:11:AA:E0:01:45",
+            }
+        )
+        for path in [path for path in self.server.properties if path.startswith("/DISCOVERY/TXE00144")]:
+            del self.server.properties[path]
+
+        self.server.commands.clear()
+        self.assertTrue(await self.cache.async_refresh(self.lw3, force=True))
+        self.assertEqual(["Document camera", "Laptop"], self.cache.sources.names)
+
+        # Only the new node was fetched
+        self.assertEqual(["GETALL /DISCOVERY", "GETALL /DISCOVERY/TXE00145"], self.server.commands)
+
+    async def test_refresh_large_installation(self):
+        self.server.properties = build_discovery_properties(50, 20)
+        self.server.fragment_size = 64
+
+        await self.cache.async_refresh(self.lw3, force=True)
+        self.assertEqual(50, len(self.cache.encoders))
+        self.assertEqual("Encoder 49", self.cache.sources.get_by_video_channel_id("50").name)
+
+    async def test_refresh_single_encoder(self):
+        self.server.properties = {
+            "/DISCOVERY/TXE00143.DeviceName": "Laptop",
+            "/DISCOVERY/TXE00143.VideoChannelId": "1",
+            "/DISCOVERY/TXE00143.MacAddress": "00:11:AA:E0:01:43",
+        }
+
+        self.assertTrue(await self.cache.async_refresh(self.lw3, force=True))
+        self.assertEqual(["Laptop"], self.cache.sources.names)
+
+    async def test_refresh_skips_bad_nodes(self):
+        await self.cache.async_refresh(self.lw3)
+
+        # One node lacks its properties, another one can't be read at all
+        self.server.properties.update({"/DISCOVERY/TXE00145.MacAddress": "00:11:AA:E0:01:45"})
+        get_all = self.server.get_all
+        self.server.get_all = lambda node: (
+            [f"nE {node} %E002:Not exists"] if node == "/DISCOVERY/TXE00144" else get_all(node)
+        )
+
+        # Refetch the known encoders too
+        with patch("custom_components.vinx.discovery.DISCOVERY_ENTRY_TTL", 0):
+            await self.cache.async_refresh(self.lw3, force=True)
+
+        # The unreadable encoder is kept as it was
+        self.assertEqual(["Camera", "Laptop"], self.cache.sources.names)
@@ -1,16 +1,27 @@
+import dataclasses
+
 from unittest import TestCase
 
 from custom_components.vinx.lw3 import (
     ErrorResponse,
+    Frame,
     MethodResponse,
     NodeResponse,
     PropertyResponse,
+    ResponseFramer,
     ResponseType,
+    StreamedLine,
+    SubscriptionResponse,
+    decode_hex,
+    get_node_properties,
     get_response_type,
     is_decoder_discovery_node,
     is_encoder_discovery_node,
+    iter_response,
+    parse_change_notification,
     parse_response,
     parse_single_line_response,
+    parse_streamed_property,
 )
 
 
@@ -20,18 +31,19 @@ class TestResponseParsing(TestCase):
         self.assertEqual(ResponseType.Property, get_response_type("pr /.ProductName=VINX"))
         self.assertEqual(ResponseType.Node, get_response_type("n- /SYS"))
         self.assertEqual(ResponseType.Method, get_response_type("m- reset()"))
+        self.assertEqual(ResponseType.Subscription, get_response_type("o- /MEDIA/VIDEO/I1"))
 
     def test_parse_single_line_response(self):
         raw_response = "n- /LOGIN"
         response = parse_single_line_response(raw_response)
         self.assertIsInstance(response, NodeResponse)
-        self.assertDictEqual({"prefix": "n-", "path": "/LOGIN"}, response.__dict__)
+        self.assertDictEqual({"prefix": "n-", "path": "/LOGIN"}, dataclasses.asdict(response))
 
         raw_response = "-E HURR %E001:Syntax error"
         response = parse_single_line_response(raw_response)
         self.assertIsInstance(response, ErrorResponse)
         self.assertDictEqual(
-            {"prefix": "-E", "path": "HURR", "code": "E001", "message": "Syntax error"}, response.__dict__
+            {"prefix": "-E", "path": "HURR", "code": "E001", "message": "Syntax error"}, dataclasses.asdict(response)
         )
 
         raw_response = "pr /.ProductName=VINX-110-HDMI-DEC"
@@ -43,7 +55,7 @@ class TestResponseParsing(TestCase):
                 "path": "/.ProductName",
                 "value": "VINX-110-HDMI-DEC",
             },
-            response.__dict__,
+            dataclasses.asdict(response),
         )
 
         raw_response = "m- /SYS:factoryDefaults"
@@ -55,9 +67,38 @@ class TestResponseParsing(TestCase):
                 "path": "/SYS",
                 "name": "factoryDefaults",
             },
-            response.__dict__,
+            dataclasses.asdict(response),
         )
 
+    def test_responses_are_compact(self):
+        first = parse_single_line_response("pr /.ProductName=VINX-110-HDMI-DEC")
+        second = parse_single_line_response("pr /.SerialNumber=E8013A")
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertIs(first.prefix, second.prefix)
+
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            first.value = "foo"
+
+    def test_parse_unknown_response(self):
+        with self.assertRaises(ValueError):
+            parse_single_line_response("x- /FOO")
+
+    def test_parse_malformed_error_response(self):
+        with self.assertRaises(ValueError):
+            parse_single_line_response("pE /BAD weird")
+
+    def test_parse_subscription_response(self):
+        response = parse_single_line_response("o- /MEDIA/VIDEO/I1")
+        self.assertIsInstance(response, SubscriptionResponse)
+        self.assertEqual("/MEDIA/VIDEO/I1", response.path)
+
+    def test_parse_change_notification(self):
+        change = parse_change_notification("CHG /MEDIA/VIDEO/I1.SignalPresent=1")
+        self.assertIsInstance(change, PropertyResponse)
+        self.assertEqual("/MEDIA/VIDEO/I1.SignalPresent", change.path)
+        self.assertEqual("1", change.value)
+        self.assertIsNone(parse_change_notification("pr /.ProductName=VINX"))
+
     def test_parse_response(self):
         raw_response = """{0000\r
 n- /LOGIN\r
@@ -76,6 +117,7 @@ pr /.CoreVersion=v3.2.2b1 r1\r
 }
 """
         response = parse_response(raw_response)
+        self.assertIsInstance(response, tuple)
         self.assertEqual(13, len(response))
 
         first = response[0]
@@ -88,6 +130,20 @@ pr /.CoreVersion=v3.2.2b1 r1\r
         self.assertEqual("/.CoreVersion", last.path)
         self.assertEqual("v3.2.2b1 r1", last.value)
 
+    def test_iter_response(self):
+        lines = iter_response("{0000\r\nn- /SYS\r\npr /.ProductName=VINX-110-HDMI-DEC\r\npr /.A=b=c\r\n}\r\n")
+        self.assertEqual(NodeResponse("n-", "/SYS"), next(lines))
+        self.assertEqual(PropertyResponse("pr", "/.ProductName", "VINX-110-HDMI-DEC"), next(lines))
+        self.assertEqual(PropertyResponse("pr", "/.A", "b=c"), next(lines))
+        self.assertIsNone(next(lines, None))
+
+    def test_get_node_properties(self):
+        response = parse_response("{0000\r\nn- /DISCOVERY/TXE00143/FOO\r\npr /DISCOVERY/TXE00143.DeviceName=Foo\r\n}")
+        self.assertEqual({"DeviceName": "Foo"}, get_node_properties(response))
+
+        response = parse_response("{0000\r\npr /DISCOVERY/TXE00143.VideoChannelId=3\r\n}")
+        self.assertEqual({"VideoChannelId": "3"}, get_node_properties(response))
+
 
 class TestDiscoveryNodes(TestCase):
     def test_is_discovery_node(self):
@@ -97,3 +153,70 @@ class TestDiscoveryNodes(TestCase):
         self.assertFalse(is_encoder_discovery_node(decoder_node))
         self.assertTrue(is_decoder_discovery_node(decoder_node))
         self.assertFalse(is_decoder_discovery_node(encoder_node))
+
+
+class TestResponseFramer(TestCase):
+    def test_feed_fragmented(self):
+        framer = ResponseFramer()
+        self.assertEqual([], framer.feed(b"{0000\r\npr /.Product"))
+        self.assertEqual([], framer.feed(b"Name=VINX-110-HDMI-DEC\r\n"))
+        self.assertEqual([], framer.feed(b"}"))
+
+        frames = framer.feed(b"\r\n")
+        self.assertEqual([Frame("0000", (PropertyResponse("pr", "/.ProductName", "VINX-110-HDMI-DEC"),))], frames)
+        self.assertEqual("VINX-110-HDMI-DEC", str(frames[0].response))
+
+    def test_feed_multiple_frames(self):
+        framer = ResponseFramer()
+        frames = framer.feed(b"{0001\r\npr /.A=1\r\n}\r\n{0002\r\npr /.B=}\r\npr /.C=2\r\n}\r\n{0003\r\n")
+        self.assertEqual(
+            [
+                Frame("0001", (PropertyResponse("pr", "/.A", "1"),)),
+                Frame("0002", (PropertyResponse("pr", "/.B", "}"), PropertyResponse("pr", "/.C", "2"))),
+            ],
+            frames,
+        )
+
+        # The leftover partial frame is completed by the next chunk
+        self.assertEqual([Frame("0003", (NodeResponse("n-", "/SYS"),))], framer.feed(b"n- /SYS\r\n}\r\n"))
+
+    def test_feed_unsolicited_lines(self):
+        framer = ResponseFramer()
+        frames = framer.feed(b"CHG /.A=2\r\n{0000\r\npr /.A=1\r\n}\r\n\r\nCHG /.A=3\r\n")
+        self.assertEqual(["CHG /.A=2", Frame("0000", (PropertyResponse("pr", "/.A", "1"),)), "CHG /.A=3"], frames)
+
+    def test_feed_malformed_lines(self):
+        framer = ResponseFramer()
+        with self.assertLogs("custom_components.vinx.lw3", "WARNING"):
+            frames = framer.feed(b"{0000\r\npE /BAD weird\r\npr /.A=1\r\n}\r\n")
+
+        self.assertEqual([Frame("0000", (PropertyResponse("pr", "/.A", "1"),))], frames)
+
+    def test_feed_streamed_frame(self):
+        framer = ResponseFramer()
+        framer.streamed_signatures.add("0001")
+        messages = framer.feed(
+            b"{0001\r\npr /EDID/U/U1.Edid=00FFFF\r\nn- /EDID/U/U1/X\r\n}\r\n{0002\r\npr /.A=1\r\n}\r\n"
+        )
+
+        self.assertEqual(
+            [
+                StreamedLine("0001", bytearray(b"pr /EDID/U/U1.Edid=00FFFF")),
+                StreamedLine("0001", bytearray(b"n- /EDID/U/U1/X")),
+                Frame("0001", ()),
+                Frame("0002", (PropertyResponse("pr", "/.A", "1"),)),
+            ],
+            messages,
+        )
+
+        path, value = parse_streamed_property(messages[0].line)
+        self.assertEqual("/EDID/U/U1.Edid", path)
+        self.assertEqual(b"\x00\xff\xff", decode_hex(value))
+        self.assertIsNone(parse_streamed_property(messages[1].line))
+
+        with self.assertRaises(ValueError):
+            parse_streamed_property(bytearray(b"nE /EDID/X %E002:Not exists"))
+
+    def test_decode_hex(self):
+        self.assertEqual(b"\x00\xff\x10", decode_hex(b"00FF10"))
+        self.assertEqual(b"\x00\xff\x10", decode_hex(memoryview(b"00 FF 10")))
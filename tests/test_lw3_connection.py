@@ -0,0 +1,438 @@
+import asyncio
+import socket
+
+from contextlib import aclosing
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from custom_components.vinx.lw3 import KEEPALIVE_IDLE, LW3, decode_hex, raise_for_errors
+from tests.fake_lw3_server import FakeLW3Server
+
+
+class TestPersistentConnection(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeLW3Server(
+            {
+                "/.ProductName": "VINX-110-HDMI-ENC",
+                "/SYS/MB.DeviceLabel": "Encoder",
+                "/MEDIA/VIDEO/I1.SignalPresent": "0",
+            }
+        )
+        await self.server.start()
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=1)
+
+    async def asyncTearDown(self):
+        await self.lw3.disconnect()
+        await self.server.stop()
+
+    async def test_connects_lazily_and_reuses_connection(self):
+        self.assertFalse(self.lw3.is_connected)
+        self.assertEqual("VINX-110-HDMI-ENC", str(await self.lw3.get_property("/.ProductName")))
+        self.assertEqual("Encoder", str(await self.lw3.get_property("/SYS/MB.DeviceLabel")))
+        self.assertTrue(self.lw3.is_connected)
+        self.assertEqual(1, self.server.connection_count)
+
+    async def test_concurrent_callers_share_connection(self):
+        results = await asyncio.gather(*[self.lw3.get_property("/.ProductName") for _ in range(10)])
+        self.assertEqual(["VINX-110-HDMI-ENC"] * 10, [str(result) for result in results])
+        self.assertEqual(1, self.server.connection_count)
+
+    async def test_commands_are_pipelined(self):
+        self.server.latency = 0.05
+        results = await asyncio.gather(
+            self.lw3.get_property("/.ProductName"),
+            self.lw3.get_property("/SYS/MB.DeviceLabel"),
+            self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent"),
+        )
+        self.assertEqual(["VINX-110-HDMI-ENC", "Encoder", "0"], [str(result) for result in results])
+        self.assertEqual(3, len(self.server.commands))
+
+    async def test_get_properties(self):
+        results = await self.lw3.get_properties(["/.ProductName", "/.Nonexistent", "/SYS/MB.DeviceLabel"])
+        self.assertEqual(["/.ProductName", "/.Nonexistent", "/SYS/MB.DeviceLabel"], list(results.keys()))
+        self.assertEqual("VINX-110-HDMI-ENC", str(results["/.ProductName"]))
+        self.assertIsInstance(results["/.Nonexistent"], ValueError)
+        self.assertEqual("Encoder", str(results["/SYS/MB.DeviceLabel"]))
+
+        with self.assertRaises(ValueError):
+            raise_for_errors(results)
+
+    async def test_read_properties(self):
+        self.server.properties["/MEDIA/VIDEO/I1.Resolution"] = "1920x1080p60"
+        results = await self.lw3.read_properties(
+            [
+                "/MEDIA/VIDEO/I1.SignalPresent",
+                "/MEDIA/VIDEO/I1.Resolution",
+                "/MEDIA/VIDEO/I1.Nonexistent",
+                "/SYS/MB.DeviceLabel",
+            ]
+        )
+
+        # The properties of the shared node are read with one GETALL, the remaining one with a GET
+        self.assertEqual(["GET /SYS/MB.DeviceLabel", "GETALL /MEDIA/VIDEO/I1"], sorted(self.server.commands))
+        self.assertEqual("0", str(results["/MEDIA/VIDEO/I1.SignalPresent"]))
+        self.assertEqual("1920x1080p60", str(results["/MEDIA/VIDEO/I1.Resolution"]))
+        self.assertIsInstance(results["/MEDIA/VIDEO/I1.Nonexistent"], ValueError)
+        self.assertEqual("Encoder", str(results["/SYS/MB.DeviceLabel"]))
+
+    async def test_read_properties_of_missing_node(self):
+        results = await self.lw3.read_properties(["/MEDIA/VIDEO/O1.Connected", "/MEDIA/VIDEO/O1.SignalPresent"])
+        self.assertIsInstance(results["/MEDIA/VIDEO/O1.Connected"], ValueError)
+        self.assertIsInstance(results["/MEDIA/VIDEO/O1.SignalPresent"], ValueError)
+
+    async def test_identical_reads_are_coalesced(self):
+        self.server.latency = 0.05
+        results = await asyncio.gather(
+            *[self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent") for _ in range(5)],
+            *[self.lw3.get_all("/SYS/MB") for _ in range(3)],
+        )
+        self.assertEqual(["0"] * 5, [str(result) for result in results[:5]])
+        self.assertEqual(["GET /MEDIA/VIDEO/I1.SignalPresent", "GETALL /SYS/MB"], sorted(self.server.commands))
+        self.assertEqual(6, self.lw3.coalesced_reads)
+
+        # Reads after the shared request has completed go to the device again
+        await self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent")
+        self.assertEqual(3, len(self.server.commands))
+
+    async def test_coalesced_reads_survive_cancellation(self):
+        self.server.latency = 0.05
+        first, second, third = [
+            asyncio.create_task(self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent")) for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+
+        # Neither the caller that sent the read nor another one giving up affects the remaining caller
+        first.cancel()
+        second.cancel()
+        self.assertEqual("0", str(await third))
+        self.assertTrue(first.cancelled() and second.cancelled())
+
+        # Errors are shared as well
+        results = await asyncio.gather(
+            *[self.lw3.get_property("/.Nonexistent") for _ in range(2)], return_exceptions=True
+        )
+        self.assertEqual([ValueError, ValueError], [type(result) for result in results])
+
+    async def test_reads_after_a_write_are_not_coalesced_with_earlier_ones(self):
+        self.server.latency = 0.05
+        read_before = asyncio.create_task(self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent"))
+        await asyncio.sleep(0)
+        write = asyncio.create_task(self.lw3.set_property("/MEDIA/VIDEO/I1.SignalPresent", "1"))
+        await asyncio.sleep(0)
+        read_after = asyncio.create_task(self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent"))
+
+        await asyncio.gather(read_before, write, read_after)
+        self.assertEqual("1", str(read_after.result()))
+        self.assertEqual(0, self.lw3.coalesced_reads)
+
+    async def test_stream_all(self):
+        edids = {f"/EDID/U.U{i}": (bytes([i]) * 256).hex().upper() for i in range(1, 201)}
+        self.server.properties.update(edids)
+
+        received = {}
+        async for path, value in self.lw3.stream_all("/EDID/U"):
+            received[path] = decode_hex(value)
+
+        self.assertEqual({path: bytes.fromhex(value) for path, value in edids.items()}, received)
+
+        # A stream that is abandoned halfway is stopped right away and doesn't disturb later commands
+        async with aclosing(self.lw3.stream_all("/EDID/U")) as stream:
+            async for _ in stream:
+                break
+        self.assertEqual({}, self.lw3._streams)
+        self.assertEqual(set(), self.lw3._framer.streamed_signatures)
+        self.assertEqual("Encoder", str(await self.lw3.get_property("/SYS/MB.DeviceLabel")))
+        self.assertEqual(1, self.server.connection_count)
+
+        # So is one that times out, and the late response is dropped
+        self.lw3._timeout = 0.05
+        self.server.latency = 0.1
+        with self.assertRaises(TimeoutError):
+            async for _ in self.lw3.stream_all("/EDID/U"):
+                pass
+        self.assertEqual({}, self.lw3._streams)
+        self.assertEqual(set(), self.lw3._framer.streamed_signatures)
+
+        await asyncio.sleep(0.1)
+        self.server.latency = 0
+        self.assertEqual("Encoder", str(await self.lw3.get_property("/SYS/MB.DeviceLabel")))
+        self.assertEqual(1, self.server.connection_count)
+
+        with self.assertRaises(ValueError):
+            async for _ in self.lw3.stream_all("/EDID/X"):
+                pass
+
+    async def test_read_while_streaming(self):
+        self.server.properties.update({f"/EDID/U.U{i}": (bytes([i]) * 256).hex().upper() for i in range(1, 201)})
+
+        # Other responses on the connection aren't held up by a stream whose consumer is waiting for them
+        labels = set()
+        async for _ in self.lw3.stream_all("/EDID/U"):
+            labels.add(str(await self.lw3.get_property("/SYS/MB.DeviceLabel")))
+        self.assertEqual({"Encoder"}, labels)
+
+        # A consumer that falls too far behind has its stream aborted instead
+        with patch("custom_components.vinx.lw3.STREAM_BUFFER_SIZE", 4096):
+            with self.assertRaises(BufferError):
+                async for _ in self.lw3.stream_all("/EDID/U"):
+                    await self.lw3.get_property("/SYS/MB.DeviceLabel")
+
+        self.assertEqual("Encoder", str(await self.lw3.get_property("/SYS/MB.DeviceLabel")))
+        self.assertEqual(1, self.server.connection_count)
+
+    async def test_late_response_is_discarded_after_timeout(self):
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=0.05)
+        self.server.latency = 0.1
+
+        with self.assertRaises(TimeoutError):
+            await self.lw3.get_property("/.ProductName")
+
+        # The connection remains usable and the late response isn't mistaken for the next one
+        await asyncio.sleep(0.1)
+        self.server.latency = 0
+        self.assertEqual("Encoder", str(await self.lw3.get_property("/SYS/MB.DeviceLabel")))
+        self.assertEqual(1, self.server.connection_count)
+
+    async def test_reconnects_after_consecutive_timeouts(self):
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=0.05)
+        await self.lw3.get_property("/.ProductName")
+        self.server.latency = 0.1
+
+        # The device stops responding, the connection is only given up after several timeouts in a row
+        for _ in range(3):
+            self.assertTrue(self.lw3.is_connected)
+            with self.assertRaises(TimeoutError):
+                await self.lw3.get_property("/.ProductName")
+
+        self.assertFalse(self.lw3.is_connected)
+
+        self.server.latency = 0
+        self.assertEqual("VINX-110-HDMI-ENC", str(await self.lw3.get_property("/.ProductName")))
+        self.assertEqual(2, self.server.connection_count)
+
+    async def test_keepalive(self):
+        await self.lw3.get_property("/.ProductName")
+
+        sock = self.lw3._writer.get_extra_info("socket")
+        self.assertEqual(1, sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE))
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            self.assertEqual(KEEPALIVE_IDLE, sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE))
+
+    async def test_reconnects_after_connection_loss(self):
+        await self.lw3.get_property("/.ProductName")
+        self.server.drop_connections()
+
+        # The first command after the drop may or may not notice the lost connection before sending
+        try:
+            await self.lw3.get_property("/.ProductName")
+        except (EOFError, ConnectionError):
+            pass
+
+        self.assertEqual("VINX-110-HDMI-ENC", str(await self.lw3.get_property("/.ProductName")))
+        self.assertEqual(2, self.server.connection_count)
+
+    async def test_backs_off_after_failed_connection(self):
+        port = self.server.port
+        await self.server.stop()
+        lw3 = LW3("127.0.0.1", port, timeout=1)
+
+        with patch("custom_components.vinx.lw3.random.uniform", return_value=30):
+            with self.assertRaises(ConnectionError):
+                await lw3.get_property("/.ProductName")
+
+            # Subsequent attempts fail fast without trying to connect
+            with self.assertRaisesRegex(ConnectionError, "Not reconnecting"):
+                await lw3.get_property("/.ProductName")
+
+    async def test_fragmented_responses(self):
+        self.server.fragment_size = 3
+        results = await asyncio.gather(self.lw3.get_property("/.ProductName"), self.lw3.get_all("/SYS/MB"))
+        self.assertEqual("VINX-110-HDMI-ENC", str(results[0]))
+        self.assertEqual("Encoder", results[1].value)
+
+    async def test_dropped_connections(self):
+        self.server.drop_after = 2
+        results = []
+
+        for _ in range(6):
+            try:
+                results.append(str(await self.lw3.get_property("/.ProductName")))
+            except (EOFError, ConnectionError):
+                pass
+
+        self.assertIn("VINX-110-HDMI-ENC", results)
+        self.assertLess(1, self.server.connection_count)
+
+    async def test_recovers_from_unexpected_errors(self):
+        await self.lw3.get_property("/.ProductName")
+
+        # Anything going wrong while handling received data drops the connection, instead of leaving it unread
+        with patch("custom_components.vinx.lw3.parse_change_notification", side_effect=RuntimeError("Garbage")):
+            with self.assertLogs("custom_components.vinx.lw3", "ERROR"):
+                self.server.send(b"\x00\xffgarbage\r\n")
+                for _ in range(100):
+                    if not self.lw3.is_connected:
+                        break
+                    await asyncio.sleep(0.01)
+
+        self.assertFalse(self.lw3.is_connected)
+        self.assertEqual("VINX-110-HDMI-ENC", str(await self.lw3.get_property("/.ProductName")))
+        self.assertEqual(2, self.server.connection_count)
+
+    async def test_connection_state(self):
+        await self.lw3.subscribe("/MEDIA/VIDEO/I1", lambda change: None)
+        state = self.lw3.get_connection_state()
+        self.assertTrue(state["connected"])
+        self.assertEqual(["/MEDIA/VIDEO/I1"], state["subscriptions"])
+        self.assertEqual(0, state["pending_commands"])
+
+    async def test_connection_context(self):
+        async with self.lw3.connection():
+            self.assertTrue(self.lw3.is_connected)
+            await self.lw3.get_property("/.ProductName")
+
+        self.assertFalse(self.lw3.is_connected)
+
+    async def test_connection_context_reuses_connection(self):
+        await self.lw3.get_property("/.ProductName")
+
+        async with self.lw3.connection():
+            async with self.lw3.connection():
+                await self.lw3.get_property("/.ProductName")
+
+            # Only the outermost context closes the connection
+            self.assertTrue(self.lw3.is_connected)
+
+        self.assertFalse(self.lw3.is_connected)
+        self.assertEqual(1, self.server.connection_count)
+
+
+class TestReadCache(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeLW3Server({"/.ProductName": "VINX-110-HDMI-ENC", "/MEDIA/VIDEO/I1.SignalPresent": "0"})
+        await self.server.start()
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=1, cache_ttl=60)
+
+    async def asyncTearDown(self):
+        await self.lw3.disconnect()
+        await self.server.stop()
+
+    async def test_reads_are_cached(self):
+        for _ in range(3):
+            self.assertEqual("VINX-110-HDMI-ENC", str(await self.lw3.get_property("/.ProductName")))
+            await self.lw3.get_all("/MEDIA/VIDEO/I1")
+
+        self.assertEqual(2, len(self.server.commands))
+        self.assertEqual({"ttl": 60, "entries": 2, "hits": 4, "misses": 2}, self.lw3.cache.as_dict())
+
+    async def test_writes_invalidate(self):
+        await self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent")
+        await self.lw3.get_all("/MEDIA/VIDEO/I1")
+        await self.lw3.set_property("/MEDIA/VIDEO/I1.SignalPresent", "1")
+
+        self.assertEqual("1", str(await self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent")))
+        self.assertEqual("1", (await self.lw3.get_all("/MEDIA/VIDEO/I1")).value)
+        self.assertEqual(5, len(self.server.commands))
+
+    async def test_change_notifications_invalidate(self):
+        await self.lw3.subscribe("/MEDIA/VIDEO/I1", lambda change: None)
+        await self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent")
+        self.server.change_property("/MEDIA/VIDEO/I1.SignalPresent", "1")
+
+        # The notification is sent before the response to the next command
+        await self.lw3.get_property("/.ProductName")
+        self.assertEqual("1", str(await self.lw3.get_property("/MEDIA/VIDEO/I1.SignalPresent")))
+
+
+class TestSubscriptions(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeLW3Server({"/.ProductName": "VINX-110-HDMI-ENC", "/MEDIA/VIDEO/I1.SignalPresent": "0"})
+        await self.server.start()
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=1)
+        self.changes = asyncio.Queue()
+
+    async def asyncTearDown(self):
+        await self.lw3.disconnect()
+        await self.server.stop()
+
+    async def test_change_notifications_are_dispatched(self):
+        unsubscribe = await self.lw3.subscribe("/MEDIA/VIDEO/I1", self.changes.put_nowait)
+        self.assertEqual(["OPEN /MEDIA/VIDEO/I1"], self.server.commands)
+
+        self.server.change_property("/MEDIA/VIDEO/I1.SignalPresent", "1")
+        change = await asyncio.wait_for(self.changes.get(), 1)
+        self.assertEqual("/MEDIA/VIDEO/I1.SignalPresent", change.path)
+        self.assertEqual("1", change.value)
+
+        # Commands keep working while notifications are interleaved with responses
+        self.server.change_property("/MEDIA/VIDEO/I1.SignalPresent", "0")
+        self.assertEqual("VINX-110-HDMI-ENC", str(await self.lw3.get_property("/.ProductName")))
+        self.assertEqual("0", (await asyncio.wait_for(self.changes.get(), 1)).value)
+
+        unsubscribe()
+        self.server.change_property("/MEDIA/VIDEO/I1.SignalPresent", "1")
+        await self.lw3.get_property("/.ProductName")
+        self.assertTrue(self.changes.empty())
+
+    async def test_concurrent_subscriptions_while_connecting(self):
+        connection_states = []
+        self.lw3.add_connection_listener(connection_states.append)
+        self.server.latency = 0.05
+
+        # Subscribe to more nodes while the first subscription is still being restored on the new connection
+        first = asyncio.create_task(self.lw3.subscribe("/MEDIA/VIDEO/I1", self.changes.put_nowait))
+        while not self.lw3.is_connected:
+            await asyncio.sleep(0)
+        await asyncio.gather(
+            *[self.lw3.subscribe(node, self.changes.put_nowait) for node in ("/A", "/B", "/MEDIA/VIDEO/I1")]
+        )
+        await first
+
+        self.assertEqual([True], connection_states)
+        self.assertEqual(["OPEN /A", "OPEN /B", "OPEN /MEDIA/VIDEO/I1"], sorted(self.server.commands))
+
+        self.server.change_property("/MEDIA/VIDEO/I1.SignalPresent", "1")
+        self.assertEqual("1", (await asyncio.wait_for(self.changes.get(), 1)).value)
+
+    async def test_missing_nodes_can_be_subscribed_to(self):
+        await self.lw3.subscribe("/MEDIA/VIDEO/O1", self.changes.put_nowait)
+        await self.lw3.subscribe("/MEDIA/VIDEO/I1", self.changes.put_nowait)
+
+        # Reconnecting isn't prevented by the missing node either
+        with patch("custom_components.vinx.lw3.random.uniform", return_value=0):
+            self.server.drop_connections()
+            # Subscriptions are restored after the connection is up, so wait for them rather than for the connection
+            while self.server.commands.count("OPEN /MEDIA/VIDEO/I1") < 2:
+                await asyncio.sleep(0.01)
+
+        self.assertEqual("VINX-110-HDMI-ENC", str(await self.lw3.get_property("/.ProductName")))
+        self.server.change_property("/MEDIA/VIDEO/I1.SignalPresent", "1")
+        self.assertEqual("1", (await asyncio.wait_for(self.changes.get(), 1)).value)
+
+    async def test_disconnect_drops_subscriptions(self):
+        await self.lw3.subscribe("/MEDIA/VIDEO/I1", self.changes.put_nowait)
+        await self.lw3.disconnect()
+        await asyncio.sleep(0.05)
+
+        # Nothing reconnects in the background
+        self.assertEqual([], self.lw3.get_connection_state()["subscriptions"])
+        self.assertFalse(self.lw3.is_connected)
+        self.assertEqual(1, self.server.connection_count)
+
+    async def test_subscriptions_are_restored_after_reconnect(self):
+        connection_states = []
+        self.lw3.add_connection_listener(connection_states.append)
+        await self.lw3.subscribe("/MEDIA/VIDEO/I1", self.changes.put_nowait)
+
+        with patch("custom_components.vinx.lw3.random.uniform", return_value=0):
+            self.server.drop_connections()
+
+            # The client reconnects on its own since there's an active subscription
+            while len(connection_states) < 3:
+                await asyncio.sleep(0.01)
+
+        self.assertEqual([True, False, True], connection_states)
+        self.assertEqual(["OPEN /MEDIA/VIDEO/I1", "OPEN /MEDIA/VIDEO/I1"], self.server.commands)
+
+        self.server.change_property("/MEDIA/VIDEO/I1.SignalPresent", "1")
+        self.assertEqual("1", (await asyncio.wait_for(self.changes.get(), 1)).value)
@@ -0,0 +1,91 @@
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from custom_components.vinx.lw3 import LW3
+from custom_components.vinx.metrics import LatencyHistogram, LW3Metrics
+from tests.fake_lw3_server import FakeLW3Server
+
+
+class TestLatencyHistogram(TestCase):
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+
+        for _ in range(98):
+            histogram.observe(0.003)
+        histogram.observe(0.2)
+        histogram.observe(30)
+
+        self.assertEqual(0.005, histogram.percentile(50))
+        self.assertEqual(0.25, histogram.percentile(99))
+        self.assertEqual(30, histogram.percentile(100))
+        self.assertEqual(1, histogram.counts[-1])
+
+    def test_merge(self):
+        first = LatencyHistogram()
+        first.observe(0.003)
+        second = LatencyHistogram()
+        second.observe(0.2)
+        first.merge(second)
+
+        self.assertEqual(2, first.count)
+        self.assertEqual(0.2, first.maximum)
+
+
+class TestLW3Metrics(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeLW3Server({"/.ProductName": "VINX-110-HDMI-ENC", "/MEDIA/VIDEO/I1.SignalPresent": "0"})
+        await self.server.start()
+        self.metrics = LW3Metrics()
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=0.1, metrics=self.metrics)
+
+    async def asyncTearDown(self):
+        await self.lw3.disconnect()
+        await self.server.stop()
+
+    async def test_commands_are_measured(self):
+        samples = []
+        self.metrics.add_hook(lambda command_type, duration, error: samples.append((command_type, error)))
+
+        await self.lw3.get_properties(["/.ProductName", "/.Nonexistent"])
+        await self.lw3.get_all("/")
+
+        self.server.latency = 0.2
+        with self.assertRaises(TimeoutError):
+            await self.lw3.set_property("/MEDIA/VIDEO/I1.SignalPresent", "1")
+
+        self.assertEqual(2, self.metrics.commands["GET"].latency.count)
+        self.assertEqual(1, self.metrics.commands["GET"].errors)
+        self.assertEqual(1, self.metrics.commands["GETALL"].latency.count)
+        self.assertEqual(1, self.metrics.commands["SET"].timeouts)
+        self.assertEqual(0, self.metrics.commands["SET"].latency.count)
+        self.assertEqual(4, self.metrics.command_count)
+        self.assertEqual(0, self.metrics.in_flight)
+        self.assertEqual(2, self.metrics.max_in_flight)
+        self.assertEqual(1, self.metrics.connects)
+        self.assertLess(0, self.metrics.bytes_read)
+
+        self.assertEqual(["GET", "GET", "GETALL", "SET"], sorted(command_type for command_type, _ in samples))
+        self.assertIsInstance(samples[-1][1], TimeoutError)
+        self.assertEqual(
+            ("SET", "TimeoutError"), (self.metrics.recent_commands[-1][0], self.metrics.recent_commands[-1][3])
+        )
+
+    async def test_connection_events_are_counted(self):
+        await self.lw3.get_property("/.ProductName")
+        self.server.drop_connections()
+
+        try:
+            await self.lw3.get_property("/.ProductName")
+        except (EOFError, ConnectionError):
+            pass
+
+        await self.lw3.get_property("/.ProductName")
+        self.assertEqual(2, self.metrics.connects)
+        self.assertEqual(1, self.metrics.reconnects)
+        self.assertEqual(1, self.metrics.disconnects)
+
+    async def test_metrics_are_optional(self):
+        lw3 = LW3("127.0.0.1", self.server.port)
+        self.assertIsNone(lw3.metrics)
+        self.assertEqual("VINX-110-HDMI-ENC", str(await lw3.get_property("/.ProductName")))
+        await lw3.disconnect()
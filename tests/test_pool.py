@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from unittest import IsolatedAsyncioTestCase
+
+from custom_components.vinx.lw3 import RateLimiter
+from custom_components.vinx.pool import LW3Pool
+from tests.fake_lw3_server import FakeLW3Server
+
+
+class TestLW3Pool(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeLW3Server({"/.ProductName": "VINX-110-HDMI-ENC", "/SYS/MB.DeviceLabel": "Encoder"})
+        await self.server.start()
+        self.pool = LW3Pool()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    async def test_sessions_are_shared(self):
+        lw3 = self.pool.acquire("127.0.0.1", self.server.port)
+        await lw3.get_property("/.ProductName")
+
+        # A flow probing the same device while its entry is loaded uses the same connection
+        async with self.pool.session("127.0.0.1", self.server.port) as other:
+            self.assertIs(lw3, other)
+            await other.get_property("/SYS/MB.DeviceLabel")
+
+        self.assertTrue(lw3.is_connected)
+        self.assertEqual(1, self.server.connection_count)
+
+        await self.pool.release(lw3)
+        self.assertFalse(lw3.is_connected)
+        self.assertEqual(0, len(self.pool))
+
+    async def test_requests_are_rate_limited(self):
+        self.pool = LW3Pool(rate_limit=50, rate_limit_burst=5)
+
+        async with self.pool.session("127.0.0.1", self.server.port) as lw3:
+            start = time.monotonic()
+            await lw3.get_properties([f"/.Property{i}" for i in range(10)])
+            elapsed = time.monotonic() - start
+
+        # The first five are sent at once, the rest at 50 per second
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertEqual(10, len(self.server.commands))
+
+
+class TestRateLimiter(IsolatedAsyncioTestCase):
+    async def test_waiting_callers_are_served_in_order(self):
+        rate_limiter = RateLimiter(100, 1)
+        order = []
+
+        async def caller(i: int):
+            await rate_limiter.acquire()
+            order.append(i)
+
+        await asyncio.gather(*[caller(i) for i in range(5)])
+
+        self.assertEqual([0, 1, 2, 3, 4], order)
+        self.assertEqual(4, rate_limiter.delayed)
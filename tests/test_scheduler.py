@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+from custom_components.vinx.const import MAX_SCAN_INTERVAL
+from custom_components.vinx.scheduler import (
+    FAST_POLL_DURATION,
+    FAST_SCAN_INTERVAL,
+    STABLE_PERIOD,
+    PollMode,
+    PollScheduler,
+)
+
+
+class TestPollScheduler(TestCase):
+    def setUp(self):
+        self.scheduler = PollScheduler()
+        for i in range(10):
+            self.scheduler.register(f"device{i}", f"Device {i}", 30, now=0)
+
+    def test_polls_are_staggered(self):
+        next_polls = sorted(100 + self.scheduler.next_interval(f"device{i}", True, now=100) for i in range(10))
+
+        # Each device gets its own slot within the interval, no two devices are polled within a second of each other
+        self.assertTrue(all(115 <= next_poll < 145 for next_poll in next_polls))
+        self.assertTrue(all(b - a >= 1 for a, b in zip(next_polls, next_polls[1:])))
+
+        # Devices keep their slot from one poll to the next
+        first_poll = 100 + self.scheduler.next_interval("device3", True, now=100)
+        second_poll = first_poll + self.scheduler.next_interval("device3", True, now=first_poll)
+        self.assertAlmostEqual(30, second_poll - first_poll)
+
+    def test_fast_polling_after_source_change(self):
+        self.assertFalse(self.scheduler.record_change("device0", "/MEDIA/VIDEO/I1.Resolution", now=100))
+        self.assertTrue(self.scheduler.record_change("device0", "/SYS/MB/PHY.VideoChannelId", now=100))
+
+        self.assertEqual(FAST_SCAN_INTERVAL, self.scheduler.next_interval("device0", True, now=101))
+        self.assertEqual(PollMode.FAST, self.scheduler._devices["device0"].mode)
+
+        self.scheduler.next_interval("device0", True, now=101 + FAST_POLL_DURATION)
+        self.assertEqual(PollMode.NORMAL, self.scheduler._devices["device0"].mode)
+
+    def test_stable_devices_are_polled_less_often(self):
+        self.scheduler.next_interval("device0", True, now=STABLE_PERIOD + 1)
+        self.assertEqual(PollMode.STABLE, self.scheduler._devices["device0"].mode)
+        self.assertEqual(60, self.scheduler._devices["device0"].interval)
+
+        self.scheduler.next_interval("device0", True, now=10 * STABLE_PERIOD)
+        self.assertEqual(120, self.scheduler._devices["device0"].interval)
+
+    def test_offline_devices_back_off(self):
+        intervals = []
+        for _ in range(6):
+            self.scheduler.next_interval("device0", False, now=0)
+            intervals.append(self.scheduler._devices["device0"].interval)
+
+        self.assertEqual([60, 120, 240, MAX_SCAN_INTERVAL, MAX_SCAN_INTERVAL, MAX_SCAN_INTERVAL], intervals)
+
+        self.scheduler.next_interval("device0", True, now=0)
+        self.assertEqual(30, self.scheduler._devices["device0"].interval)
+
+    def test_budget(self):
+        self.assertEqual(20, self.scheduler.budget)
+
+        self.scheduler.record_change("device0", "/MEDIA/VIDEO/I1.SignalPresent", now=0)
+        self.scheduler.next_interval("device0", True, now=0)
+        state = self.scheduler.get_state("device0")
+        self.assertEqual({"mode": "fast", "interval": 5, "failures": 0}, state["device"])
+        self.assertEqual(30, state["polls_per_minute"])
+
+        self.scheduler.unregister("device0")
+        self.assertEqual(18, self.scheduler.budget)
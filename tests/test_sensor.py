@@ -0,0 +1,76 @@
+import asyncio
+
+from datetime import timedelta
+
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.helpers import entity_platform, entity_registry as er
+from homeassistant.helpers.entity_component import async_update_entity
+
+from custom_components.vinx.const import CONF_ENABLE_METRICS, DOMAIN
+from tests.fake_lw3_server import FakeLW3Server
+from tests.home_assistant import HomeAssistantTestCase
+from tests.test_config_flow import build_device_properties
+
+
+class TestSensor(HomeAssistantTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.server = FakeLW3Server(
+            {
+                **build_device_properties(0),
+                "/MEDIA/VIDEO/I1.Resolution": "1920x1080p60",
+                "/MANAGEMENT/STATUS.Temperature": "41.5",
+            }
+        )
+        await self.server.start()
+
+        self.entry = await self.async_add_device(self.server.port)
+        await self.entry.runtime_data.coordinator.async_refresh()
+        await self.hass.async_block_till_done()
+
+    async def asyncTearDown(self):
+        await super().asyncTearDown()
+        await self.server.stop()
+
+    def _get_state(self, key: str) -> str:
+        entity_id = er.async_get(self.hass).async_get_entity_id("sensor", DOMAIN, f"vinx_00:11:AA:00:00:00_{key}")
+
+        return self.hass.states.get(entity_id).state
+
+    async def test_states_come_from_the_watched_properties(self):
+        self.assertEqual("1920x1080p60", self._get_state("video_resolution"))
+        self.assertEqual("41.5", self._get_state("temperature"))
+
+        self.server.change_property("/MEDIA/VIDEO/I1.Resolution", "3840x2160p30")
+        await asyncio.sleep(0.05)
+        self.assertEqual("3840x2160p30", self._get_state("video_resolution"))
+
+        # Properties the device doesn't report make their sensor unavailable
+        del self.server.properties["/MANAGEMENT/STATUS.Temperature"]
+        await self.entry.runtime_data.coordinator.async_refresh()
+        await self.hass.async_block_till_done()
+        self.assertEqual(STATE_UNAVAILABLE, self._get_state("temperature"))
+
+    async def test_metrics_sensors_are_polled(self):
+        # Metrics sensors only exist when metrics are enabled
+        self.assertIsNone(
+            er.async_get(self.hass).async_get_entity_id("sensor", DOMAIN, "vinx_00:11:AA:00:00:00_commands")
+        )
+
+        self.hass.config_entries.async_update_entry(self.entry, options={CONF_ENABLE_METRICS: True})
+        self.assertTrue(await self.hass.config_entries.async_reload(self.entry.entry_id))
+        await self.hass.async_block_till_done()
+
+        platform = next(
+            platform
+            for platform in entity_platform.async_get_platforms(self.hass, DOMAIN)
+            if platform.domain == "sensor"
+        )
+        self.assertEqual(timedelta(seconds=30), platform.scan_interval)
+
+        metrics = self.entry.runtime_data.lw3.metrics
+        await self.entry.runtime_data.lw3.get_property("/.ProductName")
+        entity_id = er.async_get(self.hass).async_get_entity_id("sensor", DOMAIN, "vinx_00:11:AA:00:00:00_commands")
+        await async_update_entity(self.hass, entity_id)
+
+        self.assertEqual(str(metrics.command_count), self.hass.states.get(entity_id).state)
@@ -0,0 +1,195 @@
+import time
+
+from unittest import IsolatedAsyncioTestCase
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.vinx.const import DOMAIN
+from custom_components.vinx.lw3 import LW3
+from custom_components.vinx.services import (
+    AUDIT_TIMEOUT,
+    SERVICE_ROUTE,
+    AuditTarget,
+    async_audit_devices,
+    async_route_decoders,
+    find_audit_outliers,
+)
+from tests.fake_lw3_server import FakeLW3Server, build_discovery_properties
+from tests.home_assistant import HomeAssistantTestCase
+from tests.test_config_flow import build_device_properties
+
+
+class TestRoute(HomeAssistantTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.decoder = FakeLW3Server(
+            {**build_device_properties(0), **build_discovery_properties(3), "/SYS/MB/PHY.VideoChannelId": "1"}
+        )
+        self.encoder = FakeLW3Server({**build_device_properties(1), "/.ProductName": "VINX-110-HDMI-ENC"})
+        for server in (self.decoder, self.encoder):
+            await server.start()
+
+        self.decoder_entity_id = self._get_media_player(await self.async_add_device(self.decoder.port))
+        self.encoder_entity_id = self._get_media_player(await self.async_add_device(self.encoder.port))
+
+    async def asyncTearDown(self):
+        await super().asyncTearDown()
+        for server in (self.decoder, self.encoder):
+            await server.stop()
+
+    def _get_media_player(self, entry) -> str:
+        entity_entries = er.async_entries_for_config_entry(er.async_get(self.hass), entry.entry_id)
+
+        return next(entity.entity_id for entity in entity_entries if entity.domain == "media_player")
+
+    async def test_route_by_name_mac_address_and_video_channel_id(self):
+        for source, video_channel_id in (("Encoder 1", "2"), ("00:11:AA:00:00:02", "3"), ("1", "1")):
+            results = await async_route_decoders(self.hass, {self.decoder_entity_id: source})
+
+            self.assertEqual(
+                {
+                    "success": True,
+                    "source": f"Encoder {int(video_channel_id) - 1}",
+                    "video_channel_id": video_channel_id,
+                },
+                results[self.decoder_entity_id],
+            )
+            self.assertEqual(video_channel_id, self.decoder.properties["/SYS/MB/PHY.VideoChannelId"])
+
+    async def test_route_failures(self):
+        results = await async_route_decoders(
+            self.hass,
+            {
+                self.decoder_entity_id: "Nonexistent",
+                self.encoder_entity_id: "Encoder 1",
+                "media_player.other": "Encoder 1",
+            },
+        )
+
+        self.assertEqual(
+            {
+                self.decoder_entity_id: "Unknown source Nonexistent",
+                self.encoder_entity_id: "Not a decoder",
+                "media_player.other": "Not a VINX entity",
+            },
+            {entity_id: result["error"] for entity_id, result in results.items()},
+        )
+        self.assertEqual("1", self.decoder.properties["/SYS/MB/PHY.VideoChannelId"])
+
+    async def test_route_service(self):
+        response = await self.hass.services.async_call(
+            DOMAIN,
+            SERVICE_ROUTE,
+            {"routes": {self.decoder_entity_id: "Encoder 2", self.encoder_entity_id: "Encoder 1"}},
+            blocking=True,
+            return_response=True,
+        )
+        self.assertTrue(response["results"][self.decoder_entity_id]["success"])
+        self.assertFalse(response["results"][self.encoder_entity_id]["success"])
+
+        # Without a response to report them in, failures are raised
+        with self.assertRaisesRegex(HomeAssistantError, "Not a decoder"):
+            await self.hass.services.async_call(
+                DOMAIN, SERVICE_ROUTE, {"routes": {self.encoder_entity_id: "Encoder 1"}}, blocking=True
+            )
+
+
+class TestAudit(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.servers = [FakeLW3Server(build_device_properties(i)) for i in range(6)]
+        for server in self.servers:
+            server.properties["/MEDIA/VIDEO/I1.SignalPresent"] = "1"
+            server.properties["/MEDIA/VIDEO/I1.Connected"] = "1"
+            await server.start()
+
+        self.lw3s = [LW3("127.0.0.1", server.port, timeout=AUDIT_TIMEOUT) for server in self.servers]
+        self.targets = [
+            AuditTarget(f"entry{i}", f"Decoder {i}", "VINX-110-HDMI-DEC", lw3) for i, lw3 in enumerate(self.lw3s)
+        ]
+
+    async def asyncTearDown(self):
+        for lw3 in self.lw3s:
+            await lw3.disconnect()
+        for server in self.servers:
+            await server.stop()
+
+    async def test_audit(self):
+        self.servers[1].properties["/.FirmwareVersion"] = "7.3.0"
+        self.servers[2].latency = 0.2
+        await self.servers[3].stop()
+
+        report = await async_audit_devices(self.targets)
+
+        self.assertEqual(
+            {"devices": 6, "reachable": 5, "firmware_versions": {"VINX-110-HDMI-DEC": {"7.4.1": 4, "7.3.0": 1}}},
+            report["summary"],
+        )
+
+        device = report["devices"][0]
+        self.assertEqual("7.4.1", device["firmware_version"])
+        self.assertEqual("000000", device["serial_number"])
+        self.assertEqual("1", device["signal_present"])
+        self.assertIsNone(device["uptime"])
+        self.assertFalse(report["devices"][3]["reachable"])
+
+        self.assertEqual(
+            [("Decoder 1", "firmware_version"), ("Decoder 2", "round_trip_time"), ("Decoder 3", "unreachable")],
+            [(outlier["name"], outlier["reason"]) for outlier in report["outliers"]],
+        )
+
+    async def test_audit_round_trip_time_excludes_batched_read(self):
+        # The batched read of one device takes a while to transfer, which doesn't make the device itself slow
+        self.servers[1].properties.update({f"/.Edid{i}": "00" * 256 for i in range(200)})
+        self.servers[1].fragment_size = 4096
+        self.servers[1].fragment_interval = 0.01
+
+        report = await async_audit_devices(self.targets)
+
+        # The round trip is only measured once the batched read has been received
+        self.assertEqual("GET /.ProductName", self.servers[1].commands[-1])
+        self.assertEqual([], report["outliers"])
+
+    async def test_audit_round_trip_time_bypasses_cache(self):
+        lw3 = LW3("127.0.0.1", self.servers[0].port, timeout=AUDIT_TIMEOUT, cache_ttl=60)
+        self.lw3s.append(lw3)
+        await lw3.get_property("/.ProductName")
+        self.servers[0].latency = 0.05
+
+        report = await async_audit_devices([AuditTarget("entry0", "Decoder 0", "VINX-110-HDMI-DEC", lw3)])
+
+        # A cached value says nothing about how fast the device responds
+        self.assertGreaterEqual(report["devices"][0]["round_trip_time"], 50)
+        self.assertEqual(2, self.servers[0].commands.count("GET /.ProductName"))
+
+    def test_round_trip_time_outliers(self):
+        devices = [
+            {
+                "entry_id": f"entry{i}",
+                "name": f"Decoder {i}",
+                "product_name": "VINX-110-HDMI-DEC",
+                "reachable": True,
+                "firmware_version": "7.4.1",
+                "round_trip_time": round_trip_time,
+            }
+            for i, round_trip_time in enumerate([10, 12, 11, 45, 200])
+        ]
+
+        # Both much slower than the median and slower by a noticeable amount
+        self.assertEqual(
+            [("Decoder 4", 200, 12)],
+            [
+                (outlier["name"], outlier["round_trip_time"], outlier["median_round_trip_time"])
+                for outlier in find_audit_outliers(devices)
+            ],
+        )
+
+    async def test_audit_takes_about_one_timeout(self):
+        for server in self.servers:
+            server.latency = 0.3
+
+        start = time.monotonic()
+        report = await async_audit_devices(self.targets)
+
+        self.assertEqual(6, report["summary"]["reachable"])
+        self.assertLess(time.monotonic() - start, 1)
@@ -0,0 +1,90 @@
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from custom_components.vinx.lw3 import LW3
+from custom_components.vinx.snapshot import TreeDiff, TreeSnapshot, TreeWatcher, walk_tree
+from tests.fake_lw3_server import FakeLW3Server, build_discovery_properties
+
+
+class TestTreeSnapshot(TestCase):
+    def test_mapping(self):
+        snapshot = TreeSnapshot("/", {"/": {"ProductName": "VINX"}, "/SYS/MB": {"DeviceLabel": "Foo"}})
+        self.assertEqual({"/.ProductName": "VINX", "/SYS/MB.DeviceLabel": "Foo"}, dict(snapshot))
+        self.assertEqual("Foo", snapshot["/SYS/MB.DeviceLabel"])
+        self.assertNotIn("/SYS/MB.Nonexistent", snapshot)
+        self.assertEqual({"DeviceLabel": "Foo"}, snapshot.nodes["/SYS/MB"])
+
+    def test_diff(self):
+        previous = TreeSnapshot("/", {"/A": {"X": "1", "Y": "2"}, "/B": {"Z": "3"}, "/C": {"W": "4"}})
+        current = TreeSnapshot("/", {"/A": {"X": "1", "Y": "5", "V": "6"}, "/B": {"Z": "3"}, "/D": {"U": "7"}})
+
+        self.assertEqual(
+            TreeDiff({"/A.V": "6", "/D.U": "7"}, {"/A.Y": "5"}, frozenset({"/C.W"})), current.diff(previous)
+        )
+        self.assertFalse(current.diff(current))
+
+
+class TestWalkTree(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeLW3Server(
+            {
+                "/.ProductName": "VINX-110-HDMI-DEC",
+                "/SYS/MB.DeviceLabel": "Decoder",
+                "/MEDIA/VIDEO/I1.SignalPresent": "0",
+                **build_discovery_properties(20, 5),
+            }
+        )
+        await self.server.start()
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=1)
+
+    async def asyncTearDown(self):
+        await self.lw3.disconnect()
+        await self.server.stop()
+
+    async def test_walk_tree(self):
+        snapshot = await walk_tree(self.lw3, "/")
+        self.assertEqual(self.server.properties, dict(snapshot))
+        self.assertEqual(len(self.server.nodes), len(snapshot.nodes))
+        self.assertEqual(len(self.server.nodes), len(self.server.commands))
+
+        snapshot = await walk_tree(self.lw3, "/DISCOVERY")
+        self.assertEqual(100, len(snapshot))
+
+    async def test_walk_is_capped(self):
+        snapshot = await walk_tree(self.lw3, "/", max_nodes=10)
+        self.assertTrue(snapshot.truncated)
+        self.assertEqual(10, len(snapshot.nodes))
+        self.assertFalse((await walk_tree(self.lw3, "/SYS")).truncated)
+
+    async def test_walk_is_bounded(self):
+        in_flight = 0
+        max_in_flight = 0
+        get_all = self.lw3.get_all
+
+        async def counting_get_all(path):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            try:
+                return await get_all(path)
+            finally:
+                in_flight -= 1
+
+        self.lw3.get_all = counting_get_all
+        self.server.latency = 0.01
+        await walk_tree(self.lw3, "/DISCOVERY", concurrency=3)
+        self.assertEqual(3, max_in_flight)
+
+    async def test_walk_propagates_connection_errors(self):
+        await self.server.stop()
+
+        with self.assertRaises(ConnectionError):
+            await walk_tree(self.lw3, "/")
+
+    async def test_watcher(self):
+        watcher = TreeWatcher(self.lw3, "/SYS")
+        self.assertEqual({"/SYS/MB.DeviceLabel": "Decoder"}, (await watcher.async_refresh()).added)
+        self.assertFalse(await watcher.async_refresh())
+
+        self.server.change_property("/SYS/MB.DeviceLabel", "Projector")
+        self.assertEqual({"/SYS/MB.DeviceLabel": "Projector"}, (await watcher.async_refresh()).changed)
+        self.assertEqual("Projector", watcher.snapshot["/SYS/MB.DeviceLabel"])
@@ -0,0 +1,83 @@
+from unittest import TestCase
+
+from custom_components.vinx.discovery import DiscoveredEncoder
+from custom_components.vinx.sources import SourceIndex
+
+
+def encoder(mac_address: str, device_name: str, video_channel_id: str) -> DiscoveredEncoder:
+    return DiscoveredEncoder(mac_address, f"/DISCOVERY/TX{mac_address[-5:]}", device_name, video_channel_id, 0)
+
+
+class TestSourceIndex(TestCase):
+    def setUp(self):
+        self.index = SourceIndex()
+        self.laptop = encoder("00:11:aa:e0:01:43", "Laptop", "1")
+        self.camera = encoder("00:11:aa:e0:01:44", "Camera", "2")
+        self.assertTrue(self.index.update([self.laptop, self.camera]))
+
+    def test_lookups(self):
+        self.assertEqual(["Camera", "Laptop"], self.index.names)
+        self.assertEqual("1", self.index.get_by_name("Laptop").video_channel_id)
+        self.assertEqual("Laptop", self.index.get_by_video_channel_id("1").name)
+        self.assertEqual("Camera", self.index.get_by_mac_address("00:11:AA:E0:01:44").name)
+        self.assertIsNone(self.index.get_by_name("Projector"))
+
+    def test_resolve(self):
+        self.assertEqual("Laptop", self.index.resolve("Laptop").name)
+        self.assertEqual("Laptop", self.index.resolve("  laptop ").name)
+        self.assertEqual("Camera", self.index.resolve("00:11:aa:e0:01:44").name)
+        self.assertEqual("Camera", self.index.resolve("2").name)
+        self.assertIsNone(self.index.resolve("3"))
+
+    def test_duplicate_names(self):
+        other_laptop = encoder("00:11:aa:e0:01:45", "Laptop", "3")
+        self.assertTrue(self.index.update([self.laptop, self.camera, other_laptop]))
+        self.assertEqual(
+            ["Camera", "Laptop (00:11:aa:e0:01:43)", "Laptop (00:11:aa:e0:01:45)"],
+            self.index.names,
+        )
+        self.assertEqual("3", self.index.resolve("Laptop (00:11:aa:e0:01:45)").video_channel_id)
+        self.assertEqual("Laptop (00:11:aa:e0:01:43)", self.index.get_by_video_channel_id("1").name)
+
+        # Once the name is unique again the plain name is used
+        self.assertTrue(self.index.update([self.laptop, self.camera]))
+        self.assertEqual(["Camera", "Laptop"], self.index.names)
+
+    def test_incremental_update(self):
+        self.assertFalse(self.index.update([self.laptop, self.camera]))
+
+        camera = self.index.get_by_name("Camera")
+        self.assertTrue(self.index.update([encoder("00:11:aa:e0:01:43", "Document camera", "1"), self.camera]))
+        self.assertEqual(["Camera", "Document camera"], self.index.names)
+        self.assertIsNone(self.index.get_by_name("Laptop"))
+        self.assertEqual("Document camera", self.index.get_by_video_channel_id("1").name)
+
+        # Unaffected sources are left alone
+        self.assertIs(camera, self.index.get_by_name("Camera"))
+
+        self.assertTrue(self.index.update([]))
+        self.assertEqual(0, len(self.index))
+        self.assertEqual([], self.index.names)
+
+    def test_names_differing_in_case(self):
+        other_laptop = encoder("00:11:aa:e0:01:45", "LAPTOP", "3")
+        self.assertTrue(self.index.update([self.laptop, self.camera, other_laptop]))
+
+        # Exact names still match, lenient matching is ambiguous
+        self.assertEqual("1", self.index.get_by_name("Laptop").video_channel_id)
+        self.assertEqual("3", self.index.get_by_name("LAPTOP").video_channel_id)
+        self.assertIsNone(self.index.get_by_name("laptop"))
+
+        # Once the other one is gone the name can be matched leniently again
+        self.assertTrue(self.index.update([self.camera, other_laptop]))
+        self.assertEqual("3", self.index.get_by_name("laptop").video_channel_id)
+
+    def test_shared_video_channel(self):
+        other_camera = encoder("00:11:aa:e0:01:45", "Other camera", "2")
+        with self.assertLogs("custom_components.vinx.sources", "WARNING"):
+            self.assertTrue(self.index.update([self.laptop, self.camera, other_camera]))
+        self.assertEqual("Other camera", self.index.get_by_video_channel_id("2").name)
+
+        # The remaining source is found by the channel once the other one is gone
+        self.assertTrue(self.index.update([self.laptop, self.camera]))
+        self.assertEqual("Camera", self.index.get_by_video_channel_id("2").name)
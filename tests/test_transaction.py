@@ -0,0 +1,74 @@
+from unittest import IsolatedAsyncioTestCase
+
+from custom_components.vinx.lw3 import LW3
+from custom_components.vinx.transaction import SetStatus, set_properties
+from tests.fake_lw3_server import FakeLW3Server
+
+
+class TestSetProperties(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeLW3Server(
+            {
+                "/SYS/MB.DeviceLabel": "Encoder",
+                "/MEDIA/AUDIO/I1.Source": "HDMI",
+                "/MEDIA/VIDEO/I1.EdidIndex": "F49",
+                "/MEDIA/VIDEO/I1.HdcpEnable": "1",
+            }
+        )
+        await self.server.start()
+        self.lw3 = LW3("127.0.0.1", self.server.port, timeout=1)
+        self.values = {
+            "/MEDIA/VIDEO/I1.EdidIndex": "U1",
+            "/MEDIA/AUDIO/I1.Source": "Analog",
+            "/SYS/MB.DeviceLabel": "Lobby",
+            "/MEDIA/VIDEO/I1.HdcpEnable": "0",
+        }
+
+    async def asyncTearDown(self):
+        await self.lw3.disconnect()
+        await self.server.stop()
+
+    async def test_all_writes_succeed(self):
+        result = await set_properties(self.lw3, self.values)
+
+        self.assertTrue(result)
+        self.assertEqual("Lobby", self.server.properties["/SYS/MB.DeviceLabel"])
+        self.assertEqual("Encoder", result.outcomes["/SYS/MB.DeviceLabel"].previous_value)
+
+        # The previous values of the two video properties are read with one GETALL, the rest with a GET each
+        self.assertEqual(["GET", "GET", "GETALL"], sorted(command.split()[0] for command in self.server.commands[:3]))
+        self.assertEqual([f"SET {path}={value}" for path, value in self.values.items()], self.server.commands[3:])
+
+    async def test_failed_write_is_rolled_back(self):
+        self.server.read_only_paths.add("/SYS/MB.DeviceLabel")
+        result = await set_properties(self.lw3, self.values)
+
+        self.assertFalse(result)
+        self.assertEqual(
+            {
+                "/MEDIA/VIDEO/I1.EdidIndex": SetStatus.ROLLED_BACK,
+                "/MEDIA/AUDIO/I1.Source": SetStatus.ROLLED_BACK,
+                "/SYS/MB.DeviceLabel": SetStatus.FAILED,
+                "/MEDIA/VIDEO/I1.HdcpEnable": SetStatus.ROLLED_BACK,
+            },
+            {path: outcome.status for path, outcome in result.outcomes.items()},
+        )
+        self.assertIsInstance(result.errors["/SYS/MB.DeviceLabel"], ValueError)
+        self.assertEqual("F49", self.server.properties["/MEDIA/VIDEO/I1.EdidIndex"])
+        self.assertEqual("HDMI", self.server.properties["/MEDIA/AUDIO/I1.Source"])
+
+    async def test_nothing_is_written_when_previous_values_cannot_be_read(self):
+        result = await set_properties(self.lw3, {**self.values, "/SYS/MB.Nonexistent": "1"})
+
+        self.assertEqual({SetStatus.NOT_ATTEMPTED}, {outcome.status for outcome in result.outcomes.values()})
+        self.assertEqual(["/SYS/MB.Nonexistent"], list(result.errors.keys()))
+        self.assertFalse(any(command.startswith("SET") for command in self.server.commands))
+
+    async def test_without_rollback(self):
+        self.server.read_only_paths.add("/SYS/MB.DeviceLabel")
+        result = await set_properties(self.lw3, self.values, rollback=False)
+
+        self.assertEqual(SetStatus.APPLIED, result.outcomes["/MEDIA/AUDIO/I1.Source"].status)
+        self.assertEqual(SetStatus.FAILED, result.outcomes["/SYS/MB.DeviceLabel"].status)
+        self.assertEqual("Analog", self.server.properties["/MEDIA/AUDIO/I1.Source"])
+        self.assertEqual(4, len(self.server.commands))